@@ -0,0 +1,802 @@
+import argparse
+import json
+import resource
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import pymongo
+from pymongo.errors import OperationFailure
+
+from partie_3_req_nosql import (
+    CHAMPS_CAPTEUR, META_MESURES, REQUETES, REQUETES_DENORMALISEES,
+    adapter_serie_temporelle, executer_requete, lire_schema, req_i_lookup, req_k_lookup,
+    requetes_pour_schema
+)
+import donnees_dashboard
+from partie_1_req_sql import REQUETES_SQL, SQLITE_PATH, materialiser_intermediaires
+from partie_2_migration import TOTAUX_BUCKET
+from plan_index import plan_pour_schema
+from rollups import aplatir_buckets
+from source_sqlite import connecter
+
+# ==============================================================================
+# Configuration
+# ==============================================================================
+MONGO_URI = "mongodb://localhost:27017/"
+MONGO_DB = "Paris2055"
+
+# exécutions mesurées et exécutions préalables non mesurées (cache, plans)
+REPETITIONS = 5
+ECHAUFFEMENT = 1
+# tolérance relative sur les moyennes (l'ordre des sommes diffère entre variantes)
+TOLERANCE = 1e-9
+
+# volumes synthétiques (copies multipliées des collections sources) des bancs correlation et chauffeurs
+FACTEURS_VOLUME = [1, 10, 100]
+# résultats SQL de référence des requêtes I et K
+CSV_SQL_I = "./csv/I_sql.csv"
+CSV_SQL_K = "./csv/K_sql.csv"
+
+# rapport détaillé du banc sql_nosql
+RAPPORT_SQL_NOSQL = "benchmark_sql_nosql.json"
+# percentiles de latence rapportés
+PERCENTILES = [50, 95, 99]
+# période d'échantillonnage de la mémoire résidente (secondes)
+PERIODE_RSS = 0.005
+# instructions de la machine virtuelle sqlite entre deux appels du compteur
+PAS_INSTRUCTIONS_VM = 100
+
+# requêtes réécrites par la dénormalisation des mesures
+LETTRES_DENORMALISEES = ["d", "e", "i", "j"]
+# requêtes sur Mesures comparées entre collection classique et séries temporelles
+LETTRES_SERIE_TEMPORELLE = ["m", "j", "d"]
+GRANULARITE = "minutes"
+# requêtes sur Horaires comparées entre documents à plat et buckets par véhicule et par jour
+LETTRES_BUCKETS = ["b", "g"]
+# lignes sélectionnées dans la carte du dashboard (banc arrets_ligne)
+NB_LIGNES_CARTE = 10
+
+# ==============================================================================
+# Outils de mesure
+# ==============================================================================
+def chronometrer(fonction, repetitions=REPETITIONS, echauffement=ECHAUFFEMENT):
+    """
+    exécutions répétées d'une fonction sans argument
+
+    Args:
+        fonction (callable): traitement à mesurer
+        repetitions (int): nombre d'exécutions mesurées
+        echauffement (int): nombre d'exécutions préalables non mesurées
+
+    Returns:
+        tuple: (durées en secondes, résultat de la dernière exécution)
+    """
+    resultat = None
+    for _ in range(echauffement):
+        resultat = fonction()
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        durees.append(time.perf_counter() - debut)
+    return durees, resultat
+
+def resultats_identiques(df_ref, df_test, tolerance=TOLERANCE):
+    """
+    comparaison de deux résultats, indépendamment de l'ordre des lignes à égalité
+
+    Args:
+        df_ref (pd.DataFrame): résultat de référence
+        df_test (pd.DataFrame): résultat de la variante
+        tolerance (float): tolérance relative sur les colonnes numériques
+
+    Returns:
+        bool: True si les deux résultats contiennent les mêmes lignes
+    """
+    if list(df_ref.columns) != list(df_test.columns) or len(df_ref) != len(df_test):
+        return False
+    colonnes = list(df_ref.columns)
+    ref = df_ref.sort_values(colonnes).reset_index(drop=True)
+    test = df_test.sort_values(colonnes).reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(ref, test, check_dtype=False, check_exact=False, rtol=tolerance)
+    except AssertionError:
+        return False
+    return True
+
+def comparer_variantes(db, variantes, lettres, repetitions=REPETITIONS, echauffement=ECHAUFFEMENT):
+    """
+    chronométrage de plusieurs catalogues de pipelines sur les mêmes requêtes
+
+    la première variante sert de référence pour le contrôle des résultats.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        variantes (dict): nom de la variante -> catalogue de requêtes
+        lettres (list): requêtes à comparer
+        repetitions (int): nombre d'exécutions mesurées
+        echauffement (int): nombre d'exécutions préalables non mesurées
+
+    Returns:
+        pd.DataFrame: une ligne par requête et par variante
+    """
+    lignes = []
+    for lettre in lettres:
+        reference = None
+        for nom, catalogue in variantes.items():
+            durees, df = chronometrer(lambda: executer_requete(db, catalogue[lettre]), repetitions, echauffement)
+            if reference is None:
+                reference = (statistics.median(durees), df)
+            lignes.append({
+                "requete": lettre.upper(),
+                "variante": nom,
+                "mediane_ms": statistics.median(durees) * 1000,
+                "min_ms": min(durees) * 1000,
+                "acceleration": reference[0] / statistics.median(durees),
+                "identique": resultats_identiques(reference[1], df),
+            })
+    return pd.DataFrame(lignes)
+
+# ==============================================================================
+# Bancs d'essai
+# ==============================================================================
+def banc_denormalisation(db, args):
+    """
+    $lookup par mesure vers Reseau contre mesures dénormalisées (D, E, I, J)
+
+    Args:
+        db (pymongo.database.Database): base migrée avec --denormaliser
+        args (argparse.Namespace): options de la ligne de commande
+
+    Returns:
+        pd.DataFrame: tableau comparatif
+    """
+    if not lire_schema(db).get("denormalisation"):
+        sys.exit("Mesures non dénormalisées : relancer partie_2_migration.py --denormaliser")
+    variantes = {"lookup": REQUETES, "denormalise": REQUETES_DENORMALISEES}
+    return comparer_variantes(db, variantes, LETTRES_DENORMALISEES, args.repetitions, args.echauffement)
+
+def copier_mesures(db, schema, granularite=GRANULARITE):
+    """
+    copie serveur de Mesures dans l'autre disposition (à plat ou série temporelle)
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        schema (dict): options du schéma de la collection Mesures existante
+        granularite (str): granularité de la copie en série temporelle
+
+    Returns:
+        tuple: (nom de la copie, options du schéma de la copie)
+    """
+    if schema.get("serie_temporelle"):
+        copie, schema_copie = "Mesures_plat", {**schema, "serie_temporelle": None}
+        pipeline = [
+            {"$addFields": {champ: f"${META_MESURES}.{champ}" for champ in CHAMPS_CAPTEUR}},
+            {"$project": {META_MESURES: 0}},
+            {"$out": copie},
+        ]
+    else:
+        copie, schema_copie = "Mesures_ts", {**schema, "serie_temporelle": granularite}
+        pipeline = [
+            # le timeField est obligatoire en série temporelle
+            {"$match": {"date": {"$type": "date"}}},
+            {"$addFields": {META_MESURES: {champ: f"${champ}" for champ in CHAMPS_CAPTEUR}}},
+            {"$project": {champ: 0 for champ in CHAMPS_CAPTEUR}},
+            {"$out": {"db": db.name, "coll": copie, "timeseries": {
+                "timeField": "date", "metaField": META_MESURES, "granularity": granularite
+            }}},
+        ]
+    db[copie].drop()
+    db.Mesures.aggregate(pipeline, allowDiskUse=True)
+    modeles = [pymongo.IndexModel(index["cles"]) for index in plan_pour_schema(schema_copie)["Mesures"]]
+    db[copie].create_indexes(modeles)
+    return copie, schema_copie
+
+def stockage(db, collection):
+    """
+    taille de stockage d'une collection et de ses index
+
+    Args:
+        db (pymongo.database.Database): base mongodb
+        collection (str): nom de la collection
+
+    Returns:
+        dict: documents, taille des données, taille sur disque et taille des index (Mo)
+    """
+    stats = next(db[collection].aggregate([{"$collStats": {"storageStats": {}}}]))["storageStats"]
+    return {
+        "collection": collection,
+        "documents": db[collection].estimated_document_count(),
+        "taille_mo": stats.get("size", 0) / 1024 ** 2,
+        "stockage_mo": stats.get("storageSize", 0) / 1024 ** 2,
+        "index_mo": stats.get("totalIndexSize", 0) / 1024 ** 2,
+    }
+
+def catalogue_redirige(schema, source, collection):
+    """
+    catalogue des requêtes dont la collection source est remplacée par une copie
+
+    Args:
+        schema (dict): options du schéma de la copie
+        source (str): collection remplacée (Mesures, Horaires)
+        collection (str): nom de la copie
+
+    Returns:
+        dict: catalogue de requêtes
+    """
+    catalogue = requetes_pour_schema(schema)
+    return {
+        lettre: {**requete, "collection": collection} if requete["collection"] == source else requete
+        for lettre, requete in catalogue.items()
+    }
+
+def banc_serie_temporelle(db, args):
+    """
+    stockage et latence des requêtes M, J, D : collection classique contre séries temporelles
+
+    une copie de Mesures dans l'autre disposition est créée le temps du banc d'essai.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        args (argparse.Namespace): options de la ligne de commande
+
+    Returns:
+        pd.DataFrame: tableau comparatif des latences
+    """
+    schema = lire_schema(db)
+    copie, schema_copie = copier_mesures(db, schema, args.granularite)
+    collections = {"Mesures": schema, copie: schema_copie}
+    try:
+        print(pd.DataFrame([stockage(db, nom) for nom in collections]).to_string(
+            index=False, float_format=lambda x: f"{x:.2f}"
+        ))
+        variantes = {
+            ("serie_temporelle" if options.get("serie_temporelle") else "classique"): catalogue_redirige(options, "Mesures", nom)
+            for nom, options in collections.items()
+        }
+        return comparer_variantes(db, variantes, LETTRES_SERIE_TEMPORELLE, args.repetitions, args.echauffement)
+    finally:
+        db[copie].drop()
+
+def copier_horaires(db, schema):
+    """
+    copie serveur de Horaires dans l'autre disposition (à plat ou buckets)
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        schema (dict): options du schéma de la collection Horaires existante
+
+    Returns:
+        tuple: (nom de la copie, options du schéma de la copie)
+    """
+    if schema.get("buckets_horaires"):
+        copie, schema_copie = "Horaires_plat", {**schema, "buckets_horaires": False}
+        pipeline = aplatir_buckets([{"$project": {"id_horaire": 0}}, {"$out": copie}], {})
+    else:
+        copie, schema_copie = "Horaires_buckets", {**schema, "buckets_horaires": True}
+        pipeline = [
+            {"$group": {
+                "_id": {
+                    "id_vehicule": "$id_vehicule",
+                    "jour": {"$dateTrunc": {"date": "$heure_effective", "unit": "day"}}
+                },
+                "id_ligne": {"$first": "$id_ligne"},
+                "passages": {"$push": {
+                    "id_horaire": "$_id",
+                    "id_arret": "$id_arret",
+                    "heure_prevue": "$heure_prevue",
+                    "heure_effective": "$heure_effective",
+                    "passagers_estimes": "$passagers_estimes"
+                }}
+            }},
+            {"$set": {"id_vehicule": "$_id.id_vehicule", "jour": "$_id.jour"}},
+            {"$set": TOTAUX_BUCKET},
+            {"$out": copie},
+        ]
+    db[copie].drop()
+    db.Horaires.aggregate(pipeline, allowDiskUse=True)
+    modeles = [pymongo.IndexModel(index["cles"]) for index in plan_pour_schema(schema_copie)["Horaires"]]
+    db[copie].create_indexes(modeles)
+    return copie, schema_copie
+
+def banc_buckets_horaires(db, args):
+    """
+    stockage et latence des requêtes B, G : Horaires à plat contre buckets par véhicule et par jour
+
+    une copie de Horaires dans l'autre disposition est créée le temps du banc d'essai.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        args (argparse.Namespace): options de la ligne de commande
+
+    Returns:
+        pd.DataFrame: tableau comparatif des latences
+    """
+    schema = lire_schema(db)
+    copie, schema_copie = copier_horaires(db, schema)
+    collections = {"Horaires": schema, copie: schema_copie}
+    try:
+        print(pd.DataFrame([stockage(db, nom) for nom in collections]).to_string(
+            index=False, float_format=lambda x: f"{x:.2f}"
+        ))
+        variantes = {
+            ("buckets" if options.get("buckets_horaires") else "plat"): catalogue_redirige(options, "Horaires", nom)
+            for nom, options in collections.items()
+        }
+        return comparer_variantes(db, variantes, LETTRES_BUCKETS, args.repetitions, args.echauffement)
+    finally:
+        db[copie].drop()
+
+def rediriger_lookups(pipeline, collections):
+    """
+    remplacement des collections jointes par $lookup (sous-pipelines compris)
+
+    Args:
+        pipeline (list): pipeline d'agrégation
+        collections (dict): collection d'origine -> collection de remplacement
+
+    Returns:
+        list: pipeline redirigé
+    """
+    redirige = []
+    for etape in pipeline:
+        if "$lookup" in etape:
+            lookup = dict(etape["$lookup"])
+            lookup["from"] = collections.get(lookup["from"], lookup["from"])
+            if "pipeline" in lookup:
+                lookup["pipeline"] = rediriger_lookups(lookup["pipeline"], collections)
+            etape = {"$lookup": lookup}
+        redirige.append(etape)
+    return redirige
+
+def copier_volume(db, schema, collection, facteur):
+    """
+    copie serveur d'une collection dont chaque document est répété facteur fois
+
+    les moyennes sont inchangées : le résultat attendu reste celui de la base d'origine.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        schema (dict): options du schéma (index de la copie)
+        collection (str): collection à multiplier
+        facteur (int): nombre d'exemplaires de chaque document
+
+    Returns:
+        str: nom de la copie
+    """
+    copie = f"{collection}_x{facteur}"
+    db[copie].drop()
+    db[collection].aggregate([
+        {"$set": {"_exemplaire": {"$range": [0, facteur]}}},
+        {"$unwind": "$_exemplaire"},
+        # nouvel _id généré par $out pour chaque exemplaire
+        {"$unset": ["_id", "_exemplaire"]},
+        {"$out": copie},
+    ], allowDiskUse=True)
+    modeles = [pymongo.IndexModel(index["cles"]) for index in plan_pour_schema(schema)[collection]]
+    db[copie].create_indexes(modeles)
+    return copie
+
+def memoire_pipeline(db, requete):
+    """
+    mémoire des étapes bloquantes et débordement sur disque selon explain executionStats
+
+    Args:
+        db (pymongo.database.Database): base mongodb
+        requete (dict): entrée du catalogue (collection, pipeline)
+
+    Returns:
+        tuple: (mémoire maximale d'une étape en Mo, débordement sur disque)
+    """
+    explain = db.command(
+        "explain",
+        {"aggregate": requete["collection"], "pipeline": requete["pipeline"], "cursor": {}, "allowDiskUse": True},
+        verbosity="executionStats"
+    )
+    pic, disque = 0, False
+
+    def visiter(noeud):
+        nonlocal pic, disque
+        if isinstance(noeud, list):
+            for valeur in noeud:
+                visiter(valeur)
+            return
+        if not isinstance(noeud, dict):
+            return
+        for cle, valeur in noeud.items():
+            if cle in ("maxAccumulatorMemoryUsageBytes", "peakTrackedMemBytes"):
+                # par accumulateur ($group) ou total de l'étape
+                octets = sum(valeur.values()) if isinstance(valeur, dict) else valeur
+                pic = max(pic, int(octets))
+            elif cle in ("usedDisk", "spills"):
+                disque = disque or bool(valeur)
+            else:
+                visiter(valeur)
+
+    visiter(explain)
+    return pic / 1024 ** 2, disque
+
+def sans_disque(db, requete):
+    """
+    exécution sans allowDiskUse : la limite de 100 Mo par étape bloquante est-elle atteinte
+
+    Args:
+        db (pymongo.database.Database): base mongodb
+        requete (dict): entrée du catalogue (collection, pipeline)
+
+    Returns:
+        bool: True si le pipeline aboutit sans débordement sur disque
+    """
+    try:
+        for _ in db[requete["collection"]].aggregate(requete["pipeline"], allowDiskUse=False):
+            pass
+    except OperationFailure:
+        return False
+    return True
+
+def comparer_volumes(db, variantes, multipliees, reference, args):
+    """
+    chronométrage et mémoire de variantes d'une requête à volume croissant
+
+    les collections multipliées sont copiées pour chaque facteur, le temps des mesures ;
+    la première variante sert de référence pour l'accélération.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        variantes (dict): nom -> entrée du catalogue (collection, pipeline, colonnes)
+        multipliees (list): collections dont le volume est multiplié
+        reference (pd.DataFrame): résultat attendu (csv SQL)
+        args (argparse.Namespace): options de la ligne de commande (facteurs, répétitions)
+
+    Returns:
+        pd.DataFrame: une ligne par facteur et par variante
+    """
+    schema = lire_schema(db)
+    if schema.get("serie_temporelle"):
+        variantes = {
+            nom: {**v, "pipeline": adapter_serie_temporelle(v["pipeline"], v["collection"] == "Mesures")}
+            for nom, v in variantes.items()
+        }
+    lignes = []
+    for facteur in args.facteurs:
+        collections = {nom: (nom if facteur == 1 else copier_volume(db, schema, nom, facteur)) for nom in multipliees}
+        try:
+            mediane_reference = None
+            for nom, variante in variantes.items():
+                redirigee = {
+                    **variante,
+                    "collection": collections.get(variante["collection"], variante["collection"]),
+                    "pipeline": rediriger_lookups(variante["pipeline"], collections),
+                }
+                durees, df = chronometrer(lambda: executer_requete(db, redirigee), args.repetitions, args.echauffement)
+                mediane = statistics.median(durees)
+                mediane_reference = mediane_reference or mediane
+                memoire_mo, disque = memoire_pipeline(db, redirigee)
+                lignes.append({
+                    "facteur": facteur,
+                    "variante": nom,
+                    "mediane_ms": mediane * 1000,
+                    "min_ms": min(durees) * 1000,
+                    "acceleration": mediane_reference / mediane,
+                    "memoire_mo": memoire_mo,
+                    "disque": disque,
+                    "sans_disque_ok": sans_disque(db, redirigee),
+                    "identique": resultats_identiques(reference, df),
+                })
+        finally:
+            for nom, copie in collections.items():
+                if copie != nom:
+                    db[copie].drop()
+    return pd.DataFrame(lignes)
+
+def banc_correlation(db, args):
+    """
+    requête I : $lookup corrélé par arrêt contre agrégations groupées, à volume croissant
+
+    Mesures et TraficEvents sont multipliés par chaque facteur ; le résultat de chaque
+    variante est comparé au csv SQL de référence (I_sql.csv).
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        args (argparse.Namespace): options de la ligne de commande
+
+    Returns:
+        pd.DataFrame: une ligne par facteur et par variante
+    """
+    requete = REQUETES["i"]
+    variantes = {
+        "lookup_par_arret": {**requete, "collection": "Reseau", "pipeline": req_i_lookup},
+        "agregations_groupees": requete,
+    }
+    return comparer_volumes(db, variantes, ["Mesures", "TraficEvents"], pd.read_csv(CSV_SQL_I), args)
+
+def banc_chauffeurs(db, args):
+    """
+    requête K : véhicules x trafic avant le $group contre cumuls par ligne avant la jointure
+
+    TraficEvents est multiplié par chaque facteur ; le résultat de chaque variante
+    est comparé au csv SQL de référence (K_sql.csv).
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        args (argparse.Namespace): options de la ligne de commande
+
+    Returns:
+        pd.DataFrame: une ligne par facteur et par variante
+    """
+    requete = REQUETES["k"]
+    variantes = {
+        "vehicules_x_trafic": {**requete, "collection": "Reseau", "pipeline": req_k_lookup},
+        "cumuls_par_ligne": requete,
+    }
+    return comparer_volumes(db, variantes, ["TraficEvents"], pd.read_csv(CSV_SQL_K), args)
+
+def rss_mo():
+    """
+    mémoire résidente actuelle du processus
+
+    Returns:
+        float: rss en Mo (pic depuis le démarrage si /proc n'est pas disponible)
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / 1024 ** 2
+    except OSError:
+        # ru_maxrss en Kio sous linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def pic_rss(fonction):
+    """
+    exécution d'une fonction en échantillonnant la mémoire résidente du processus
+
+    Args:
+        fonction (callable): fonction sans argument
+
+    Returns:
+        tuple: (résultat de la fonction, pic de rss en Mo pendant l'exécution)
+    """
+    pic = rss_mo()
+    fini = threading.Event()
+
+    def echantillonner():
+        nonlocal pic
+        while not fini.wait(PERIODE_RSS):
+            pic = max(pic, rss_mo())
+
+    thread = threading.Thread(target=echantillonner, daemon=True)
+    thread.start()
+    try:
+        resultat = fonction()
+    finally:
+        fini.set()
+        thread.join()
+    return resultat, max(pic, rss_mo())
+
+def percentiles(durees):
+    """
+    percentiles de latence d'une série d'exécutions
+
+    Args:
+        durees (list): durées en secondes
+
+    Returns:
+        dict: pXX_ms -> latence en millisecondes
+    """
+    serie = pd.Series(durees) * 1000
+    return {f"p{p}_ms": serie.quantile(p / 100) for p in PERCENTILES}
+
+def examines_mongo(db, requete):
+    """
+    documents et clés d'index examinés par un pipeline selon explain executionStats
+
+    les totaux des étapes $lookup (collection jointe) s'ajoutent à ceux du plan principal.
+
+    Args:
+        db (pymongo.database.Database): base mongodb
+        requete (dict): entrée du catalogue (collection, pipeline)
+
+    Returns:
+        tuple: (documents examinés, clés examinées)
+    """
+    explain = db.command(
+        "explain",
+        {"aggregate": requete["collection"], "pipeline": requete["pipeline"], "cursor": {}, "allowDiskUse": True},
+        verbosity="executionStats"
+    )
+    totaux = {"totalDocsExamined": 0, "totalKeysExamined": 0}
+
+    def visiter(noeud):
+        if isinstance(noeud, list):
+            for valeur in noeud:
+                visiter(valeur)
+            return
+        if not isinstance(noeud, dict):
+            return
+        for cle, valeur in noeud.items():
+            if cle in totaux and isinstance(valeur, (int, float)):
+                totaux[cle] += int(valeur)
+            elif cle not in ("rejectedPlans", "allPlansExecution"):
+                visiter(valeur)
+
+    visiter(explain)
+    return totaux["totalDocsExamined"], totaux["totalKeysExamined"]
+
+def instructions_sql(conn, requete):
+    """
+    instructions de la machine virtuelle sqlite exécutées par une requête
+
+    sqlite ne compte pas les lignes lues : le nombre d'instructions (à PAS_INSTRUCTIONS_VM
+    près) en est l'équivalent le plus proche, mesuré hors chronométrage.
+
+    Args:
+        conn (sqlite3.Connection): connexion sqlite source
+        requete (str): requête sql
+
+    Returns:
+        int: nombre approché d'instructions exécutées
+    """
+    compteur = 0
+
+    def compter():
+        nonlocal compteur
+        compteur += 1
+        return 0
+
+    conn.set_progress_handler(compter, PAS_INSTRUCTIONS_VM)
+    try:
+        conn.execute(requete).fetchall()
+    finally:
+        conn.set_progress_handler(None, 0)
+    return compteur * PAS_INSTRUCTIONS_VM
+
+def mesurer(fonction, args):
+    """
+    latences et pic de mémoire résidente d'une requête
+
+    Args:
+        fonction (callable): exécution complète de la requête, sans argument
+        args (argparse.Namespace): options de la ligne de commande (répétitions, échauffement)
+
+    Returns:
+        dict: durées brutes, percentiles, minimum et pic de rss
+    """
+    (durees, _), rss = pic_rss(lambda: chronometrer(fonction, args.repetitions, args.echauffement))
+    return {"durees_ms": [d * 1000 for d in durees], **percentiles(durees),
+            "min_ms": min(durees) * 1000, "rss_pic_mo": rss}
+
+def banc_sql_nosql(db, args):
+    """
+    latences des 14 requêtes A-N sur SQLite (partie 1) et MongoDB (partie 3)
+
+    pour chaque requête et chaque moteur : échauffement, répétitions, percentiles de
+    latence, pic de mémoire résidente du client, lignes ou documents examinés.
+    le rapport détaillé (durées brutes comprises) est écrit en json.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        args (argparse.Namespace): options de la ligne de commande
+
+    Returns:
+        pd.DataFrame: tableau comparatif, une ligne par requête
+    """
+    conn = connecter(args.sqlite, query_only=False)
+    # tables intermédiaires partagées par les requêtes sql : mesurées à part
+    intermediaires = mesurer(lambda: materialiser_intermediaires(conn), args)
+    catalogue = requetes_pour_schema(lire_schema(db))
+    rapport = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "repetitions": args.repetitions,
+        "echauffement": args.echauffement,
+        "schema": lire_schema(db),
+        "sqlite_intermediaires": intermediaires,
+        "requetes": {},
+    }
+    lignes = []
+    for lettre, requete_sql in REQUETES_SQL.items():
+        requete = catalogue[lettre]
+        sql = mesurer(lambda: pd.read_sql_query(requete_sql, conn), args)
+        sql["instructions_vm"] = instructions_sql(conn, requete_sql)
+        nosql = mesurer(lambda: executer_requete(db, requete), args)
+        nosql["docs_examines"], nosql["cles_examinees"] = examines_mongo(db, requete)
+        rapport["requetes"][lettre.upper()] = {"sqlite": sql, "mongodb": nosql}
+        lignes.append({
+            "requete": lettre.upper(),
+            **{f"sqlite_{p}_ms": sql[f"{p}_ms"] for p in ("p50", "p95")},
+            **{f"mongodb_{p}_ms": nosql[f"{p}_ms"] for p in ("p50", "p95")},
+            "rapport_p50": nosql["p50_ms"] / sql["p50_ms"] if sql["p50_ms"] else None,
+            "sqlite_rss_mo": sql["rss_pic_mo"],
+            "mongodb_rss_mo": nosql["rss_pic_mo"],
+            "sqlite_instructions_vm": sql["instructions_vm"],
+            "mongodb_docs_examines": nosql["docs_examines"],
+            "mongodb_cles_examinees": nosql["cles_examinees"],
+        })
+    conn.close()
+
+    with open(args.rapport, "w", encoding="utf-8") as fichier:
+        json.dump(rapport, fichier, indent=2, ensure_ascii=False, default=str)
+    print(f"Rapport : {args.rapport} (tables intermédiaires sqlite : {intermediaires['p50_ms']:.1f} ms en p50)")
+    return pd.DataFrame(lignes)
+
+def banc_arrets_ligne(db, args):
+    """
+    carte du dashboard : latence de sélection d'une ligne
+
+    statistiques de toutes les mesures de la ville puis jointure, contre agrégation des
+    seules mesures des arrêts de la ligne ($match sur id_arret). cache partagé désactivé.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        args (argparse.Namespace): options de la ligne de commande
+
+    Returns:
+        pd.DataFrame: une ligne par ligne de transport et par variante
+    """
+    rollups = bool(args.rollups and lire_schema(db).get("rollups"))
+
+    def toutes_mesures(nom_ligne):
+        df_arrets = pd.DataFrame(donnees_dashboard.agreger(db, "Reseau", donnees_dashboard.pipeline_arrets(nom_ligne), None))
+        return donnees_dashboard.joindre_stats(df_arrets, donnees_dashboard.stats_arrets(db, None, rollups=rollups))
+
+    def mesures_filtrees(nom_ligne):
+        return donnees_dashboard.arrets_carte(db, None, nom_ligne, rollups)
+
+    variantes = {"toutes_mesures": toutes_mesures, "mesures_filtrees": mesures_filtrees}
+    lignes = []
+    for nom_ligne in donnees_dashboard.noms_lignes(db)[:args.lignes]:
+        reference = None
+        for nom, variante in variantes.items():
+            durees, resultat = chronometrer(lambda: variante(nom_ligne), args.repetitions, args.echauffement)
+            resultat = resultat.sort_values("_id").reset_index(drop=True)
+            if reference is None:
+                reference = resultat
+            lignes.append({
+                "ligne": nom_ligne,
+                "variante": nom,
+                "arrets": len(resultat),
+                "mediane_ms": statistics.median(durees) * 1000,
+                "min_ms": min(durees) * 1000,
+                "identique": resultats_identiques(reference, resultat),
+            })
+    df = pd.DataFrame(lignes)
+    # synthèse sur l'ensemble des lignes sélectionnées
+    print(df.groupby("variante", sort=False)["mediane_ms"].describe(percentiles=[0.5, 0.95])
+          .to_string(float_format=lambda x: f"{x:.2f}"))
+    return df
+
+BANCS = {
+    "denormalisation": banc_denormalisation,
+    "serie_temporelle": banc_serie_temporelle,
+    "buckets_horaires": banc_buckets_horaires,
+    "correlation": banc_correlation,
+    "chauffeurs": banc_chauffeurs,
+    "sql_nosql": banc_sql_nosql,
+    "arrets_ligne": banc_arrets_ligne,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bancs d'essai Paris2055")
+    parser.add_argument("banc", choices=list(BANCS), help="banc d'essai à lancer")
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS)
+    parser.add_argument("--echauffement", type=int, default=ECHAUFFEMENT)
+    parser.add_argument("--granularite", choices=["seconds", "minutes", "hours"], default=GRANULARITE,
+                        help="granularité de la copie en série temporelle (banc serie_temporelle)")
+    parser.add_argument("--facteurs", type=int, nargs="+", default=FACTEURS_VOLUME,
+                        help="multiplicateurs du volume des collections sources (bancs correlation et chauffeurs)")
+    parser.add_argument("--uri", default=MONGO_URI, help="serveur mongodb (instance locale de test possible)")
+    parser.add_argument("--sqlite", default=SQLITE_PATH, help="base sqlite source (banc sql_nosql)")
+    parser.add_argument("--rapport", default=RAPPORT_SQL_NOSQL, help="rapport json détaillé (banc sql_nosql)")
+    parser.add_argument("--lignes", type=int, default=NB_LIGNES_CARTE,
+                        help="nombre de lignes sélectionnées (banc arrets_ligne)")
+    parser.add_argument("--rollups", action="store_true", help="statistiques lues dans les rollups (banc arrets_ligne)")
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient(args.uri)
+    db = client[MONGO_DB]
+    print(f"--- Banc d'essai : {args.banc} ---")
+    tableau = BANCS[args.banc](db, args)
+    print(tableau.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+    client.close()
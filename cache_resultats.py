@@ -0,0 +1,152 @@
+import hashlib
+import json
+import sys
+from datetime import datetime
+
+import pymongo
+from bson import ObjectId
+from pymongo.errors import DocumentTooLarge
+
+# ==============================================================================
+# Cache partagé des résultats d'agrégation
+# ==============================================================================
+# une entrée par (collection, pipeline) : _id = empreinte sha256, version des données,
+# documents résultats. la collection est commune à tous les processus (partie 3,
+# workers du dashboard) et survit à leur redémarrage.
+COLLECTION_CACHE = "CacheResultats"
+META_COLLECTION = "MigrationMeta"
+
+# au-delà, le résultat n'est pas conservé (document limité à 16 Mo)
+LIMITE_DOCUMENTS = 50000
+
+def ecrire_version(db):
+    """
+    nouvelle version des données, à la fin de chaque chargement réussi
+
+    les entrées du cache des versions précédentes sont supprimées.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+
+    Returns:
+        str: version écrite
+    """
+    version = str(ObjectId())
+    db[META_COLLECTION].replace_one(
+        {"_id": "version"}, {"version": version, "date": datetime.now()}, upsert=True
+    )
+    db[COLLECTION_CACHE].delete_many({"version": {"$ne": version}})
+    return version
+
+def lire_version(db):
+    """
+    version des données enregistrée par la dernière migration
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+
+    Returns:
+        str or None: version, None si aucune migration ne l'a enregistrée (cache désactivé)
+    """
+    meta = db[META_COLLECTION].find_one({"_id": "version"})
+    return meta["version"] if meta else None
+
+def cle_pipeline(collection, pipeline):
+    """
+    empreinte d'un pipeline et de sa collection source
+
+    l'ordre des clés est conservé : il est significatif dans un $sort.
+
+    Args:
+        collection (str): collection interrogée
+        pipeline (list): pipeline d'agrégation
+
+    Returns:
+        str: empreinte sha256 hexadécimale
+    """
+    contenu = json.dumps([collection, pipeline], default=str, ensure_ascii=False)
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+def lire_cache(db, cle, version):
+    """
+    résultat en cache pour une version des données
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        cle (str): empreinte du pipeline
+        version (str): version courante des données
+
+    Returns:
+        list or None: documents résultats, None si absents ou d'une autre version
+    """
+    entree = db[COLLECTION_CACHE].find_one({"_id": cle, "version": version})
+    return entree["documents"] if entree else None
+
+def ecrire_cache(db, cle, version, documents):
+    """
+    enregistrement d'un résultat dans le cache
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        cle (str): empreinte du pipeline
+        version (str): version des données interrogées
+        documents (list): documents résultats
+
+    Returns:
+        bool: False si le résultat dépasse la taille d'un document
+    """
+    try:
+        db[COLLECTION_CACHE].replace_one(
+            {"_id": cle},
+            {"version": version, "documents": documents, "date": datetime.now()},
+            upsert=True
+        )
+    except DocumentTooLarge:
+        return False
+    return True
+
+def agreger_en_cache(db, collection, pipeline, executer, version, limite=LIMITE_DOCUMENTS):
+    """
+    résultats d'un pipeline lus dans le cache, ou calculés puis mis en cache
+
+    les documents calculés sont transmis au fil de l'eau ; le résultat n'est enregistré
+    qu'une fois le curseur épuisé, et seulement s'il ne dépasse pas la limite.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        collection (str): collection interrogée
+        pipeline (list): pipeline d'agrégation
+        executer (callable): executer() -> itérable des documents (curseur)
+        version (str or None): version des données (None : pas de cache)
+        limite (int): nombre maximal de documents conservés
+
+    Yields:
+        dict: documents résultats
+    """
+    if version is None:
+        yield from executer()
+        return
+    cle = cle_pipeline(collection, pipeline)
+    documents = lire_cache(db, cle, version)
+    if documents is not None:
+        yield from documents
+        return
+    documents = []
+    for doc in executer():
+        if documents is not None:
+            documents.append(doc)
+            if len(documents) > limite:
+                documents = None
+        yield doc
+    if documents is not None:
+        ecrire_cache(db, cle, version, documents)
+
+if __name__ == "__main__":
+    client = pymongo.MongoClient("mongodb://localhost:27017/")
+    db = client["Paris2055"]
+
+    # vidage manuel, par exemple après une modification des données hors migration
+    if "--vider" in sys.argv:
+        print(f"Version des données : {ecrire_version(db)}")
+    print(f"Entrées en cache : {db[COLLECTION_CACHE].count_documents({})}")
+    client.close()
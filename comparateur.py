@@ -0,0 +1,528 @@
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# Configuration
+# ==============================================================================
+DOSSIER_CSV = "./csv"
+
+# écarts de calcul entre sqlite et mongodb (ordre des additions flottantes)
+TOLERANCE_RELATIVE = 1e-9
+TOLERANCE_ABSOLUE = 1e-9
+
+# lecture des fichiers par blocs (vérification de l'ordre, partitionnement)
+TAILLE_BLOC = 100000
+# au-delà, les deux fichiers sont répartis en partitions par empreinte de la clé
+TAILLE_MAX_MEMOIRE = 200 * 1024 ** 2
+# lignes différentes conservées dans le rapport
+NB_EXEMPLES = 10
+
+# lettre -> clés d'alignement des lignes, colonnes de l'ORDER BY, mode de comparaison
+#   "ordre" : l'ordre doit être identique, sauf entre lignes à égalité sur le tri
+#   "ensemble" : ordre indifférent
+#   limite : résultat tronqué (LIMIT), les lignes à égalité avec la dernière peuvent différer
+# sans clé, les lignes sont alignées par leur rang (en mode "ensemble", après un tri
+# des deux résultats sur toutes leurs colonnes).
+COMPARAISONS = {
+    "a": {"cles": ["id_ligne"], "tri": ["retard_moyen"], "mode": "ordre"},
+    "b": {"cles": ["id_ligne"], "tri": ["passagers_moyens_par_jour"], "mode": "ordre"},
+    "c": {"cles": ["nom_ligne"], "tri": ["taux_incident"], "mode": "ordre"},
+    "d": {"cles": ["id_vehicule"], "tri": ["emission_moyenne_CO2"], "mode": "ordre"},
+    "e": {"cles": ["nom"], "tri": ["bruit_moyen"], "mode": "ordre", "limite": True},
+    "f": {"cles": ["nom_ligne"], "tri": ["nom_ligne"], "mode": "ordre"},
+    "g": {"cles": [], "tri": [], "mode": "ensemble"},
+    "h": {"cles": ["id_quartier"], "tri": ["nombre_arrets"], "mode": "ordre"},
+    "i": {"cles": ["id_ligne"], "tri": ["indice_correlation"], "mode": "ordre"},
+    "j": {"cles": ["id_ligne"], "tri": ["temperature_moyenne"], "mode": "ordre"},
+    "k": {"cles": ["id_chauffeur"], "tri": ["retard_moyen"], "mode": "ordre"},
+    "l": {"cles": ["id_ligne"], "tri": ["pourcentage_electrique"], "mode": "ordre"},
+    "m": {"cles": ["id_capteur"], "tri": ["pollution_moyenne"], "mode": "ordre"},
+    "n": {"cles": ["id_ligne"], "tri": ["retard_moyen"], "mode": "ordre"},
+}
+
+# ==============================================================================
+# Comparaison des valeurs
+# ==============================================================================
+def valeurs_egales(a, b, rtol=TOLERANCE_RELATIVE, atol=TOLERANCE_ABSOLUE):
+    """
+    égalité colonne à colonne, avec tolérance pour les nombres
+
+    deux valeurs manquantes sont égales.
+
+    Args:
+        a (pd.Series): valeurs d'un côté
+        b (pd.Series): valeurs de l'autre côté, alignées sur a
+        rtol (float): tolérance relative
+        atol (float): tolérance absolue
+
+    Returns:
+        np.ndarray: booléen par ligne
+    """
+    manquants = a.isna().to_numpy() & b.isna().to_numpy()
+    if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+        proches = np.isclose(a.to_numpy(float), b.to_numpy(float), rtol=rtol, atol=atol)
+        return proches | manquants
+    return (a.astype(str).to_numpy() == b.astype(str).to_numpy()) | manquants
+
+def normaliser_cles(df, cles):
+    """
+    clé d'alignement sous forme de texte, indépendante du type lu (34 et 34.0)
+
+    Args:
+        df (pd.DataFrame): lignes d'un résultat
+        cles (list): colonnes de la clé
+
+    Returns:
+        pd.Series: clé texte par ligne
+    """
+    parties = []
+    for col in cles:
+        valeurs = df[col]
+        if pd.api.types.is_numeric_dtype(valeurs):
+            valeurs = valeurs.astype(float).map(repr)
+        parties.append(valeurs.astype(str))
+    return pd.Series(["|".join(t) for t in zip(*parties)], index=df.index, dtype=object)
+
+
+def comparer_cadres(df_sql, df_nosql, cles, limite=None, rtol=TOLERANCE_RELATIVE, atol=TOLERANCE_ABSOLUE):
+    """
+    alignement des lignes sur la clé et comparaison des autres colonnes
+
+    Args:
+        df_sql (pd.DataFrame): lignes du résultat sql (colonnes _rang et _cle ajoutées)
+        df_nosql (pd.DataFrame): lignes du résultat nosql (colonnes _rang et _cle ajoutées)
+        cles (list): colonnes de la clé
+        limite (dict or None): colonne de tri -> valeur de la dernière ligne sql d'un
+            résultat tronqué ; une ligne présente d'un seul côté à cette valeur est tolérée
+        rtol (float): tolérance relative
+        atol (float): tolérance absolue
+
+    Returns:
+        dict: nombre de lignes absentes, en trop et aux valeurs différentes, premières
+            lignes différentes
+    """
+    fusion = df_sql.merge(df_nosql, on="_cle", how="outer", suffixes=("_sql", "_nosql"), indicator=True)
+    seules = (fusion["_merge"] != "both").to_numpy()
+    if limite and seules.any():
+        # troncature arbitraire entre lignes à égalité avec la dernière ligne conservée
+        a_egalite = np.ones(len(fusion), bool)
+        for col, valeur in limite.items():
+            cote = fusion[f"{col}_sql"].where(fusion["_merge"] != "right_only", fusion[f"{col}_nosql"])
+            a_egalite &= valeurs_egales(cote, pd.Series(valeur, index=fusion.index), rtol, atol)
+        seules = seules & ~a_egalite
+
+    communes = fusion[fusion["_merge"] == "both"]
+    differentes = np.zeros(len(communes), bool)
+    for col in df_sql.columns:
+        if col not in cles and col not in ("_cle", "_rang"):
+            differentes |= ~valeurs_egales(communes[f"{col}_sql"], communes[f"{col}_nosql"], rtol, atol)
+
+    ecarts = pd.concat([fusion[seules], communes[differentes]])
+    ecarts.insert(0, "ecart", ecarts["_merge"].astype(str).map({
+        "left_only": "absente NoSQL", "right_only": "en trop NoSQL", "both": "valeurs"
+    }))
+    return {
+        "absentes": int((seules & (fusion["_merge"] == "left_only").to_numpy()).sum()),
+        "en_trop": int((seules & (fusion["_merge"] == "right_only").to_numpy()).sum()),
+        "valeurs": int(differentes.sum()),
+        "exemples": ecarts.drop(columns=["_cle", "_merge"]).sort_values(["_rang_sql", "_rang_nosql"]).head(NB_EXEMPLES),
+    }
+
+# ==============================================================================
+# Lecture en flux
+# ==============================================================================
+def avec_cle(df, cles, debut=0):
+    """
+    ajout du rang de chaque ligne dans le fichier et de la clé d'alignement
+
+    Args:
+        df (pd.DataFrame): lignes d'un résultat
+        cles (list): colonnes de la clé (vide : alignement par rang)
+        debut (int): rang de la première ligne
+
+    Returns:
+        pd.DataFrame: lignes avec les colonnes _rang et _cle
+    """
+    if "_rang" not in df.columns:
+        df["_rang"] = np.arange(debut, debut + len(df))
+    df["_cle"] = normaliser_cles(df, cles or ["_rang"])
+    return df
+
+def trier_lignes(df):
+    """
+    tri d'un résultat sur toutes ses colonnes (alignement par rang sans clé ni ordre)
+
+    Args:
+        df (pd.DataFrame): lignes d'un résultat
+
+    Returns:
+        pd.DataFrame: lignes triées, index renuméroté
+    """
+    if df.empty:
+        return df
+    return df.sort_values(list(df.columns), kind="mergesort", na_position="last").reset_index(drop=True)
+
+def lire_blocs(chemin, cles, taille_bloc=TAILLE_BLOC):
+    """
+    lecture d'un fichier de résultats par blocs
+
+    Args:
+        chemin (str): fichier csv
+        cles (list): colonnes de la clé
+        taille_bloc (int): lignes par bloc
+
+    Yields:
+        pd.DataFrame: bloc de lignes avec les colonnes _rang et _cle
+    """
+    rang = 0
+    for bloc in pd.read_csv(chemin, chunksize=taille_bloc):
+        yield avec_cle(bloc, cles, rang)
+        rang += len(bloc)
+
+def blocs_alignes(chemin_sql, chemin_nosql, cles, taille_bloc=TAILLE_BLOC):
+    """
+    parcours simultané des deux fichiers, par blocs de même longueur
+
+    le parcours s'arrête à la fin du fichier le plus court.
+
+    Args:
+        chemin_sql (str): résultat sql
+        chemin_nosql (str): résultat nosql
+        cles (list): colonnes de la clé
+        taille_bloc (int): lignes par bloc
+
+    Yields:
+        tuple: (bloc sql, bloc nosql) de mêmes rangs
+    """
+    sources = [lire_blocs(chemin_sql, cles, taille_bloc), lire_blocs(chemin_nosql, cles, taille_bloc)]
+    tampons = [None, None]
+    while True:
+        for i, source in enumerate(sources):
+            if tampons[i] is None or len(tampons[i]) < taille_bloc:
+                bloc = next(source, None)
+                if bloc is not None:
+                    tampons[i] = bloc if tampons[i] is None else pd.concat([tampons[i], bloc], ignore_index=True)
+        n = min(len(t) if t is not None else 0 for t in tampons)
+        if n == 0:
+            return
+        yield tampons[0].iloc[:n].reset_index(drop=True), tampons[1].iloc[:n].reset_index(drop=True)
+        tampons = [t.iloc[n:].reset_index(drop=True) for t in tampons]
+
+def series_egalite(df, tri, rtol=TOLERANCE_RELATIVE, atol=TOLERANCE_ABSOLUE):
+    """
+    numéro de série d'égalité de chaque ligne : une série change avec une colonne de tri
+
+    Args:
+        df (pd.DataFrame): lignes dans l'ordre du fichier
+        tri (list): colonnes de l'ORDER BY
+        rtol (float): tolérance relative
+        atol (float): tolérance absolue
+
+    Returns:
+        np.ndarray: numéro de série par ligne
+    """
+    nouvelle = np.zeros(len(df), bool)
+    nouvelle[:1] = True
+    for col in tri:
+        valeurs = df[col].reset_index(drop=True)
+        nouvelle[1:] |= ~valeurs_egales(valeurs.iloc[1:].reset_index(drop=True), valeurs.iloc[:-1], rtol, atol)
+    return np.cumsum(nouvelle)
+
+def lignes_mal_placees(sql, nosql, serie):
+    """
+    lignes des séries d'égalité dont les clés diffèrent entre les deux côtés
+
+    Args:
+        sql (pd.DataFrame): lignes sql
+        nosql (pd.DataFrame): lignes nosql de mêmes rangs
+        serie (np.ndarray): série d'égalité de chaque rang (côté sql)
+
+    Returns:
+        np.ndarray: booléen par rang
+    """
+    cles_sql = pd.DataFrame({"serie": serie, "cle": sql["_cle"].to_numpy()}).sort_values(["serie", "cle"])
+    cles_nosql = pd.DataFrame({"serie": serie, "cle": nosql["_cle"].to_numpy()}).sort_values(["serie", "cle"])
+    fausses = cles_sql["serie"].to_numpy()[cles_sql["cle"].to_numpy() != cles_nosql["cle"].to_numpy()]
+    return np.isin(serie, fausses)
+
+def verifier_ordre(chemin_sql, chemin_nosql, cles, tri, limite=False, taille_bloc=TAILLE_BLOC,
+                   rtol=TOLERANCE_RELATIVE, atol=TOLERANCE_ABSOLUE):
+    """
+    contrôle de l'ordre des lignes, en flux
+
+    dans une série de lignes à égalité sur les colonnes de tri, l'ordre est libre mais les
+    clés des deux côtés doivent être les mêmes. la dernière série d'un bloc, peut-être
+    inachevée, est reportée sur le bloc suivant.
+
+    Args:
+        chemin_sql (str): résultat sql (référence de l'ordre)
+        chemin_nosql (str): résultat nosql
+        cles (list): colonnes de la clé
+        tri (list): colonnes de l'ORDER BY
+        limite (bool): résultat tronqué, clés de la dernière série non contrôlées
+        taille_bloc (int): lignes par bloc
+        rtol (float): tolérance relative
+        atol (float): tolérance absolue
+
+    Returns:
+        dict: nombre de lignes mal placées et premières d'entre elles (rang, clés)
+    """
+    mal_placees, exemples = 0, []
+
+    def controler(sql, nosql, serie):
+        nonlocal mal_placees
+        fautives = lignes_mal_placees(sql, nosql, serie)
+        mal_placees += int(fautives.sum())
+        if fautives.any() and sum(len(e) for e in exemples) < NB_EXEMPLES:
+            exemples.append(pd.DataFrame({
+                "rang": sql["_rang"][fautives].to_numpy(),
+                "cle_sql": sql["_cle"][fautives].to_numpy(),
+                "cle_nosql": nosql["_cle"][fautives].to_numpy(),
+            }))
+
+    reste_sql = reste_nosql = None
+    for sql, nosql in blocs_alignes(chemin_sql, chemin_nosql, cles, taille_bloc):
+        if reste_sql is not None:
+            sql = pd.concat([reste_sql, sql], ignore_index=True)
+            nosql = pd.concat([reste_nosql, nosql], ignore_index=True)
+        serie = series_egalite(sql, tri, rtol, atol)
+        achevees = serie < serie[-1]
+        controler(sql[achevees], nosql[achevees], serie[achevees])
+        reste_sql, reste_nosql = sql[~achevees], nosql[~achevees]
+    if reste_sql is not None and not limite:
+        controler(reste_sql, reste_nosql, series_egalite(reste_sql, tri, rtol, atol))
+
+    return {
+        "mal_placees": mal_placees,
+        "exemples": pd.concat(exemples).head(NB_EXEMPLES) if exemples else pd.DataFrame(),
+    }
+
+def partitionner(chemin, cles, nb_partitions, dossier, prefixe, taille_bloc=TAILLE_BLOC):
+    """
+    répartition des lignes d'un fichier en partitions selon l'empreinte de leur clé
+
+    deux lignes de même clé tombent dans la même partition des deux côtés : chaque paire
+    de partitions peut être comparée en mémoire.
+
+    Args:
+        chemin (str): fichier csv
+        cles (list): colonnes de la clé
+        nb_partitions (int): nombre de partitions
+        dossier (str): dossier des fichiers de partitions
+        prefixe (str): préfixe des fichiers ('sql' ou 'nosql')
+        taille_bloc (int): lignes par bloc
+
+    Returns:
+        tuple: (chemins des partitions, nombre de lignes, dernière ligne lue)
+    """
+    chemins = [os.path.join(dossier, f"{prefixe}_{p}.csv") for p in range(nb_partitions)]
+    nb_lignes, derniere = 0, None
+    for bloc in lire_blocs(chemin, cles, taille_bloc):
+        partition = pd.util.hash_pandas_object(bloc["_cle"], index=False).to_numpy() % nb_partitions
+        for p, lignes in bloc.drop(columns="_cle").groupby(partition):
+            lignes.to_csv(chemins[p], mode="a", header=not os.path.exists(chemins[p]), index=False)
+        nb_lignes += len(bloc)
+        derniere = bloc.iloc[-1]
+    return chemins, nb_lignes, derniere
+
+def lire_partition(chemin, colonnes, cles):
+    """
+    relecture d'une partition (éventuellement vide)
+
+    Args:
+        chemin (str): fichier de la partition
+        colonnes (list): colonnes du résultat
+        cles (list): colonnes de la clé
+
+    Returns:
+        pd.DataFrame: lignes avec les colonnes _rang et _cle
+    """
+    if not os.path.exists(chemin):
+        return avec_cle(pd.DataFrame(columns=colonnes + ["_rang"]), cles)
+    return avec_cle(pd.read_csv(chemin), cles)
+
+# ==============================================================================
+# Comparaison de deux fichiers de résultats
+# ==============================================================================
+def comparer_fichiers(chemin_sql, chemin_nosql, cles, tri=(), mode="ordre", limite=False,
+                      taille_max=TAILLE_MAX_MEMOIRE, rtol=TOLERANCE_RELATIVE, atol=TOLERANCE_ABSOLUE):
+    """
+    comparaison d'un résultat nosql à sa référence sql
+
+    petits fichiers : alignement en mémoire. au-delà de taille_max, les lignes des deux
+    fichiers sont réparties en partitions par empreinte de la clé, comparées une à une.
+    l'ordre est vérifié en flux, indépendamment de la taille. sans clé en mode
+    "ensemble", les deux résultats sont triés en mémoire avant l'alignement par rang.
+
+    Args:
+        chemin_sql (str): résultat sql
+        chemin_nosql (str): résultat nosql
+        cles (list): colonnes de la clé (vide : alignement par rang)
+        tri (list): colonnes de l'ORDER BY
+        mode (str): "ordre" ou "ensemble"
+        limite (bool): résultat tronqué par un LIMIT
+        taille_max (int): taille cumulée des fichiers comparés en mémoire (octets)
+        rtol (float): tolérance relative
+        atol (float): tolérance absolue
+
+    Returns:
+        dict: statut ("OK" ou "ECHEC"), nombres de lignes, compteurs d'écarts et
+            premières lignes différentes
+    """
+    colonnes_sql = list(pd.read_csv(chemin_sql, nrows=0).columns)
+    colonnes_nosql = list(pd.read_csv(chemin_nosql, nrows=0).columns)
+    if colonnes_sql != colonnes_nosql:
+        return {
+            "statut": "ECHEC",
+            "message": f"colonnes différentes : {colonnes_sql} / {colonnes_nosql}",
+            "exemples": pd.DataFrame(),
+            "exemples_ordre": pd.DataFrame(),
+        }
+
+    taille = os.path.getsize(chemin_sql) + os.path.getsize(chemin_nosql)
+    trier = not cles and mode == "ensemble"
+    # rang sans clé ni ordre : défini seulement après tri de tout le résultat
+    nb_partitions = 1 if trier else max(1, math.ceil(taille / taille_max))
+    if nb_partitions == 1:
+        df_sql, df_nosql = pd.read_csv(chemin_sql), pd.read_csv(chemin_nosql)
+        if trier:
+            df_sql, df_nosql = trier_lignes(df_sql), trier_lignes(df_nosql)
+        df_sql = avec_cle(df_sql, cles)
+        df_nosql = avec_cle(df_nosql, cles)
+        nb_sql, nb_nosql = len(df_sql), len(df_nosql)
+        derniere = df_sql.iloc[-1] if nb_sql else None
+        paires = [(df_sql, df_nosql)]
+    else:
+        dossier = tempfile.TemporaryDirectory()
+        parts_sql, nb_sql, derniere = partitionner(chemin_sql, cles, nb_partitions, dossier.name, "sql")
+        parts_nosql, nb_nosql, _ = partitionner(chemin_nosql, cles, nb_partitions, dossier.name, "nosql")
+        paires = (
+            (lire_partition(p_sql, colonnes_sql, cles), lire_partition(p_nosql, colonnes_sql, cles))
+            for p_sql, p_nosql in zip(parts_sql, parts_nosql)
+        )
+
+    bornes = {col: derniere[col] for col in tri} if limite and derniere is not None else None
+    rapport = {"lignes_sql": nb_sql, "absentes": 0, "en_trop": 0, "valeurs": 0}
+    exemples = []
+    for df_sql, df_nosql in paires:
+        ecarts = comparer_cadres(df_sql, df_nosql, cles, bornes, rtol, atol)
+        for compteur in ("absentes", "en_trop", "valeurs"):
+            rapport[compteur] += ecarts[compteur]
+        exemples.append(ecarts["exemples"])
+    if nb_partitions > 1:
+        dossier.cleanup()
+    rapport["lignes_nosql"] = nb_nosql
+
+    ordre = {"mal_placees": 0, "exemples": pd.DataFrame()}
+    if mode == "ordre" and tri:
+        ordre = verifier_ordre(chemin_sql, chemin_nosql, cles, list(tri), limite, rtol=rtol, atol=atol)
+    rapport["mal_placees"] = ordre["mal_placees"]
+
+    ecarts = rapport["absentes"] + rapport["en_trop"] + rapport["valeurs"] + rapport["mal_placees"]
+    rapport["statut"] = "OK" if ecarts == 0 else "ECHEC"
+    exemples = pd.concat(exemples)
+    rapport["exemples"] = exemples.sort_values(["_rang_sql", "_rang_nosql"]).head(NB_EXEMPLES)
+    rapport["exemples_ordre"] = ordre["exemples"]
+    return rapport
+
+def comparer_requete(lettre, dossier=DOSSIER_CSV, comparaisons=COMPARAISONS, ordre=True, **options):
+    """
+    comparaison des fichiers X_sql.csv et X_nosql.csv d'une requête du catalogue
+
+    Args:
+        lettre (str): identifiant de la requête (a-n)
+        dossier (str): dossier des fichiers csv
+        comparaisons (dict): lettre -> clés, tri, mode et limite
+        ordre (bool): False pour ignorer l'ordre des lignes
+        **options: tolérances et taille maximale transmises à comparer_fichiers
+
+    Returns:
+        dict: rapport de comparer_fichiers, statut "ABSENT" si un fichier manque
+    """
+    chemins = [os.path.join(dossier, f"{lettre.upper()}_{type_db}.csv") for type_db in ("sql", "nosql")]
+    manquants = [os.path.basename(c) for c in chemins if not os.path.exists(c)]
+    if manquants:
+        return {"statut": "ABSENT", "message": f"fichier manquant : {', '.join(manquants)}",
+                "exemples": pd.DataFrame(), "exemples_ordre": pd.DataFrame()}
+    spec = comparaisons[lettre]
+    mode = spec["mode"] if ordre else "ensemble"
+    return comparer_fichiers(*chemins, spec["cles"], spec["tri"], mode, spec.get("limite", False), **options)
+
+def comparer_catalogue(dossier=DOSSIER_CSV, comparaisons=COMPARAISONS, lettres=None, ordre=True, **options):
+    """
+    comparaison de toutes les requêtes du catalogue
+
+    Args:
+        dossier (str): dossier des fichiers csv
+        comparaisons (dict): lettre -> clés, tri, mode et limite
+        lettres (list or None): requêtes à comparer (toutes par défaut)
+        ordre (bool): False pour ignorer l'ordre des lignes
+        **options: tolérances et taille maximale transmises à comparer_fichiers
+
+    Returns:
+        dict: lettre -> rapport
+    """
+    return {
+        lettre: comparer_requete(lettre, dossier, comparaisons, ordre, **options)
+        for lettre in (lettres or comparaisons)
+    }
+
+def synthese(rapports):
+    """
+    tableau récapitulatif des rapports de comparaison
+
+    Args:
+        rapports (dict): lettre -> rapport
+
+    Returns:
+        pd.DataFrame: une ligne par requête
+    """
+    colonnes = ["statut", "lignes_sql", "lignes_nosql", "absentes", "en_trop", "valeurs", "mal_placees"]
+    return pd.DataFrame(
+        [{col: rapport.get(col) for col in colonnes} for rapport in rapports.values()],
+        index=[lettre.upper() for lettre in rapports]
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparaison des résultats SQL et NoSQL (A à N)")
+    parser.add_argument("lettres", nargs="*", help="requêtes à comparer (toutes par défaut)")
+    parser.add_argument("--dossier", default=DOSSIER_CSV)
+    parser.add_argument("--sans-ordre", action="store_true", help="ordre des lignes indifférent")
+    parser.add_argument("--rtol", type=float, default=TOLERANCE_RELATIVE, help="tolérance relative")
+    parser.add_argument("--atol", type=float, default=TOLERANCE_ABSOLUE, help="tolérance absolue")
+    parser.add_argument("--rapport", help="fichier json du rapport")
+    args = parser.parse_args()
+
+    rapports = comparer_catalogue(args.dossier, lettres=[l.lower() for l in args.lettres],
+                                  ordre=not args.sans_ordre, rtol=args.rtol, atol=args.atol)
+    print("--- Comparaison SQL / NoSQL ---")
+    print(synthese(rapports).to_string())
+    for lettre, rapport in rapports.items():
+        if rapport["statut"] == "OK":
+            continue
+        print(f"\n--- Requete {lettre.upper()} : {rapport.get('message', 'premières lignes différentes')} ---")
+        if not rapport["exemples"].empty:
+            print(rapport["exemples"].to_string(index=False))
+        if not rapport["exemples_ordre"].empty:
+            print(rapport["exemples_ordre"].to_string(index=False))
+
+    if args.rapport:
+        with open(args.rapport, "w", encoding="utf-8") as f:
+            json.dump({
+                lettre.upper(): {
+                    **{k: v for k, v in rapport.items() if not k.startswith("exemples")},
+                    "exemples": rapport["exemples"].to_dict("records"),
+                    "exemples_ordre": rapport["exemples_ordre"].to_dict("records"),
+                }
+                for lettre, rapport in rapports.items()
+            }, f, indent=2, ensure_ascii=False, default=str)
+
+    # code de retour non nul si une requête diffère ou n'a pas de résultat
+    sys.exit(0 if all(r["statut"] == "OK" for r in rapports.values()) else 1)
@@ -0,0 +1,630 @@
+import numpy as np
+import pandas as pd
+
+from cache_resultats import agreger_en_cache
+from indicateurs import calculer_kpis, lire_kpis
+from partie_3_req_nosql import STATS_ARRET_CAPTEUR, STATS_LIGNE_JOUR, adapter_serie_temporelle, lire_schema, moyenne
+
+# ==============================================================================
+# Accès aux données du dashboard
+# ==============================================================================
+# une fonction par bloc affiché, appelée seulement lorsque son onglet est rendu.
+# chaque requête ne lit que les champs affichés ($project au plus tôt, projection
+# des find) et borne son résultat ($limit, pagination côté serveur).
+
+TAILLE_PAGE_ARRETS = 50
+NB_LIGNES_RETARDS = 15
+NB_TYPES_INCIDENTS = 5
+# tendance des mesures : points tracés (largeur du graphique) et relevés bruts
+# au-delà desquels la période est agrégée en intervalles côté serveur
+NB_POINTS_TENDANCE = 400
+SEUIL_RELEVES_BRUTS = 20000
+# pas de $dateTrunc proposés, du plus fin au plus large : (unit, binSize, secondes)
+PAS_TENDANCE = [
+    ("minute", 1, 60), ("minute", 5, 300), ("minute", 15, 900), ("minute", 30, 1800),
+    ("hour", 1, 3600), ("hour", 3, 10800), ("hour", 6, 21600), ("hour", 12, 43200),
+    ("day", 1, 86400), ("week", 1, 604800), ("month", 1, 2629746),
+    ("quarter", 1, 7889238), ("year", 1, 31556952),
+]
+
+# noms affichés des types de capteurs (ancien nommage par unité compris)
+COLONNES_CAPTEURS = {"CO2": "CO2", "Bruit": "Bruit", "db": "Bruit", "Temperature": "Temp", "°C": "Temp"}
+
+def agreger(db, collection, pipeline, version):
+    """
+    exécution d'un pipeline via le cache partagé entre les workers du dashboard
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        collection (str): collection interrogée
+        pipeline (list): pipeline d'agrégation
+        version (str or None): version des données (None : pas de cache partagé)
+
+    Returns:
+        list: documents résultats
+    """
+    return list(agreger_en_cache(db, collection, pipeline, lambda: db[collection].aggregate(pipeline), version))
+
+def agreger_mesures(db, pipeline, version):
+    """
+    exécution d'un pipeline sur la collection Mesures selon son schéma
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        pipeline (list): pipeline écrit pour la collection Mesures à plat
+        version (str or None): version des données (cache partagé)
+
+    Returns:
+        list: documents résultats
+    """
+    if lire_schema(db).get("serie_temporelle"):
+        # champs du capteur lus dans le metaField de la collection de séries temporelles
+        pipeline = adapter_serie_temporelle(pipeline)
+    return agreger(db, "Mesures", pipeline, version)
+
+# ==============================================================================
+# Onglet Analyses & Stats
+# ==============================================================================
+def kpis(db, version, rollups=False):
+    """
+    calcul des indicateurs clés de performance (kpi)
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
+    Returns:
+        tuple: (nombre de lignes, total incidents, valeur moyenne co2)
+    """
+    # cumuls exacts maintenus par la migration : une seule lecture
+    store = lire_kpis(db)
+    if store is not None:
+        val_co2 = store["somme_co2"] / store["nb_co2"] if store["nb_co2"] else 0
+        return store["nb_lignes"], store["nb_incidents"], val_co2
+
+    # base migrée sans kpis (python indicateurs.py --recalculer pour les créer)
+    # une ligne par document : nombre lu dans les métadonnées de la collection
+    nb_lignes = db.Reseau.estimated_document_count()
+
+    if not rollups:
+        # recalcul exact par parcours de TraficEvents et Mesures
+        cumuls = calculer_kpis(db)
+        val_co2 = cumuls["somme_co2"] / cumuls["nb_co2"] if cumuls["nb_co2"] else 0
+        return nb_lignes, cumuls["nb_incidents"], val_co2
+
+    # cumuls exacts sur l'ensemble des données, sans parcours des collections brutes
+    res_inc = agreger(db, STATS_LIGNE_JOUR, [
+        {"$group": {"_id": None, "total": {"$sum": "$nb_incidents"}}}
+    ], version)
+    avg_co2 = agreger(db, STATS_ARRET_CAPTEUR, [
+        {"$match": {"_id.type_capteur": "CO2"}},
+        {"$group": {"_id": None, "somme": {"$sum": "$somme"}, "nb": {"$sum": "$nb"}}},
+        {"$project": {"avg": moyenne("$somme", "$nb")}}
+    ], version)
+    total_incidents = res_inc[0]['total'] if res_inc else 0
+    val_co2 = avg_co2[0]['avg'] if avg_co2 else 0
+    return nb_lignes, total_incidents, val_co2
+
+def retards_par_ligne(db, version, rollups=False, limite=NB_LIGNES_RETARDS):
+    """
+    retards moyens des lignes les plus en retard
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+        limite (int): nombre de lignes affichées
+
+    Returns:
+        pd.DataFrame: dataframe avec nom_ligne et retard_moyen
+    """
+    if rollups:
+        # cumuls par ligne et par jour ramenés à la ligne
+        debut = [
+            {"$match": {"nb_trafic": {"$gt": 0}}},
+            {"$group": {
+                "_id": "$_id.id_ligne",
+                "somme_retard": {"$sum": "$somme_retard"},
+                "nb_trafic": {"$sum": "$nb_trafic"}
+            }},
+            {"$project": {"retard_moyen": moyenne("$somme_retard", "$nb_trafic")}},
+        ]
+        collection = STATS_LIGNE_JOUR
+    else:
+        debut = [
+            {"$group": {
+                "_id": "$id_ligne",
+                "retard_moyen": {"$avg": "$retard_minutes"}
+            }},
+        ]
+        collection = "TraficEvents"
+    # tri et limite avant la jointure : seules les lignes affichées sont jointes,
+    # sans leurs tableaux d'arrêts et de véhicules
+    pipeline = debut + [
+        {"$sort": {"retard_moyen": -1}},
+        {"$limit": limite},
+        {"$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"_id": 0, "nom_ligne": 1}}],
+            "as": "ligne_info"
+        }},
+        {"$unwind": "$ligne_info"},
+        {"$project": {
+            "nom_ligne": "$ligne_info.nom_ligne",
+            "retard_moyen": 1
+        }},
+        {"$sort": {"retard_moyen": -1}}
+    ]
+    return pd.DataFrame(agreger(db, collection, pipeline, version))
+
+def repartition_vehicules(db, version):
+    """
+    répartition du nombre de véhicules par type
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+
+    Returns:
+        pd.DataFrame: dataframe avec type de véhicule et comptage
+    """
+    pipeline = [
+        {"$project": {"_id": 0, "vehicules.type_vehicule": 1}},
+        {"$unwind": "$vehicules"},
+        {"$group": {
+            "_id": "$vehicules.type_vehicule",
+            "count": {"$sum": 1}
+        }}
+    ]
+    return pd.DataFrame(agreger(db, "Reseau", pipeline, version))
+
+def types_tendance(colonne):
+    """
+    types de capteurs regroupés sous un nom affiché (ancien nommage par unité compris)
+
+    Args:
+        colonne (str): nom affiché (CO2, Bruit, Temp)
+
+    Returns:
+        list: valeurs de type_capteur correspondantes
+    """
+    return [type_capteur for type_capteur, nom in COLONNES_CAPTEURS.items() if nom == colonne]
+
+def bornes_mesures(db, colonne, version):
+    """
+    premier et dernier relevé d'un type de capteur (bornes du sélecteur de dates)
+
+    deux lectures en bout d'index {type_capteur, date}.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        colonne (str): nom affiché du type de capteur
+        version (str or None): version des données (cache partagé)
+
+    Returns:
+        tuple: (date min, date max), (None, None) sans relevé
+    """
+    bornes = []
+    for sens in (1, -1):
+        docs = agreger_mesures(db, [
+            {"$match": {"type_capteur": {"$in": types_tendance(colonne)}}},
+            {"$sort": {"date": sens}},
+            {"$limit": 1},
+            {"$project": {"_id": 0, "date": 1}}
+        ], version)
+        bornes.append(docs[0]["date"] if docs else None)
+    return tuple(bornes)
+
+def choisir_pas(debut, fin, nb_points=NB_POINTS_TENDANCE):
+    """
+    plus petit pas de $dateTrunc donnant au plus nb_points intervalles sur la période
+
+    Args:
+        debut (datetime): début de la période
+        fin (datetime): fin de la période (exclue)
+        nb_points (int): nombre de points visés (largeur du graphique)
+
+    Returns:
+        dict: {"unit", "binSize"} de $dateTrunc
+    """
+    duree = (fin - debut).total_seconds()
+    for unite, taille, secondes in PAS_TENDANCE:
+        if duree / secondes <= nb_points:
+            return {"unit": unite, "binSize": taille}
+    unite, taille, _ = PAS_TENDANCE[-1]
+    return {"unit": unite, "binSize": taille}
+
+def lttb(df, seuil, x="date", y="valeur"):
+    """
+    sous-échantillonnage largest-triangle-three-buckets d'une série triée
+
+    garde le premier et le dernier point, puis dans chaque intervalle le point
+    formant le plus grand triangle avec le point retenu avant lui et la moyenne de
+    l'intervalle suivant : pics et creux sont conservés.
+
+    Args:
+        df (pd.DataFrame): série triée sur x
+        seuil (int): nombre de points conservés
+        x (str): colonne des abscisses (dates)
+        y (str): colonne des valeurs
+
+    Returns:
+        pd.DataFrame: seuil lignes de df (df inchangé s'il est plus court)
+    """
+    n = len(df)
+    if seuil >= n or seuil < 3:
+        return df
+    abscisses = pd.to_datetime(df[x]).to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(float)
+    valeurs = df[y].to_numpy(dtype=float)
+    # intervalles des points intérieurs, le premier et le dernier point étant gardés
+    limites = np.linspace(1, n - 1, seuil - 1).astype(int)
+    retenus = [0]
+    a = 0
+    for i in range(seuil - 2):
+        debut, fin = limites[i], limites[i + 1]
+        suivant = slice(limites[i + 1], limites[i + 2]) if i + 2 < seuil - 1 else slice(n - 1, n)
+        moy_x = abscisses[suivant].mean()
+        moy_y = valeurs[suivant].mean()
+        aires = np.abs(
+            (abscisses[a] - moy_x) * (valeurs[debut:fin] - valeurs[a])
+            - (abscisses[a] - abscisses[debut:fin]) * (moy_y - valeurs[a])
+        )
+        a = debut + int(np.argmax(aires))
+        retenus.append(a)
+    retenus.append(n - 1)
+    return df.iloc[retenus].reset_index(drop=True)
+
+def tendance_mesures(db, version, colonne, debut, fin, nb_points=NB_POINTS_TENDANCE, methode="calendrier"):
+    """
+    évolution d'un type de mesure sur une période, en au plus nb_points points
+
+    une période courte (au plus SEUIL_RELEVES_BRUTS relevés) est tracée depuis les
+    relevés bruts réduits par lttb ; au-delà, les relevés sont agrégés côté serveur
+    en intervalles (min, moyenne, max) : pas calendaire choisi selon la période
+    ($dateTrunc) ou intervalles d'effectifs égaux ($bucketAuto).
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+        colonne (str): nom affiché du type de capteur (CO2, Bruit, Temp)
+        debut (datetime): début de la période
+        fin (datetime): fin de la période (exclue)
+        nb_points (int): nombre de points visés (largeur du graphique)
+        methode (str): "calendrier" ($dateTrunc) ou "effectifs" ($bucketAuto)
+
+    Returns:
+        pd.DataFrame: date et valeur (relevés bruts), ou date, min, moyenne, max et nb
+    """
+    # valeurs textuelles écartées : elles fausseraient min et max
+    filtre = {
+        "type_capteur": {"$in": types_tendance(colonne)},
+        "date": {"$gte": debut, "$lt": fin},
+        "valeur": {"$type": "number"}
+    }
+    # comptage borné : une longue période n'est pas dénombrée en entier
+    nb = agreger_mesures(db, [{"$match": filtre}, {"$limit": SEUIL_RELEVES_BRUTS + 1}, {"$count": "n"}], version)
+    if (nb[0]["n"] if nb else 0) <= SEUIL_RELEVES_BRUTS:
+        df = pd.DataFrame(agreger_mesures(db, [
+            {"$match": filtre},
+            {"$project": {"_id": 0, "date": 1, "valeur": 1}},
+            {"$sort": {"date": 1}}
+        ], version), columns=["date", "valeur"])
+        return lttb(df.dropna(), nb_points)
+
+    statistiques = {
+        "min": {"$min": "$valeur"},
+        "moyenne": {"$avg": "$valeur"},
+        "max": {"$max": "$valeur"},
+        "nb": {"$sum": 1}
+    }
+    if methode == "effectifs":
+        regroupement = [
+            {"$bucketAuto": {"groupBy": "$date", "buckets": nb_points, "output": statistiques}},
+            {"$project": {"_id": 0, "date": "$_id.min", "min": 1, "moyenne": 1, "max": 1, "nb": 1}}
+        ]
+    else:
+        regroupement = [
+            {"$group": {"_id": {"$dateTrunc": {"date": "$date", **choisir_pas(debut, fin, nb_points)}}, **statistiques}},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": 0, "date": "$_id", "min": 1, "moyenne": 1, "max": 1, "nb": 1}}
+        ]
+    pipeline = [{"$match": filtre}, {"$project": {"_id": 0, "date": 1, "valeur": 1}}] + regroupement
+    return pd.DataFrame(agreger_mesures(db, pipeline, version), columns=["date", "min", "moyenne", "max", "nb"])
+
+def types_incidents(db, version, limite=NB_TYPES_INCIDENTS):
+    """
+    types d'incidents les plus fréquents
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+        limite (int): nombre de types affichés
+
+    Returns:
+        pd.DataFrame: dataframe avec description d'incident et comptage
+    """
+    pipeline = [
+        {"$match": {"incidents": {"$exists": True, "$ne": []}}},
+        {"$project": {"_id": 0, "incidents.description": 1}},
+        {"$unwind": "$incidents"},
+        {"$group": {"_id": "$incidents.description", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limite}
+    ]
+    return pd.DataFrame(agreger(db, "TraficEvents", pipeline, version))
+
+# ==============================================================================
+# Onglet Cartographie
+# ==============================================================================
+def noms_lignes(db):
+    """
+    noms des lignes proposés dans le filtre de la carte
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+
+    Returns:
+        list: noms triés
+    """
+    return sorted(db.Reseau.distinct("nom_ligne"))
+
+def pipeline_arrets(nom_ligne_filtre=None):
+    """
+    arrêts (dédoublonnés) des lignes sélectionnées, avec leur nombre de lignes
+
+    Args:
+        nom_ligne_filtre (str, optional): filtre sur une ligne spécifique
+
+    Returns:
+        list: pipeline d'agrégation sur Reseau
+    """
+    # construction du filtre de recherche
+    match_stage = {}
+    if nom_ligne_filtre and nom_ligne_filtre != "Toutes":
+        match_stage = {"nom_ligne": nom_ligne_filtre}
+    return [
+        {"$match": match_stage},
+        {"$project": {"_id": 0, "arrets.id_arret": 1, "arrets.nom": 1, "arrets.localisation.coordinates": 1}},
+        {"$unwind": "$arrets"},
+        {"$project": {
+            "id_arret": "$arrets.id_arret",
+            "nom": "$arrets.nom",
+            "lat": {"$arrayElemAt": ["$arrets.localisation.coordinates", 1]},
+            "lon": {"$arrayElemAt": ["$arrets.localisation.coordinates", 0]},
+        }},
+        {"$group": {
+            "_id": "$id_arret",
+            "nom": {"$first": "$nom"},
+            "lat": {"$first": "$lat"},
+            "lon": {"$first": "$lon"},
+            "lignes_desservies": {"$sum": 1}
+        }}
+    ]
+
+def pivot_capteurs():
+    """
+    étape qui ramène les moyennes par (arrêt, type) à un document par arrêt
+
+    une colonne par type : $max ignore les valeurs nulles des autres types.
+
+    Returns:
+        list: étapes d'agrégation produisant {_id: id_arret, CO2, Bruit, Temp}
+    """
+    colonnes = {}
+    for type_capteur, colonne in COLONNES_CAPTEURS.items():
+        colonnes.setdefault(colonne, []).append(type_capteur)
+    return [
+        {"$group": {
+            "_id": "$_id.id_arret",
+            **{
+                colonne: {"$max": {"$cond": [{"$in": ["$_id.type", types]}, "$moyenne", None]}}
+                for colonne, types in colonnes.items()
+            }
+        }}
+    ]
+
+def stats_arrets(db, version, ids_arrets=None, rollups=False):
+    """
+    moyennes des mesures par arrêt, une colonne par type de capteur
+
+    avec une liste d'arrêts, seules leurs mesures sont lues (index id_arret) ;
+    le pivot par type est fait côté serveur.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+        ids_arrets (list, optional): arrêts concernés (tous par défaut)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
+    Returns:
+        pd.DataFrame: une ligne par arrêt mesuré (_id, CO2, Bruit, Temp)
+    """
+    types = list(COLONNES_CAPTEURS)
+    if rollups:
+        # une entrée par capteur dans le rollup : cumul par arrêt et par type
+        filtre = {"_id.type_capteur": {"$in": types}}
+        if ids_arrets is not None:
+            filtre["_id.id_arret"] = {"$in": ids_arrets}
+        docs = agreger(db, STATS_ARRET_CAPTEUR, [
+            {"$match": filtre},
+            {"$group": {
+                "_id": {"id_arret": "$_id.id_arret", "type": "$_id.type_capteur"},
+                "somme": {"$sum": "$somme"},
+                "nb": {"$sum": "$nb"}
+            }},
+            {"$project": {"moyenne": moyenne("$somme", "$nb")}}
+        ] + pivot_capteurs(), version)
+    else:
+        filtre = {"type_capteur": {"$in": types}}
+        if ids_arrets is not None:
+            filtre = {"id_arret": {"$in": ids_arrets}, **filtre}
+        docs = agreger_mesures(db, [
+            {"$match": filtre},
+            {"$group": {
+                "_id": {"id_arret": "$id_arret", "type": "$type_capteur"},
+                "moyenne": {"$avg": "$valeur"}
+            }}
+        ] + pivot_capteurs(), version)
+    return pd.DataFrame(docs).reindex(columns=["_id", "CO2", "Bruit", "Temp"])
+
+def joindre_stats(df_arrets, df_stats):
+    """
+    ajout des moyennes co2, bruit et température aux arrêts (jointure sur l'arrêt)
+
+    Args:
+        df_arrets (pd.DataFrame): arrêts (_id = id_arret)
+        df_stats (pd.DataFrame): résultat de stats_arrets
+
+    Returns:
+        pd.DataFrame: arrêts avec les colonnes CO2, Bruit et Temp (vides si non mesurés)
+    """
+    return df_arrets.merge(df_stats, on="_id", how="left")
+
+def arrets_carte(db, version, nom_ligne_filtre=None, rollups=False):
+    """
+    données des arrêts avec statistiques environnementales (marqueurs de la carte)
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+        nom_ligne_filtre (str, optional): filtre sur une ligne spécifique
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
+    Returns:
+        pd.DataFrame: dataframe avec informations des arrêts et mesures moyennes
+    """
+    df_arrets = pd.DataFrame(agreger(db, "Reseau", pipeline_arrets(nom_ligne_filtre), version))
+    if df_arrets.empty:
+        return df_arrets
+    # une ligne sélectionnée : seules les mesures de ses arrêts sont agrégées
+    ids_arrets = None
+    if nom_ligne_filtre and nom_ligne_filtre != "Toutes":
+        ids_arrets = df_arrets['_id'].tolist()
+    return joindre_stats(df_arrets, stats_arrets(db, version, ids_arrets, rollups))
+
+def page_arrets(db, version, nom_ligne_filtre=None, page=0, taille_page=TAILLE_PAGE_ARRETS, rollups=False):
+    """
+    une page du tableau détaillé des arrêts, découpée côté serveur
+
+    seuls les arrêts de la page sont lus avec leurs mesures.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+        nom_ligne_filtre (str, optional): filtre sur une ligne spécifique
+        page (int): numéro de page (à partir de 0)
+        taille_page (int): arrêts par page
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
+    Returns:
+        tuple: (dataframe de la page, nombre total d'arrêts)
+    """
+    pipeline = pipeline_arrets(nom_ligne_filtre) + [
+        {"$sort": {"_id": 1}},
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "page": [{"$skip": page * taille_page}, {"$limit": taille_page}]
+        }}
+    ]
+    resultat = agreger(db, "Reseau", pipeline, version)
+    facette = resultat[0] if resultat else {"total": [], "page": []}
+    total = facette["total"][0]["n"] if facette["total"] else 0
+    df_page = pd.DataFrame(facette["page"])
+    if df_page.empty:
+        return df_page, total
+    stats = stats_arrets(db, version, df_page['_id'].tolist(), rollups)
+    return joindre_stats(df_page, stats), total
+
+def quartiers_pollution(db, version, rollups=False):
+    """
+    données de pollution par quartier via agrégation
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (cache partagé)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
+    Returns:
+        pd.DataFrame: dataframe avec nom et co2 moyen des quartiers mesurés
+    """
+    # géométries lues à part, simplifiées et mises en cache (geo_carte.geojson_quartiers)
+    quartiers = list(db.Quartiers.find({}, {"nom": 1, "_id": 1}))
+
+    if rollups:
+        # cumuls co2 par arrêt, puis rattachement des arrêts à leurs quartiers
+        pipeline = [
+            {"$match": {"_id.type_capteur": "CO2"}},
+            {"$group": {"_id": "$_id.id_arret", "somme": {"$sum": "$somme"}, "nb": {"$sum": "$nb"}}},
+            {"$lookup": {
+                "from": "Reseau",
+                "localField": "_id",
+                "foreignField": "arrets.id_arret",
+                "pipeline": [{"$project": {"_id": 0, "arrets.id_arret": 1, "arrets.quartiers_ids": 1}}],
+                "as": "reseau"
+            }},
+            {"$unwind": "$reseau"},
+            {"$unwind": "$reseau.arrets"},
+            {"$match": {"$expr": {"$eq": ["$_id", "$reseau.arrets.id_arret"]}}},
+            {"$unwind": "$reseau.arrets.quartiers_ids"},
+            {"$group": {
+                "_id": "$reseau.arrets.quartiers_ids",
+                "somme": {"$sum": "$somme"},
+                "nb": {"$sum": "$nb"}
+            }},
+            {"$project": {"avg_co2": moyenne("$somme", "$nb")}}
+        ]
+    elif lire_schema(db).get("denormalisation"):
+        # quartiers recopiés dans chaque mesure lors de la migration : pas de jointure
+        pipeline = [
+            {"$match": {"type_capteur": "CO2"}},
+            {"$project": {"_id": 0, "quartiers_ids": 1, "valeur": 1}},
+            {"$unwind": "$quartiers_ids"},
+            {"$group": {
+                "_id": "$quartiers_ids",
+                "avg_co2": {"$avg": "$valeur"}
+            }}
+        ]
+    else:
+        # pipeline d'agrégation pour lier mesures et quartiers via le réseau
+        pipeline = [
+            {"$match": {"type_capteur": "CO2"}},
+            {"$project": {"_id": 0, "id_arret": 1, "valeur": 1}},
+            {"$lookup": {
+                "from": "Reseau",
+                "localField": "id_arret",
+                "foreignField": "arrets.id_arret",
+                "pipeline": [{"$project": {"_id": 0, "arrets.id_arret": 1, "arrets.quartiers_ids": 1}}],
+                "as": "reseau"
+            }},
+            {"$unwind": "$reseau"},
+            {"$unwind": "$reseau.arrets"},
+            {"$match": {"$expr": {"$eq": ["$id_arret", "$reseau.arrets.id_arret"]}}},
+            {"$unwind": "$reseau.arrets.quartiers_ids"},
+            {"$group": {
+                "_id": "$reseau.arrets.quartiers_ids",
+                "avg_co2": {"$avg": "$valeur"}
+            }}
+        ]
+
+    if rollups:
+        df_res = pd.DataFrame(agreger(db, STATS_ARRET_CAPTEUR, pipeline, version))
+    else:
+        df_res = pd.DataFrame(agreger_mesures(db, pipeline, version))
+
+    # construction des données pour la carte choroplèthe
+    data_choropleth = []
+    if not df_res.empty:
+        # quartier sans relevé co2 numérique : moyenne nulle, absent de la carte
+        df_res = df_res.dropna(subset=["avg_co2"])
+        dict_co2 = dict(zip(df_res['_id'], df_res['avg_co2']))
+
+        # itération sur chaque quartier pour récupérer sa valeur de pollution
+        for q in quartiers:
+            val = dict_co2.get(q['_id'], 0)
+            if val > 0:
+                data_choropleth.append({"nom": q['nom'], "co2": val})
+
+    return pd.DataFrame(data_choropleth, columns=["nom", "co2"])
@@ -0,0 +1,408 @@
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+# ==============================================================================
+# Configuration
+# ==============================================================================
+SQLITE_PATH = "Paris2055.sqlite"
+GRAINE = 2055
+DEBUT = np.datetime64("2055-01-01T00:00:00")
+JOURS = 365
+# lignes insérées par executemany (mémoire constante quelle que soit l'échelle)
+TAILLE_BLOC = 100000
+
+# réseau (identique à toutes les échelles) : volumes de la base fournie
+NB_LIGNES = 100
+ARRETS_PAR_LIGNE = 50
+NB_QUARTIERS = (20, 10)           # grille colonnes x rangées sur Paris
+VEHICULES_PAR_LIGNE = 20
+NB_CHAUFFEURS = 1500
+# emprise de Paris (longitude, latitude)
+EMPRISE = ((2.25, 2.42), (48.815, 48.902))
+
+# tables de faits à l'échelle 1 ; multipliées par le facteur d'échelle
+VOLUMES = {
+    "Trafic": 25000,
+    "Mesure": 100000,
+    "Horaire": 100000,
+}
+
+TYPES_LIGNE = [("Bus", "B", 90), ("Metro", "M", 600), ("Tram", "T", 250)]
+TYPES_VEHICULE = ["Electrique", "Diesel", "Hybride"]
+CAPTEURS = [("CO2", "ppm"), ("Bruit", "dB"), ("Temperature", "°C")]
+DESCRIPTIONS_INCIDENT = ["Panne technique", "Accident", "Malaise voyageur", "Colis suspect",
+                         "Travaux", "Intempéries", "Manifestation", "Signalisation"]
+PRENOMS = ["Luca", "Sasha", "Robin", "Camille", "Alex", "Noa", "Jules", "Emma", "Louise", "Hugo",
+           "Lina", "Adam", "Chloé", "Nina", "Léo", "Inès", "Yanis", "Sarah", "Théo", "Maël"]
+NOMS = ["Vincent", "Lefevre", "Giraud", "Martin", "Bernard", "Dubois", "Moreau", "Laurent",
+        "Simon", "Michel", "Garcia", "David", "Bertrand", "Roux", "Fournier", "Morel"]
+
+SCHEMA = """
+CREATE TABLE Ligne (id_ligne INTEGER PRIMARY KEY, nom_ligne TEXT, type TEXT, frequentation_moyenne REAL);
+CREATE TABLE Arret (id_arret INTEGER PRIMARY KEY, nom TEXT, latitude REAL, longitude REAL, id_ligne INTEGER);
+CREATE TABLE Quartier (id_quartier INTEGER PRIMARY KEY, nom TEXT, geojson TEXT);
+CREATE TABLE ArretQuartier (id_arret INTEGER, id_quartier INTEGER);
+CREATE TABLE Chauffeur (id_chauffeur INTEGER PRIMARY KEY, nom TEXT, date_embauche TEXT);
+CREATE TABLE Vehicule (id_vehicule INTEGER PRIMARY KEY, id_ligne INTEGER, immatriculation TEXT,
+                       type_vehicule TEXT, capacite INTEGER, id_chauffeur INTEGER);
+CREATE TABLE Trafic (id_trafic INTEGER PRIMARY KEY, id_ligne INTEGER, horodatage TEXT,
+                     retard_minutes INTEGER, evenement TEXT);
+CREATE TABLE Incident (id_incident INTEGER PRIMARY KEY, id_trafic INTEGER, description TEXT,
+                       gravite INTEGER, horodatage TEXT);
+CREATE TABLE Capteur (id_capteur INTEGER PRIMARY KEY, id_arret INTEGER, type_capteur TEXT,
+                      latitude REAL, longitude REAL);
+CREATE TABLE Mesure (id_mesure INTEGER PRIMARY KEY, id_capteur INTEGER, horodatage TEXT,
+                     valeur REAL, unite TEXT);
+CREATE TABLE Horaire (id_horaire INTEGER PRIMARY KEY, id_arret INTEGER, id_vehicule INTEGER,
+                      heure_prevue TEXT, heure_effective TEXT, passagers_estimes INTEGER);
+"""
+
+# ==============================================================================
+# Outils
+# ==============================================================================
+def en_texte(dates):
+    """
+    horodatages numpy au format texte de la base ('AAAA-MM-JJ HH:MM:SS')
+
+    Args:
+        dates (np.ndarray): tableau datetime64
+
+    Returns:
+        np.ndarray: tableau de chaînes
+    """
+    return np.char.replace(np.datetime_as_string(dates, unit="s"), "T", " ")
+
+def poids_zipf(n, exposant, rng):
+    """
+    popularité déséquilibrée de n éléments (loi de Zipf, rangs mélangés)
+
+    Args:
+        n (int): nombre d'éléments
+        exposant (float): plus il est grand, plus quelques éléments dominent
+        rng (np.random.Generator): générateur aléatoire
+
+    Returns:
+        np.ndarray: probabilités de somme 1
+    """
+    poids = 1.0 / np.arange(1, n + 1) ** exposant
+    rng.shuffle(poids)
+    return poids / poids.sum()
+
+def instants(rng, n, jours, heures_pointe=True):
+    """
+    horodatages répartis sur la période, concentrés aux heures de pointe
+
+    Args:
+        rng (np.random.Generator): générateur aléatoire
+        n (int): nombre d'horodatages
+        jours (int): durée de la période
+        heures_pointe (bool): pics à 8h et 18h, service réduit la nuit
+
+    Returns:
+        np.ndarray: tableau datetime64[s]
+    """
+    jour = rng.integers(0, jours, n)
+    if heures_pointe:
+        profil = np.array([1, 1, 1, 1, 2, 4, 8, 14, 16, 10, 7, 6, 7, 7, 6, 7, 10, 15, 16, 11, 7, 5, 3, 2], float)
+        heure = rng.choice(24, n, p=profil / profil.sum())
+    else:
+        heure = rng.integers(0, 24, n)
+    secondes = jour * 86400 + heure * 3600 + rng.integers(0, 3600, n)
+    return DEBUT + secondes.astype("timedelta64[s]")
+
+def blocs(total, taille=TAILLE_BLOC):
+    """
+    découpage d'un volume en blocs
+
+    Args:
+        total (int): nombre de lignes
+        taille (int): lignes par bloc
+
+    Yields:
+        tuple: (premier identifiant, nombre de lignes du bloc)
+    """
+    for debut in range(0, total, taille):
+        yield debut + 1, min(taille, total - debut)
+
+# ==============================================================================
+# Réseau (tables de dimension)
+# ==============================================================================
+def generer_reseau(conn, rng):
+    """
+    lignes, quartiers, arrêts, chauffeurs, véhicules et capteurs
+
+    Args:
+        conn (sqlite3.Connection): base en cours de génération
+        rng (np.random.Generator): générateur aléatoire
+
+    Returns:
+        dict: tableaux utilisés par les tables de faits (popularité des lignes,
+        arrêts et véhicules par ligne, capteurs)
+    """
+    (lon_min, lon_max), (lat_min, lat_max) = EMPRISE
+    colonnes, rangees = NB_QUARTIERS
+    pas_lon, pas_lat = (lon_max - lon_min) / colonnes, (lat_max - lat_min) / rangees
+
+    # quartiers : grille de polygones wkt (longitude latitude)
+    quartiers = []
+    for q in range(colonnes * rangees):
+        x, y = lon_min + (q % colonnes) * pas_lon, lat_min + (q // colonnes) * pas_lat
+        coins = [(x, y), (x + pas_lon, y), (x + pas_lon, y + pas_lat), (x, y + pas_lat), (x, y)]
+        wkt = "POLYGON((" + ", ".join(f"{lon:.6f} {lat:.6f}" for lon, lat in coins) + "))"
+        quartiers.append((q + 1, f"Quartier-{q + 1}", wkt))
+    conn.executemany("INSERT INTO Quartier VALUES (?, ?, ?)", quartiers)
+
+    # lignes : popularité déséquilibrée (trafic, passages, véhicules)
+    popularite = poids_zipf(NB_LIGNES, 0.8, rng)
+    types = rng.integers(0, len(TYPES_LIGNE), NB_LIGNES)
+    numeros = {}
+    lignes = []
+    for i, t in enumerate(types):
+        nom_type, prefixe, capacite = TYPES_LIGNE[t]
+        numeros[prefixe] = numeros.get(prefixe, 0) + 1
+        lignes.append((i + 1, f"{prefixe}{numeros[prefixe]}", nom_type, float(popularite[i] * 1e6)))
+    conn.executemany("INSERT INTO Ligne VALUES (?, ?, ?, ?)", lignes)
+
+    # arrêts : alignés sur un tracé rectiligne à travers Paris, avec leur quartier
+    arrets, liaisons, arrets_ligne = [], [], []
+    for ligne in range(1, NB_LIGNES + 1):
+        depart = rng.uniform([lon_min, lat_min], [lon_max, lat_max])
+        arrivee = rng.uniform([lon_min, lat_min], [lon_max, lat_max])
+        t = np.linspace(0, 1, ARRETS_PAR_LIGNE)[:, None]
+        points = depart + t * (arrivee - depart) + rng.normal(0, 0.001, (ARRETS_PAR_LIGNE, 2))
+        points = np.clip(points, [lon_min, lat_min], [lon_max - 1e-9, lat_max - 1e-9])
+        ids = []
+        for lon, lat in points:
+            id_arret = len(arrets) + 1
+            arrets.append((id_arret, f"Arret-{id_arret}", float(lat), float(lon), ligne))
+            cellule = int((lat - lat_min) // pas_lat) * colonnes + int((lon - lon_min) // pas_lon)
+            liaisons.append((id_arret, cellule + 1))
+            # arrêt en limite de quartier : rattaché aussi au quartier voisin
+            if rng.random() < 0.3:
+                voisin = cellule + (1 if cellule % colonnes < colonnes - 1 else -1)
+                liaisons.append((id_arret, voisin + 1))
+            ids.append(id_arret)
+        arrets_ligne.append(ids)
+    conn.executemany("INSERT INTO Arret VALUES (?, ?, ?, ?, ?)", arrets)
+    conn.executemany("INSERT INTO ArretQuartier VALUES (?, ?)", liaisons)
+
+    # chauffeurs
+    chauffeurs = [
+        (c, f"{PRENOMS[rng.integers(len(PRENOMS))]} {NOMS[rng.integers(len(NOMS))]}",
+         str(np.datetime64("2030-01-01") + int(rng.integers(0, 9000))))
+        for c in range(1, NB_CHAUFFEURS + 1)
+    ]
+    conn.executemany("INSERT INTO Chauffeur VALUES (?, ?, ?)", chauffeurs)
+
+    # véhicules : quelques-uns sans chauffeur affecté
+    vehicules, vehicules_ligne = [], []
+    for ligne in range(1, NB_LIGNES + 1):
+        capacite = TYPES_LIGNE[types[ligne - 1]][2]
+        ids = []
+        for _ in range(VEHICULES_PAR_LIGNE):
+            id_vehicule = len(vehicules) + 1
+            chauffeur = int(rng.integers(1, NB_CHAUFFEURS + 1)) if rng.random() > 0.03 else None
+            vehicules.append((
+                id_vehicule, ligne, f"PA-{id_vehicule:05d}-{ligne:03d}",
+                TYPES_VEHICULE[rng.choice(3, p=[0.45, 0.35, 0.2])], capacite, chauffeur
+            ))
+            ids.append(id_vehicule)
+        vehicules_ligne.append(ids)
+    conn.executemany("INSERT INTO Vehicule VALUES (?, ?, ?, ?, ?, ?)", vehicules)
+
+    # capteurs : un par arrêt équipé, type tiré au hasard
+    capteurs = []
+    for id_arret, _, lat, lon, _ in arrets:
+        if rng.random() < 0.95:
+            capteurs.append((len(capteurs) + 1, id_arret, CAPTEURS[rng.integers(len(CAPTEURS))][0], lat, lon))
+    conn.executemany("INSERT INTO Capteur VALUES (?, ?, ?, ?, ?)", capteurs)
+    conn.commit()
+
+    types_capteur = np.array([[nom for nom, _ in CAPTEURS].index(c[2]) for c in capteurs])
+    return {
+        "popularite": popularite,
+        # ligne -> identifiants (tableaux lignes x arrêts, lignes x véhicules)
+        "arrets_ligne": np.array(arrets_ligne),
+        "vehicules_ligne": np.array(vehicules_ligne),
+        "types_capteur": types_capteur,
+        # capteurs plus ou moins bavards, biais local de chaque capteur
+        "frequence_capteur": poids_zipf(len(capteurs), 0.5, rng),
+        "biais_capteur": rng.normal(0, 1, len(capteurs)),
+    }
+
+# ==============================================================================
+# Tables de faits (générées par blocs)
+# ==============================================================================
+def generer_trafic(conn, rng, reseau, total, jours):
+    """
+    événements de trafic et incidents associés, par blocs
+
+    les retards suivent une loi gamma (moyenne ~7 min), plus forts aux heures de
+    pointe ; la probabilité d'incident croît avec le retard.
+
+    Args:
+        conn (sqlite3.Connection): base en cours de génération
+        rng (np.random.Generator): générateur aléatoire
+        reseau (dict): tableaux renvoyés par generer_reseau
+        total (int): nombre de lignes Trafic
+        jours (int): durée de la période
+
+    Returns:
+        int: nombre d'incidents générés
+    """
+    nb_incidents = 0
+    for premier, n in blocs(total):
+        ids = np.arange(premier, premier + n)
+        lignes = rng.choice(NB_LIGNES, n, p=reseau["popularite"]) + 1
+        dates = instants(rng, n, jours)
+        heures = (dates - dates.astype("datetime64[D]")).astype(int) // 3600
+        pointe = np.isin(heures, [7, 8, 17, 18])
+        retards = np.rint(rng.gamma(2.0, np.where(pointe, 4.5, 3.2))).astype(int)
+        evenements = np.where(retards > 10, "Retard important", np.where(retards > 3, "Retard", "RAS"))
+        conn.executemany("INSERT INTO Trafic VALUES (?, ?, ?, ?, ?)", zip(
+            ids.tolist(), lignes.tolist(), en_texte(dates).tolist(), retards.tolist(), evenements.tolist()
+        ))
+
+        # incidents : 0 à quelques-uns par événement
+        nombres = rng.poisson(0.15 + 0.04 * retards)
+        trafics = np.repeat(ids, nombres)
+        m = len(trafics)
+        decalages = rng.integers(0, 1800, m).astype("timedelta64[s]")
+        conn.executemany("INSERT INTO Incident VALUES (?, ?, ?, ?, ?)", zip(
+            range(nb_incidents + 1, nb_incidents + m + 1),
+            trafics.tolist(),
+            rng.choice(DESCRIPTIONS_INCIDENT, m, p=poids_zipf(len(DESCRIPTIONS_INCIDENT), 1.0, rng)).tolist(),
+            rng.choice([1, 2, 3, 4, 5], m, p=[0.4, 0.3, 0.15, 0.1, 0.05]).tolist(),
+            en_texte(np.repeat(dates, nombres) + decalages).tolist(),
+        ))
+        nb_incidents += m
+        conn.commit()
+    return nb_incidents
+
+def generer_mesures(conn, rng, reseau, total, jours):
+    """
+    mesures des capteurs, par blocs
+
+    co2 avec cycle journalier, bruit plus fort le jour, température saisonnière ;
+    chaque capteur a son biais local.
+
+    Args:
+        conn (sqlite3.Connection): base en cours de génération
+        rng (np.random.Generator): générateur aléatoire
+        reseau (dict): tableaux renvoyés par generer_reseau
+        total (int): nombre de lignes Mesure
+        jours (int): durée de la période
+    """
+    unites = np.array([unite for _, unite in CAPTEURS])
+    for premier, n in blocs(total):
+        capteurs = rng.choice(len(reseau["types_capteur"]), n, p=reseau["frequence_capteur"])
+        dates = instants(rng, n, jours, heures_pointe=False)
+        secondes = (dates - DEBUT).astype(int)
+        journalier = np.sin(2 * np.pi * (secondes % 86400) / 86400 - np.pi / 2)
+        saisonnier = -np.cos(2 * np.pi * secondes / (365 * 86400))
+        biais = reseau["biais_capteur"][capteurs]
+        types = reseau["types_capteur"][capteurs]
+        valeurs = np.select(
+            [types == 0, types == 1],
+            [
+                420 + 15 * biais + 30 * journalier + rng.normal(0, 20, n),
+                62 + 4 * biais + 6 * journalier + rng.normal(0, 5, n),
+            ],
+            15 + 10 * saisonnier + 4 * journalier + biais + rng.normal(0, 2, n),
+        )
+        conn.executemany("INSERT INTO Mesure VALUES (?, ?, ?, ?, ?)", zip(
+            range(premier, premier + n), (capteurs + 1).tolist(), en_texte(dates).tolist(),
+            np.round(valeurs, 2).tolist(), unites[types].tolist()
+        ))
+        conn.commit()
+
+def generer_horaires(conn, rng, reseau, total, jours):
+    """
+    passages des véhicules aux arrêts, par blocs
+
+    environ 70 % des passages à l'heure ou en avance, 2 % sans heure effective ;
+    la fréquentation suit la popularité de la ligne.
+
+    Args:
+        conn (sqlite3.Connection): base en cours de génération
+        rng (np.random.Generator): générateur aléatoire
+        reseau (dict): tableaux renvoyés par generer_reseau
+        total (int): nombre de lignes Horaire
+        jours (int): durée de la période
+    """
+    for premier, n in blocs(total):
+        lignes = rng.choice(NB_LIGNES, n, p=reseau["popularite"])
+        vehicules = reseau["vehicules_ligne"][lignes, rng.integers(0, VEHICULES_PAR_LIGNE, n)]
+        arrets = reseau["arrets_ligne"][lignes, rng.integers(0, ARRETS_PAR_LIGNE, n)]
+        prevues = instants(rng, n, jours)
+        a_l_heure = rng.random(n) < 0.7
+        ecarts = np.where(a_l_heure, -rng.integers(0, 3, n), rng.integers(1, 16, n)) * 60
+        effectives = en_texte(prevues + ecarts.astype("timedelta64[s]")).astype(object)
+        effectives[rng.random(n) < 0.02] = None
+        passagers = rng.poisson(20 + 2000 * reseau["popularite"][lignes])
+        conn.executemany("INSERT INTO Horaire VALUES (?, ?, ?, ?, ?, ?)", zip(
+            range(premier, premier + n), arrets.tolist(), vehicules.tolist(),
+            en_texte(prevues).tolist(), effectives.tolist(), passagers.tolist()
+        ))
+        conn.commit()
+
+def generer_base(chemin=SQLITE_PATH, echelle=1, jours=JOURS, graine=GRAINE):
+    """
+    génération d'une base Paris2055 complète au facteur d'échelle demandé
+
+    le réseau est celui de l'échelle 1 ; les tables de faits (Trafic, Incident,
+    Mesure, Horaire) sont multipliées par l'échelle et écrites par blocs.
+
+    Args:
+        chemin (str): fichier sqlite à créer (ne doit pas exister)
+        echelle (float): facteur multiplicatif des tables de faits
+        jours (int): durée de la période couverte à partir du 01/01/2055
+        graine (int): graine aléatoire (base reproductible)
+
+    Returns:
+        dict: table -> durée de génération en secondes
+    """
+    rng = np.random.default_rng(graine)
+    conn = sqlite3.connect(chemin)
+    # base neuve : ni journal ni synchronisation pendant le chargement
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(SCHEMA)
+
+    durees = {}
+    debut = time.perf_counter()
+    reseau = generer_reseau(conn, rng)
+    durees["Reseau"] = time.perf_counter() - debut
+    for table, generer in (("Trafic", generer_trafic), ("Mesure", generer_mesures), ("Horaire", generer_horaires)):
+        debut = time.perf_counter()
+        generer(conn, rng, reseau, int(VOLUMES[table] * echelle), jours)
+        durees[table] = time.perf_counter() - debut
+    conn.close()
+    return durees
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génération d'une base Paris2055 synthétique")
+    parser.add_argument("--echelle", type=float, default=1, help="facteur des tables de faits (1, 10, 100, 1000...)")
+    parser.add_argument("--jours", type=int, default=JOURS, help="durée de la période couverte")
+    parser.add_argument("--graine", type=int, default=GRAINE)
+    parser.add_argument("--sortie", default=SQLITE_PATH, help="fichier sqlite créé")
+    parser.add_argument("--ecraser", action="store_true", help="remplacer le fichier s'il existe")
+    args = parser.parse_args()
+
+    if os.path.exists(args.sortie):
+        if not args.ecraser:
+            parser.error(f"{args.sortie} existe déjà (--ecraser pour le remplacer)")
+        os.remove(args.sortie)
+
+    print(f"--- Génération de {args.sortie} (échelle {args.echelle:g}, {args.jours} jours) ---")
+    for table, duree in generer_base(args.sortie, args.echelle, args.jours, args.graine).items():
+        print(f"{table:<10} : {duree:.1f} s")
+    conn = sqlite3.connect(args.sortie)
+    for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+        print(f"Table {table:<15} : {conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]:>12} lignes")
+    conn.close()
+    print(f"Taille : {os.path.getsize(args.sortie) / 1024 ** 2:.1f} Mo")
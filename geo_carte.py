@@ -0,0 +1,195 @@
+import json
+import math
+
+import numpy as np
+import pymongo
+
+from cache_resultats import cle_pipeline, ecrire_cache, lire_cache, lire_version
+
+# ==============================================================================
+# Fonds de carte du dashboard (GeoJSON pré-calculés)
+# ==============================================================================
+# les contours des quartiers sont simplifiés (douglas-peucker) et leurs coordonnées
+# arrondies, puis le FeatureCollection sérialisé est conservé dans le cache partagé
+# pour la version des données : le dashboard le lit en une requête, sans parcourir
+# ni reconstruire les géométries. une nouvelle version (ecrire_version) l'invalide.
+
+# décimales conservées : 5 décimales de degré, environ 1 m
+PRECISION_COORDONNEES = 5
+# écart maximal au contour d'origine, en degrés (environ 10 m à paris)
+TOLERANCE_SIMPLIFICATION = 1e-4
+
+def douglas_peucker(points, tolerance):
+    """
+    simplification d'une ligne brisée par l'algorithme de douglas-peucker
+
+    les extrémités sont conservées ; un point intermédiaire n'est gardé que s'il
+    s'écarte de plus de tolerance du segment qui le remplacerait. un anneau fermé
+    (premier point = dernier point) est découpé depuis son point le plus éloigné.
+
+    Args:
+        points (np.ndarray): coordonnées (n, 2)
+        tolerance (float): distance maximale au tracé d'origine
+
+    Returns:
+        np.ndarray: points conservés, dans l'ordre
+    """
+    n = len(points)
+    if n < 3:
+        return points
+    garder = np.zeros(n, dtype=bool)
+    garder[[0, n - 1]] = True
+    # pile de sections [debut, fin] restant à examiner (pas de récursion)
+    pile = [(0, n - 1)]
+    while pile:
+        debut, fin = pile.pop()
+        if fin - debut < 2:
+            continue
+        a, b = points[debut], points[fin]
+        milieu = points[debut + 1:fin]
+        ab = b - a
+        longueur = np.hypot(*ab)
+        if longueur == 0:
+            # section fermée : distance au point de départ
+            distances = np.hypot(*(milieu - a).T)
+        else:
+            distances = np.abs(ab[0] * (milieu[:, 1] - a[1]) - ab[1] * (milieu[:, 0] - a[0])) / longueur
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            indice = debut + 1 + i
+            garder[indice] = True
+            pile.append((debut, indice))
+            pile.append((indice, fin))
+    return points[garder]
+
+def simplifier_anneau(anneau, tolerance, precision):
+    """
+    simplification et arrondi d'un anneau de polygone
+
+    un anneau réduit à moins de 4 positions (limite geojson) garde son tracé
+    d'origine, seulement arrondi.
+
+    Args:
+        anneau (list): positions [lon, lat] de l'anneau fermé
+        tolerance (float): distance maximale au tracé d'origine (degrés)
+        precision (int): décimales conservées
+
+    Returns:
+        list: positions simplifiées
+    """
+    points = np.asarray(anneau, dtype=float)
+    for candidat in (douglas_peucker(points, tolerance), points):
+        arrondi = np.round(candidat, precision)
+        # positions confondues après arrondi
+        distinct = np.r_[True, np.any(arrondi[1:] != arrondi[:-1], axis=1)]
+        arrondi = arrondi[distinct]
+        if len(arrondi) >= 4:
+            return arrondi.tolist()
+    return np.round(points, precision).tolist()
+
+def simplifier_geometrie(geometrie, tolerance=TOLERANCE_SIMPLIFICATION, precision=PRECISION_COORDONNEES):
+    """
+    simplification d'une géométrie geojson de quartier
+
+    Args:
+        geometrie (dict): géométrie Polygon ou MultiPolygon
+        tolerance (float): distance maximale au tracé d'origine (degrés)
+        precision (int): décimales conservées
+
+    Returns:
+        dict: géométrie simplifiée (les autres types sont renvoyés tels quels)
+    """
+    if geometrie["type"] == "Polygon":
+        anneaux = [simplifier_anneau(anneau, tolerance, precision) for anneau in geometrie["coordinates"]]
+        return {"type": "Polygon", "coordinates": anneaux}
+    if geometrie["type"] == "MultiPolygon":
+        polygones = [
+            [simplifier_anneau(anneau, tolerance, precision) for anneau in polygone]
+            for polygone in geometrie["coordinates"]
+        ]
+        return {"type": "MultiPolygon", "coordinates": polygones}
+    return geometrie
+
+def collection_quartiers(quartiers, tolerance=TOLERANCE_SIMPLIFICATION, precision=PRECISION_COORDONNEES):
+    """
+    FeatureCollection des quartiers aux contours simplifiés
+
+    Args:
+        quartiers (iterable): documents Quartiers (nom, geometry)
+        tolerance (float): distance maximale au tracé d'origine (degrés)
+        precision (int): décimales conservées
+
+    Returns:
+        dict: FeatureCollection (propriété nom, clé de la choroplèthe)
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {"nom": q["nom"]},
+                "geometry": simplifier_geometrie(q["geometry"], tolerance, precision)
+            }
+            for q in quartiers if q.get("geometry")
+        ]
+    }
+
+def geojson_quartiers(db, version, tolerance=TOLERANCE_SIMPLIFICATION, precision=PRECISION_COORDONNEES):
+    """
+    GeoJSON sérialisé des quartiers, lu dans le cache ou calculé puis mis en cache
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        version (str or None): version des données (None : pas de cache)
+        tolerance (float): distance maximale au tracé d'origine (degrés)
+        precision (int): décimales conservées
+
+    Returns:
+        str: FeatureCollection sérialisé sans espaces
+    """
+    cle = cle_pipeline("Quartiers", [{"$geojson": {"tolerance": tolerance, "precision": precision}}])
+    if version is not None:
+        documents = lire_cache(db, cle, version)
+        if documents is not None:
+            return documents[0]["geojson"]
+    quartiers = db.Quartiers.find({}, {"_id": 0, "nom": 1, "geometry": 1})
+    texte = json.dumps(collection_quartiers(quartiers, tolerance, precision), separators=(",", ":"), ensure_ascii=False)
+    if version is not None:
+        ecrire_cache(db, cle, version, [{"geojson": texte}])
+    return texte
+
+def points_arrets(df_arrets, precision=PRECISION_COORDONNEES):
+    """
+    arrêts sous forme de lignes compactes pour une couche de marqueurs côté client
+
+    Args:
+        df_arrets (pd.DataFrame): arrêts (lat, lon, nom, lignes_desservies, CO2, Bruit, Temp)
+        precision (int): décimales conservées
+
+    Returns:
+        list: [lat, lon, nom, nombre de lignes, co2, bruit, température] par arrêt,
+        None pour une mesure absente
+    """
+    def arrondi(v, decimales):
+        return None if v is None or math.isnan(v) else round(float(v), decimales)
+
+    colonnes = ["lat", "lon", "nom", "lignes_desservies", "CO2", "Bruit", "Temp"]
+    points = []
+    for lat, lon, nom, nb, co2, bruit, temp in df_arrets[colonnes].itertuples(index=False):
+        lat, lon = arrondi(lat, precision), arrondi(lon, precision)
+        # arrêt sans localisation : pas de marqueur
+        if lat is not None and lon is not None:
+            points.append([lat, lon, nom, int(nb), arrondi(co2, 1), arrondi(bruit, 1), arrondi(temp, 1)])
+    return points
+
+if __name__ == "__main__":
+    client = pymongo.MongoClient("mongodb://localhost:27017/")
+    db = client["Paris2055"]
+
+    # pré-calcul pour la version courante et gain de la simplification
+    version = lire_version(db)
+    brut = json.dumps(list(db.Quartiers.find({}, {"_id": 0, "nom": 1, "geometry": 1})), separators=(",", ":"))
+    simplifie = geojson_quartiers(db, version)
+    print(f"Version des données : {version}")
+    print(f"GeoJSON quartiers : {len(brut.encode('utf-8')) / 1e3:.0f} ko -> {len(simplifie.encode('utf-8')) / 1e3:.0f} ko")
+    client.close()
@@ -0,0 +1,193 @@
+import math
+import sys
+from collections import Counter
+from datetime import datetime
+
+import pymongo
+
+from partie_3_req_nosql import META_MESURES, adapter_serie_temporelle, lire_schema
+
+# ==============================================================================
+# Indicateurs du bandeau (kpis) maintenus par la migration
+# ==============================================================================
+# un document de MigrationMeta : cumuls exacts (incidents, somme et nombre des mesures
+# co2, lignes), lu par le dashboard en un find_one. les cumuls sont calculés sur les
+# documents transmis à l'écriture ; une migration incrémentale y ajoute ceux des nouveaux
+# documents. si une écriture a échoué, ils ne décrivent plus la base : les kpis sont
+# alors recalculés à partir des collections. le document porte les high-water marks
+# qu'il couvre.
+META_COLLECTION = "MigrationMeta"
+ID_KPIS = "kpis"
+# cumuls additionnés d'une migration à l'autre
+CUMULS_KPIS = ["nb_incidents", "somme_co2", "nb_co2"]
+
+def cumuler_trafic(docs, cumuls):
+    """
+    comptage des incidents des documents TraficEvents transmis à l'écriture
+
+    Args:
+        docs (iterable): documents TraficEvents
+        cumuls (Counter): cumuls complétés sur place
+
+    Yields:
+        dict: documents inchangés
+    """
+    for doc in docs:
+        cumuls["nb_incidents"] += len(doc.get("incidents") or [])
+        yield doc
+
+def cumuler_mesures(docs, cumuls):
+    """
+    somme et nombre des mesures co2 numériques transmises à l'écriture
+
+    les valeurs manquantes (NaN) et textuelles sont ignorées.
+
+    Args:
+        docs (iterable): documents Mesures (à plat ou série temporelle)
+        cumuls (Counter): cumuls complétés sur place
+
+    Yields:
+        dict: documents inchangés
+    """
+    for doc in docs:
+        capteur = doc.get(META_MESURES, doc)
+        valeur = doc.get("valeur")
+        if (capteur.get("type_capteur") == "CO2" and isinstance(valeur, (int, float))
+                and not isinstance(valeur, bool) and not math.isnan(valeur)):
+            cumuls["somme_co2"] += valeur
+            cumuls["nb_co2"] += 1
+        yield doc
+
+def cumuls_taches(resultats):
+    """
+    cumuls des kpis rapportés par les tâches de migration
+
+    Args:
+        resultats (dict): tâche -> résultat (Counter pour les tâches d'écriture)
+
+    Returns:
+        Counter: cumuls additionnés
+    """
+    cumuls = Counter({champ: 0 for champ in CUMULS_KPIS})
+    for resultat in resultats.values():
+        if isinstance(resultat, Counter):
+            for champ in CUMULS_KPIS:
+                cumuls[champ] += resultat.get(champ, 0)
+    return cumuls
+
+def calculer_kpis(db, schema=None):
+    """
+    recalcul complet des cumuls par parcours de TraficEvents et Mesures
+
+    utilisé lorsque le document des kpis est absent ou ne correspond pas aux
+    high-water marks de la migration précédente.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        schema (dict, optional): options du schéma (lues dans la base par défaut)
+
+    Returns:
+        Counter: cumuls des kpis
+    """
+    schema = lire_schema(db) if schema is None else schema
+    incidents = list(db.TraficEvents.aggregate([
+        {"$group": {"_id": None, "total": {"$sum": {"$size": {"$ifNull": ["$incidents", []]}}}}}
+    ]))
+    numerique = {"$and": [{"$isNumber": "$valeur"}, {"$ne": ["$valeur", float("nan")]}]}
+    pipeline_co2 = [
+        {"$match": {"type_capteur": "CO2"}},
+        {"$group": {
+            "_id": None,
+            "somme": {"$sum": {"$cond": [numerique, "$valeur", 0]}},
+            "nb": {"$sum": {"$cond": [numerique, 1, 0]}}
+        }}
+    ]
+    if schema.get("serie_temporelle"):
+        pipeline_co2 = adapter_serie_temporelle(pipeline_co2)
+    co2 = list(db.Mesures.aggregate(pipeline_co2))
+    return Counter({
+        "nb_incidents": incidents[0]["total"] if incidents else 0,
+        "somme_co2": co2[0]["somme"] if co2 else 0,
+        "nb_co2": co2[0]["nb"] if co2 else 0,
+    })
+
+def lire_kpis(db):
+    """
+    document des kpis enregistré par la dernière migration
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+
+    Returns:
+        dict or None: cumuls, nombre de lignes et high-water marks couvertes
+    """
+    return db[META_COLLECTION].find_one({"_id": ID_KPIS})
+
+def ecrire_kpis(db, cumuls, marques):
+    """
+    enregistrement des kpis à la fin d'une migration
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        cumuls (Counter): cumuls des kpis sur l'ensemble des données
+        marques (dict): high-water marks couvertes par ces cumuls
+
+    Returns:
+        dict: document écrit
+    """
+    document = {
+        **{champ: cumuls.get(champ, 0) for champ in CUMULS_KPIS},
+        "nb_lignes": db.Reseau.estimated_document_count(),
+        "marques": marques,
+        "date": datetime.now(),
+    }
+    db[META_COLLECTION].replace_one({"_id": ID_KPIS}, document, upsert=True)
+    return document
+
+def maj_kpis(db, cumuls, marques_precedentes, marques, incremental, echecs=0):
+    """
+    kpis après une migration : cumuls de la migration ajoutés au document précédent
+
+    en migration complète, les cumuls de la migration sont les kpis. en incrémental,
+    ils s'ajoutent au document précédent s'il couvre exactement les marques de départ ;
+    sinon (document absent, migration interrompue) les kpis sont recalculés. ils le
+    sont aussi après des échecs d'écriture : des documents comptés manquent à la base.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        cumuls (Counter): cumuls des documents écrits par cette migration
+        marques_precedentes (dict or None): high-water marks de départ
+        marques (dict): high-water marks atteintes
+        incremental (bool): mode de la migration
+        echecs (int): documents dont l'écriture a échoué
+
+    Returns:
+        dict: document écrit
+    """
+    if echecs:
+        return ecrire_kpis(db, calculer_kpis(db), marques)
+    if incremental:
+        precedent = lire_kpis(db)
+        if precedent is not None and precedent.get("marques") == marques_precedentes:
+            cumuls = Counter({champ: precedent.get(champ, 0) + cumuls.get(champ, 0) for champ in CUMULS_KPIS})
+        else:
+            cumuls = calculer_kpis(db)
+    return ecrire_kpis(db, cumuls, marques)
+
+if __name__ == "__main__":
+    client = pymongo.MongoClient("mongodb://localhost:27017/")
+    db = client["Paris2055"]
+
+    # recalcul complet, par exemple après une modification des données hors migration
+    if "--recalculer" in sys.argv:
+        meta = db[META_COLLECTION].find_one({"_id": "high_water_marks"}) or {}
+        marques = {cle: valeur for cle, valeur in meta.items() if cle not in ("_id", "date_migration", "incremental")}
+        ecrire_kpis(db, calculer_kpis(db), marques)
+    kpis = lire_kpis(db)
+    if kpis is None:
+        print("Aucun kpi enregistré (python indicateurs.py --recalculer).")
+    else:
+        co2 = kpis["somme_co2"] / kpis["nb_co2"] if kpis["nb_co2"] else 0
+        print(f"Lignes : {kpis['nb_lignes']}, incidents : {kpis['nb_incidents']}, "
+              f"CO2 moyen : {co2:.1f} ppm ({kpis['nb_co2']} mesures)")
+    client.close()
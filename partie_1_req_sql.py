@@ -1,250 +1,312 @@
-import sqlite3
+import time
 import pandas
 
-# connexion à la base de données
-conn = sqlite3.connect("paris2055.sqlite")
-
-print("--- Début de l'extraction des données ---")
-
-# a. Moyenne des retards par ligne de transport
-df_A = pandas.read_sql_query("""
-    SELECT Ligne.id_ligne, Ligne.nom_ligne,
-           AVG(Trafic.retard_minutes) AS retard_moyen
-    FROM Trafic
-    LEFT JOIN Ligne ON Trafic.id_ligne = Ligne.id_ligne
-    GROUP BY Ligne.id_ligne, Ligne.nom_ligne
-    ORDER BY retard_moyen DESC;
-""", conn)
-df_A.to_csv("./csv/A_sql.csv", index=False)
-print("Requete A : OK")
-
-# b. Nombre moyen de passagers transportés par jour et par ligne
-df_B = pandas.read_sql_query("""
-    WITH PassagersJour AS (
-        SELECT Ligne.id_ligne,
-               Ligne.nom_ligne,
-               DATE(Horaire.heure_effective) AS jour,
-               SUM(Horaire.passagers_estimes) AS passagers_total_jour
-        FROM Horaire
-        JOIN Vehicule ON Vehicule.id_vehicule = Horaire.id_vehicule
-        JOIN Ligne ON Ligne.id_ligne = Vehicule.id_ligne
-        GROUP BY Ligne.id_ligne, Ligne.nom_ligne, jour
-    )
-    SELECT id_ligne,
-           nom_ligne,
-           AVG(passagers_total_jour) AS passagers_moyens_par_jour
-    FROM PassagersJour
-    GROUP BY id_ligne, nom_ligne
-    ORDER BY passagers_moyens_par_jour DESC;
-""", conn)
-df_B.to_csv("./csv/B_sql.csv", index=False)
-print("Requete B : OK")
-
-# c. Taux d’incident sur chaque ligne
-df_C = pandas.read_sql_query("""
-    WITH stats AS (
-        SELECT 
-            Trafic.id_ligne,
-            COUNT(Incident.id_incident) AS nbre_incidents,
-            COUNT(DISTINCT Trafic.id_trafic) AS nbre_trajets
-        FROM Trafic
-        LEFT JOIN Incident ON Trafic.id_trafic = Incident.id_trafic
-        GROUP BY Trafic.id_ligne
-    )
-    SELECT 
-        Ligne.nom_ligne,
-        (CAST(stats.nbre_incidents AS FLOAT) / stats.nbre_trajets) AS taux_incident
-    FROM Ligne
-    LEFT JOIN stats ON Ligne.id_ligne = stats.id_ligne
-    ORDER BY taux_incident DESC;
-""", conn)
-df_C.to_csv("./csv/C_sql.csv", index=False)
-print("Requete C : OK")
-
-# d. Emissions moyennes de CO₂ par véhicule
-df_D = pandas.read_sql_query("""
-    SELECT 
-        Vehicule.id_vehicule,
-        AVG(Mesure.valeur) AS emission_moyenne_CO2
-    FROM Mesure
-    JOIN Capteur ON Mesure.id_capteur = Capteur.id_capteur
-    JOIN Arret ON Capteur.id_arret = Arret.id_arret
-    JOIN Ligne ON Arret.id_ligne = Ligne.id_ligne
-    JOIN Vehicule ON Ligne.id_ligne = Vehicule.id_ligne
-    WHERE Capteur.type_capteur = 'CO2'
-    GROUP BY Vehicule.id_vehicule
-    ORDER BY emission_moyenne_CO2 DESC, Vehicule.id_vehicule DESC;
-""", conn)
-df_D.to_csv("./csv/D_sql.csv", index=False)
-print("Requete D : OK")
-
-# e. Top 5 des quartiers avec le plus de nuisances sonores
-df_E = pandas.read_sql_query("""
-    SELECT Quartier.nom,
-           AVG(Mesure.valeur) AS bruit_moyen
-    FROM Quartier
-    JOIN ArretQuartier ON Quartier.id_quartier = ArretQuartier.id_quartier
-    JOIN Arret ON ArretQuartier.id_arret = Arret.id_arret
-    JOIN Capteur ON Arret.id_arret = Capteur.id_arret
-    JOIN Mesure ON Capteur.id_capteur = Mesure.id_capteur
-    WHERE Capteur.type_capteur = 'Bruit'
-    GROUP BY Quartier.nom
-    ORDER BY bruit_moyen DESC
-    LIMIT 5;
-""", conn)
-df_E.to_csv("./csv/E_sql.csv", index=False)
-print("Requete E : OK")
-
-# f. Liste des lignes sans incident mais avec retards > 10 min
-df_F = pandas.read_sql_query("""
-    SELECT DISTINCT Ligne.nom_ligne
-    FROM Trafic
-    JOIN Ligne ON Trafic.id_ligne = Ligne.id_ligne
-    LEFT JOIN Incident ON Trafic.id_trafic = Incident.id_trafic
-    WHERE Trafic.retard_minutes > 10
-      AND Incident.id_incident IS NULL
-    ORDER BY Ligne.nom_ligne;
-""", conn)
-df_F.to_csv("./csv/F_sql.csv", index=False)
-print("Requete F : OK")
-
-# g. Taux de ponctualité global
-df_G = pandas.read_sql_query("""
-    SELECT 
-        SUM(CASE WHEN heure_effective <= heure_prevue THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS taux_ponctualite
-    FROM Horaire
-    WHERE heure_effective IS NOT NULL;
-""", conn)
-df_G.to_csv("./csv/G_sql.csv", index=False)
-print("Requete G : OK")
-
-# h. Nombre d’arrêts par quartier
-df_H = pandas.read_sql_query("""
-    SELECT Quartier.id_quartier,
-           Quartier.nom,
-           COUNT(DISTINCT ArretQuartier.id_arret) AS nombre_arrets
-    FROM Quartier
-    JOIN ArretQuartier ON ArretQuartier.id_quartier = Quartier.id_quartier
-    GROUP BY Quartier.id_quartier, Quartier.nom
-    ORDER BY nombre_arrets DESC;
-""", conn)
-df_H.to_csv("./csv/H_sql.csv", index=False)
-print("Requete H : OK")
-
-# i. Corrélation entre trafic et pollution par ligne
-df_I = pandas.read_sql_query("""
-    WITH Retards AS (
-        SELECT Ligne.id_ligne, Ligne.nom_ligne, AVG(Trafic.retard_minutes) AS retard_moyen
+from source_sqlite import connecter
+
+SQLITE_PATH = "paris2055.sqlite"
+DOSSIER_CSV = "./csv"
+
+# ==============================================================================
+# Tables intermédiaires partagées (une seule lecture de Trafic et de Mesure)
+# ==============================================================================
+# statistiques de trafic par ligne : A, C, F, I, K, N
+# statistiques de mesures par capteur (avec son arrêt et son type) : D, E, I, J, M
+# les moyennes sont recalculées à partir des sommes et des comptages (AVG = SUM / COUNT)
+INTERMEDIAIRES = {
+    "StatsTrafic": """
+        CREATE TEMP TABLE StatsTrafic AS
+        SELECT Trafic.id_ligne,
+               SUM(Trafic.retard_minutes) AS somme_retard,
+               COUNT(Trafic.retard_minutes) AS nbre_retards,
+               COUNT(*) AS nbre_trajets,
+               SUM(COALESCE(Incidents.nbre, 0)) AS nbre_incidents,
+               SUM(CASE WHEN Trafic.retard_minutes > 10 AND Incidents.nbre IS NULL THEN 1 ELSE 0 END) AS nbre_retards_sans_incident
         FROM Trafic
-        JOIN Ligne ON Ligne.id_ligne = Trafic.id_ligne
-        GROUP BY Ligne.id_ligne, Ligne.nom_ligne
-    ),
-    Pollution AS (
-        SELECT Ligne.id_ligne, AVG(Mesure.valeur) AS co2_moyen
-        FROM Mesure
-        JOIN Capteur ON Capteur.id_capteur = Mesure.id_capteur
-        JOIN Arret ON Arret.id_arret = Capteur.id_arret
-        JOIN Ligne ON Ligne.id_ligne = Arret.id_ligne
-        WHERE Capteur.type_capteur = 'CO2'
-        GROUP BY Ligne.id_ligne
-    )
-    SELECT Retards.id_ligne,
-           Retards.nom_ligne,
-           Retards.retard_moyen,
-           Pollution.co2_moyen,
-           (Retards.retard_moyen * Pollution.co2_moyen) AS indice_correlation
-    FROM Retards
-    JOIN Pollution ON Pollution.id_ligne = Retards.id_ligne
-    ORDER BY indice_correlation DESC;
-""", conn)
-df_I.to_csv("./csv/I_sql.csv", index=False)
-print("Requete I : OK")
-
-# j. Moyenne de température par ligne
-df_J = pandas.read_sql_query("""
-    SELECT Ligne.id_ligne,
-           Ligne.nom_ligne,
-           AVG(Mesure.valeur) AS temperature_moyenne
-    FROM Mesure
-    JOIN Capteur ON Capteur.id_capteur = Mesure.id_capteur
-    JOIN Arret ON Arret.id_arret = Capteur.id_arret
-    JOIN Ligne ON Ligne.id_ligne = Arret.id_ligne
-    WHERE Capteur.type_capteur LIKE 'Temp%'
-    GROUP BY Ligne.id_ligne, Ligne.nom_ligne
-    ORDER BY temperature_moyenne DESC;
-""", conn)
-df_J.to_csv("./csv/J_sql.csv", index=False)
-print("Requete J : OK")
-
-# k. Performance chauffeur
-df_K = pandas.read_sql_query("""
-    SELECT Chauffeur.id_chauffeur,
-           Chauffeur.nom,
-           AVG(Trafic.retard_minutes) AS retard_moyen
-    FROM Trafic
-    JOIN Vehicule ON Vehicule.id_ligne = Trafic.id_ligne
-    JOIN Chauffeur ON Chauffeur.id_chauffeur = Vehicule.id_chauffeur
-    GROUP BY Chauffeur.id_chauffeur, Chauffeur.nom
-    ORDER BY retard_moyen DESC;
-""", conn)
-df_K.to_csv("./csv/K_sql.csv", index=False)
-print("Requete K : OK")
-
-# l. % de véhicules électriques
-df_L = pandas.read_sql_query("""
-    SELECT Ligne.id_ligne,
-           Ligne.nom_ligne,
-           SUM(CASE WHEN LOWER(Vehicule.type_vehicule) = 'electrique' THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS pourcentage_electrique
-    FROM Vehicule
-    JOIN Ligne ON Ligne.id_ligne = Vehicule.id_ligne
-    GROUP BY Ligne.id_ligne, Ligne.nom_ligne
-    ORDER BY pourcentage_electrique DESC;
-""", conn)
-df_L.to_csv("./csv/L_sql.csv", index=False)
-print("Requete L : OK")
-
-# m. Requête CASE WHEN : Classification pollution
-df_M = pandas.read_sql_query("""
-    WITH Pollution AS (
+        LEFT JOIN (
+            SELECT id_trafic, COUNT(id_incident) AS nbre
+            FROM Incident
+            GROUP BY id_trafic
+        ) AS Incidents ON Incidents.id_trafic = Trafic.id_trafic
+        GROUP BY Trafic.id_ligne;
+    """,
+    "StatsCapteur": """
+        CREATE TEMP TABLE StatsCapteur AS
         SELECT Capteur.id_capteur,
-               Arret.id_arret,
-               AVG(Mesure.valeur) AS pollution_moyenne
+               Capteur.id_arret,
+               Capteur.type_capteur,
+               SUM(Mesure.valeur) AS somme_valeur,
+               COUNT(Mesure.valeur) AS nbre_valeurs
         FROM Mesure
         JOIN Capteur ON Capteur.id_capteur = Mesure.id_capteur
-        JOIN Arret ON Arret.id_arret = Capteur.id_arret
-        WHERE Capteur.type_capteur = 'CO2'
-        GROUP BY Capteur.id_capteur, Arret.id_arret
-    )
-    SELECT Pollution.id_capteur,
-           Pollution.id_arret,
-           Pollution.pollution_moyenne,
-           CASE
-               WHEN pollution_moyenne < 400 THEN 'faible'
-               WHEN pollution_moyenne BETWEEN 400 AND 800 THEN 'moyenne'
-               ELSE 'elevee'
-           END AS niveau_pollution
-    FROM Pollution
-    ORDER BY pollution_moyenne DESC;
-""", conn)
-df_M.to_csv("./csv/M_sql.csv", index=False)
-print("Requete M : OK")
-
-# N. Trouver une autre requête utilisant un case when et qui ait du sens dans ce contexte : Retard classé par gravité
-df_N = pandas.read_sql_query("""SELECT Ligne.id_ligne,
-       Ligne.nom_ligne,
-       AVG(Trafic.retard_minutes) AS retard_moyen,
-       CASE
-           WHEN AVG(Trafic.retard_minutes) < 7  THEN 'OK'
-           WHEN AVG(Trafic.retard_minutes) > 7 THEN 'ALERTE'
-           ELSE 'CRITIQUE'
-       END AS niveau_service
-       FROM Trafic
-       JOIN Ligne ON Ligne.id_ligne = Trafic.id_ligne
-       GROUP BY Ligne.id_ligne, Ligne.nom_ligne
-       ORDER BY retard_moyen DESC;""", conn)
-df_N.to_csv("./csv/N_sql.csv", index=False)
-print("Requete N : OK")
-
-# Fermeture de la connexion
-conn.close()
-print("--- Terminé : Tous les fichiers CSV ont été générés ---")
\ No newline at end of file
+        GROUP BY Capteur.id_capteur, Capteur.id_arret, Capteur.type_capteur;
+    """,
+}
+
+# ==============================================================================
+# Requêtes : lettre -> requête SQL
+# ==============================================================================
+REQUETES_SQL = {
+    # a. Moyenne des retards par ligne de transport
+    "a": """
+        SELECT Ligne.id_ligne, Ligne.nom_ligne,
+               CAST(SUM(StatsTrafic.somme_retard) AS FLOAT) / SUM(StatsTrafic.nbre_retards) AS retard_moyen
+        FROM StatsTrafic
+        LEFT JOIN Ligne ON StatsTrafic.id_ligne = Ligne.id_ligne
+        GROUP BY Ligne.id_ligne, Ligne.nom_ligne
+        ORDER BY retard_moyen DESC;
+    """,
+
+    # b. Nombre moyen de passagers transportés par jour et par ligne
+    "b": """
+        WITH PassagersJour AS (
+            SELECT Ligne.id_ligne,
+                   Ligne.nom_ligne,
+                   DATE(Horaire.heure_effective) AS jour,
+                   SUM(Horaire.passagers_estimes) AS passagers_total_jour
+            FROM Horaire
+            JOIN Vehicule ON Vehicule.id_vehicule = Horaire.id_vehicule
+            JOIN Ligne ON Ligne.id_ligne = Vehicule.id_ligne
+            GROUP BY Ligne.id_ligne, Ligne.nom_ligne, jour
+        )
+        SELECT id_ligne,
+               nom_ligne,
+               AVG(passagers_total_jour) AS passagers_moyens_par_jour
+        FROM PassagersJour
+        GROUP BY id_ligne, nom_ligne
+        ORDER BY passagers_moyens_par_jour DESC;
+    """,
+
+    # c. Taux d’incident sur chaque ligne
+    "c": """
+        SELECT
+            Ligne.nom_ligne,
+            (CAST(StatsTrafic.nbre_incidents AS FLOAT) / StatsTrafic.nbre_trajets) AS taux_incident
+        FROM Ligne
+        LEFT JOIN StatsTrafic ON Ligne.id_ligne = StatsTrafic.id_ligne
+        ORDER BY taux_incident DESC;
+    """,
+
+    # d. Emissions moyennes de CO₂ par véhicule
+    "d": """
+        SELECT
+            Vehicule.id_vehicule,
+            CAST(SUM(StatsCapteur.somme_valeur) AS FLOAT) / SUM(StatsCapteur.nbre_valeurs) AS emission_moyenne_CO2
+        FROM StatsCapteur
+        JOIN Arret ON StatsCapteur.id_arret = Arret.id_arret
+        JOIN Ligne ON Arret.id_ligne = Ligne.id_ligne
+        JOIN Vehicule ON Ligne.id_ligne = Vehicule.id_ligne
+        WHERE StatsCapteur.type_capteur = 'CO2'
+        GROUP BY Vehicule.id_vehicule
+        ORDER BY emission_moyenne_CO2 DESC, Vehicule.id_vehicule DESC;
+    """,
+
+    # e. Top 5 des quartiers avec le plus de nuisances sonores
+    "e": """
+        SELECT Quartier.nom,
+               CAST(SUM(StatsCapteur.somme_valeur) AS FLOAT) / SUM(StatsCapteur.nbre_valeurs) AS bruit_moyen
+        FROM Quartier
+        JOIN ArretQuartier ON Quartier.id_quartier = ArretQuartier.id_quartier
+        JOIN Arret ON ArretQuartier.id_arret = Arret.id_arret
+        JOIN StatsCapteur ON Arret.id_arret = StatsCapteur.id_arret
+        WHERE StatsCapteur.type_capteur = 'Bruit'
+        GROUP BY Quartier.nom
+        ORDER BY bruit_moyen DESC
+        LIMIT 5;
+    """,
+
+    # f. Liste des lignes sans incident mais avec retards > 10 min
+    "f": """
+        SELECT DISTINCT Ligne.nom_ligne
+        FROM StatsTrafic
+        JOIN Ligne ON StatsTrafic.id_ligne = Ligne.id_ligne
+        WHERE StatsTrafic.nbre_retards_sans_incident > 0
+        ORDER BY Ligne.nom_ligne;
+    """,
+
+    # g. Taux de ponctualité global
+    "g": """
+        SELECT
+            SUM(CASE WHEN heure_effective <= heure_prevue THEN 1 ELSE 0 END) * 1.0 / COUNT(*) AS taux_ponctualite
+        FROM Horaire
+        WHERE heure_effective IS NOT NULL;
+    """,
+
+    # h. Nombre d’arrêts par quartier
+    "h": """
+        SELECT Quartier.id_quartier,
+               Quartier.nom,
+               COUNT(DISTINCT ArretQuartier.id_arret) AS nombre_arrets
+        FROM Quartier
+        JOIN ArretQuartier ON ArretQuartier.id_quartier = Quartier.id_quartier
+        GROUP BY Quartier.id_quartier, Quartier.nom
+        ORDER BY nombre_arrets DESC;
+    """,
+
+    # i. Corrélation entre trafic et pollution par ligne
+    "i": """
+        WITH Retards AS (
+            SELECT Ligne.id_ligne, Ligne.nom_ligne,
+                   CAST(StatsTrafic.somme_retard AS FLOAT) / StatsTrafic.nbre_retards AS retard_moyen
+            FROM StatsTrafic
+            JOIN Ligne ON Ligne.id_ligne = StatsTrafic.id_ligne
+        ),
+        Pollution AS (
+            SELECT Ligne.id_ligne,
+                   CAST(SUM(StatsCapteur.somme_valeur) AS FLOAT) / SUM(StatsCapteur.nbre_valeurs) AS co2_moyen
+            FROM StatsCapteur
+            JOIN Arret ON Arret.id_arret = StatsCapteur.id_arret
+            JOIN Ligne ON Ligne.id_ligne = Arret.id_ligne
+            WHERE StatsCapteur.type_capteur = 'CO2'
+            GROUP BY Ligne.id_ligne
+        )
+        SELECT Retards.id_ligne,
+               Retards.nom_ligne,
+               Retards.retard_moyen,
+               Pollution.co2_moyen,
+               (Retards.retard_moyen * Pollution.co2_moyen) AS indice_correlation
+        FROM Retards
+        JOIN Pollution ON Pollution.id_ligne = Retards.id_ligne
+        ORDER BY indice_correlation DESC;
+    """,
+
+    # j. Moyenne de température par ligne
+    "j": """
+        SELECT Ligne.id_ligne,
+               Ligne.nom_ligne,
+               CAST(SUM(StatsCapteur.somme_valeur) AS FLOAT) / SUM(StatsCapteur.nbre_valeurs) AS temperature_moyenne
+        FROM StatsCapteur
+        JOIN Arret ON Arret.id_arret = StatsCapteur.id_arret
+        JOIN Ligne ON Ligne.id_ligne = Arret.id_ligne
+        WHERE StatsCapteur.type_capteur LIKE 'Temp%'
+        GROUP BY Ligne.id_ligne, Ligne.nom_ligne
+        ORDER BY temperature_moyenne DESC;
+    """,
+
+    # k. Performance chauffeur
+    "k": """
+        SELECT Chauffeur.id_chauffeur,
+               Chauffeur.nom,
+               CAST(SUM(StatsTrafic.somme_retard) AS FLOAT) / SUM(StatsTrafic.nbre_retards) AS retard_moyen
+        FROM StatsTrafic
+        JOIN Vehicule ON Vehicule.id_ligne = StatsTrafic.id_ligne
+        JOIN Chauffeur ON Chauffeur.id_chauffeur = Vehicule.id_chauffeur
+        GROUP BY Chauffeur.id_chauffeur, Chauffeur.nom
+        ORDER BY retard_moyen DESC;
+    """,
+
+    # l. % de véhicules électriques
+    "l": """
+        SELECT Ligne.id_ligne,
+               Ligne.nom_ligne,
+               SUM(CASE WHEN LOWER(Vehicule.type_vehicule) = 'electrique' THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS pourcentage_electrique
+        FROM Vehicule
+        JOIN Ligne ON Ligne.id_ligne = Vehicule.id_ligne
+        GROUP BY Ligne.id_ligne, Ligne.nom_ligne
+        ORDER BY pourcentage_electrique DESC;
+    """,
+
+    # m. Requête CASE WHEN : Classification pollution
+    "m": """
+        WITH Pollution AS (
+            SELECT StatsCapteur.id_capteur,
+                   Arret.id_arret,
+                   CAST(StatsCapteur.somme_valeur AS FLOAT) / StatsCapteur.nbre_valeurs AS pollution_moyenne
+            FROM StatsCapteur
+            JOIN Arret ON Arret.id_arret = StatsCapteur.id_arret
+            WHERE StatsCapteur.type_capteur = 'CO2'
+        )
+        SELECT Pollution.id_capteur,
+               Pollution.id_arret,
+               Pollution.pollution_moyenne,
+               CASE
+                   WHEN pollution_moyenne < 400 THEN 'faible'
+                   WHEN pollution_moyenne BETWEEN 400 AND 800 THEN 'moyenne'
+                   ELSE 'elevee'
+               END AS niveau_pollution
+        FROM Pollution
+        ORDER BY pollution_moyenne DESC;
+    """,
+
+    # N. Trouver une autre requête utilisant un case when et qui ait du sens dans ce contexte : Retard classé par gravité
+    "n": """
+        WITH Retards AS (
+            SELECT Ligne.id_ligne,
+                   Ligne.nom_ligne,
+                   CAST(StatsTrafic.somme_retard AS FLOAT) / StatsTrafic.nbre_retards AS retard_moyen
+            FROM StatsTrafic
+            JOIN Ligne ON Ligne.id_ligne = StatsTrafic.id_ligne
+        )
+        SELECT id_ligne,
+               nom_ligne,
+               retard_moyen,
+               CASE
+                   WHEN retard_moyen < 7  THEN 'OK'
+                   WHEN retard_moyen > 7 THEN 'ALERTE'
+                   ELSE 'CRITIQUE'
+               END AS niveau_service
+        FROM Retards
+        ORDER BY retard_moyen DESC;
+    """,
+}
+
+# ==============================================================================
+# Exécution
+# ==============================================================================
+def materialiser_intermediaires(conn, intermediaires=INTERMEDIAIRES):
+    """
+    création des tables temporaires partagées par les requêtes
+
+    Args:
+        conn (sqlite3.Connection): connexion sqlite (les tables temporaires lui sont propres)
+        intermediaires (dict): nom -> requête CREATE TEMP TABLE
+
+    Returns:
+        dict: nom -> durée de création en secondes
+    """
+    durees = {}
+    for nom, requete in intermediaires.items():
+        debut = time.perf_counter()
+        conn.execute(f"DROP TABLE IF EXISTS temp.{nom}")
+        conn.execute(requete)
+        durees[nom] = time.perf_counter() - debut
+    return durees
+
+def executer_requetes(conn, requetes=REQUETES_SQL, dossier=DOSSIER_CSV):
+    """
+    exécution des requêtes, export csv et chronométrage de chacune
+
+    Args:
+        conn (sqlite3.Connection): connexion sqlite avec les tables intermédiaires
+        requetes (dict): lettre -> requête SQL
+        dossier (str): dossier des fichiers X_sql.csv
+
+    Returns:
+        dict: lettre -> durée d'exécution en secondes (export csv exclu)
+    """
+    durees = {}
+    for lettre, requete in requetes.items():
+        debut = time.perf_counter()
+        df = pandas.read_sql_query(requete, conn)
+        durees[lettre] = time.perf_counter() - debut
+        df.to_csv(f"{dossier}/{lettre.upper()}_sql.csv", index=False)
+        print(f"Requete {lettre.upper()} : OK ({durees[lettre] * 1000:.1f} ms)")
+    return durees
+
+if __name__ == "__main__":
+    # connexion à la base de données (lecture seule, profil de lecture)
+    conn = connecter(SQLITE_PATH, query_only=False)
+
+    print("--- Début de l'extraction des données ---")
+
+    # lecture unique des grandes tables
+    for nom, duree in materialiser_intermediaires(conn).items():
+        print(f"Table intermédiaire {nom} : {duree * 1000:.1f} ms")
+    # plus aucune écriture, même temporaire, une fois les tables intermédiaires créées
+    conn.execute("PRAGMA query_only = ON")
+
+    durees = executer_requetes(conn)
+
+    # Fermeture de la connexion
+    conn.close()
+    print(f"Durée totale des requêtes : {sum(durees.values()) * 1000:.1f} ms")
+    print("--- Terminé : Tous les fichiers CSV ont été générés ---")
@@ -1,53 +1,386 @@
-import sqlite3
+import argparse
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
+import bson
 import pandas as pd
 import pymongo
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from pymongo.write_concern import WriteConcern
 import json
 
+from partie_3_req_nosql import CHAMPS_CAPTEUR, META_MESURES, lire_schema, requetes_pour_schema
+from plan_index import creer_index, plan_pour_schema, verifier_plans
+from cache_resultats import ecrire_version
+from geo_carte import geojson_quartiers
+from indicateurs import cumuler_mesures, cumuler_trafic, cumuls_taches, maj_kpis
+from rollups import etat_rollups, mettre_a_jour_rollups, reconstruire_rollups
+from source_sqlite import connecter, creer_index_source
+
+# ==============================================================================
+# 1. Configuration
+# ==============================================================================
+SQLITE_PATH = "Paris2055.sqlite"
+MONGO_URI = "mongodb://localhost:27017/"
+MONGO_DB = "Paris2055"
+
+# nombre de lignes sqlite lues à chaque itération du curseur (mémoire bornée)
+CHUNK_SIZE = 50000
+# taille maximale d'un lot envoyé à mongodb (documents et octets bson)
+BATCH_SIZE = 5000
+BATCH_OCTETS = 8 * 1024 * 1024
+# write concern du chargement en masse (journal vidé une seule fois en fin de migration)
+WRITE_W = 1
+WRITE_J = False
+# nombre maximal de lots en cours d'envoi par collection (contre-pression sur la lecture)
+LOTS_EN_VOL = 4
+# réessais des erreurs transitoires avec attente exponentielle (secondes)
+MAX_REESSAIS = 5
+BACKOFF_INITIAL = 0.5
+# codes d'erreur serveur considérés comme transitoires
+CODES_REESSAYABLES = {6, 7, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436}
+CODE_DOUBLON = 11000
+# nombre de workers de migration en parallèle
+NB_WORKERS = os.cpu_count() or 1
+# nombre de plages de clés primaires par grande table (Trafic, Mesure, Horaire)
+NB_PARTITIONS = NB_WORKERS
+# type d'exécuteur : "processus" (calcul pandas en parallèle) ou "threads"
+EXECUTEUR = "processus"
+
+COLLECTIONS = ["Reseau", "TraficEvents", "Quartiers", "Mesures", "Horaires"]
+
+# collection de métadonnées de migration (high-water marks)
+META_COLLECTION = "MigrationMeta"
+# table source -> colonne croissante servant de high-water mark
+MARQUES_TABLES = {
+    "Trafic": "id_trafic",
+    "Incident": "id_incident",
+    "Mesure": "rowid",
+    "Horaire": "id_horaire",
+}
+# borne basse utilisée en migration complète (plus petit entier sqlite)
+DEBUT_TABLE = -2**63
+# options qui changent la forme des documents déjà migrés
+OPTIONS_DOCUMENTS = ["denormalisation", "serie_temporelle", "buckets_horaires"]
+
+def config_par_defaut():
+    """
+    configuration de migration issue des constantes du module
+
+    Returns:
+        dict: paramètres transmis à chaque tâche de migration
+    """
+    return {
+        "sqlite_path": SQLITE_PATH,
+        "mongo_uri": MONGO_URI,
+        "mongo_db": MONGO_DB,
+        "chunk_size": CHUNK_SIZE,
+        "batch_size": BATCH_SIZE,
+        "batch_octets": BATCH_OCTETS,
+        "w": WRITE_W,
+        "j": WRITE_J,
+        "en_vol": LOTS_EN_VOL,
+        "max_reessais": MAX_REESSAIS,
+        "backoff": BACKOFF_INITIAL,
+        "workers": NB_WORKERS,
+        "partitions": NB_PARTITIONS,
+        "executeur": EXECUTEUR,
+        "incremental": False,
+        "verifier_index": False,
+        # index couvrants créés dans la base source avant la lecture
+        "index_source": False,
+        # id_ligne et quartiers_ids recopiés dans chaque document Mesures
+        "denormalisation": False,
+        # granularité de la collection de séries temporelles Mesures (None : collection classique)
+        "serie_temporelle": None,
+        # agrégats pré-calculés (stats_ligne_jour, stats_arret_capteur) maintenus en fin de migration
+        "rollups": False,
+        # Horaires regroupés en un document par véhicule et par jour
+        "buckets_horaires": False,
+        # table -> (borne exclue, borne incluse) des lignes à migrer
+        "marques": {},
+    }
+
+def ouvrir_connexions(config):
+    """
+    ouverture d'une connexion sqlite et d'un client mongodb propres à une tâche
+
+    Args:
+        config (dict): configuration de migration
+
+    Returns:
+        tuple: (connexion sqlite, client mongodb, base mongodb)
+    """
+    sqlite_conn = connecter(config["sqlite_path"])
+    client = pymongo.MongoClient(config["mongo_uri"])
+    return sqlite_conn, client, client[config["mongo_db"]]
+
+# ==============================================================================
+# Outils de lecture / écriture par blocs
+# ==============================================================================
+def lire_par_blocs(requete, conn, chunksize=CHUNK_SIZE, params=None):
+    """
+    lecture d'une requête sqlite via un curseur, bloc par bloc
+
+    Args:
+        requete (str): requête sql à exécuter
+        conn (sqlite3.Connection): connexion sqlite source
+        chunksize (int): nombre de lignes par bloc
+        params (tuple, optional): paramètres de la requête
+
+    Returns:
+        iterator: itérateur de pd.DataFrame de taille au plus chunksize
+    """
+    return pd.read_sql_query(requete, conn, params=params, chunksize=chunksize)
+
 # ==============================================================================
-# 1. Configuration et nettoyage
+# Écriture en masse : lots non ordonnés, réessais et contre-pression
 # ==============================================================================
-print("--- DÉBUT DE LA MIGRATION ---")
-
-# connexions à la base de données sqlite et la bdd MongoDB
-try:
-    sqlite_conn = sqlite3.connect("Paris2055.sqlite")
-    client = pymongo.MongoClient("mongodb://localhost:27017/")
-    db = client["Paris2055"]
-    print("Connexions établies.")
-except Exception as e:
-    print(f"Erreur de connexion : {e}")
-    exit()
-
-# suppression anciennes collections pour repartir au propre
-collections = ["Reseau", "TraficEvents", "Quartiers", "Mesures", "Horaires"]
-for col in collections:
-    db[col].drop()
+def operations_insertion(docs):
+    """
+    opérations d'insertion simple pour un flux de documents
+
+    Args:
+        docs (iterable): documents à insérer
+
+    Yields:
+        tuple: (opération pymongo, document servant au calcul de taille)
+    """
+    for doc in docs:
+        yield pymongo.InsertOne(doc), doc
+
+def operations_upsert(docs, cle="_id"):
+    """
+    opérations de remplacement par clé (insertion si absent) pour un flux de documents
+
+    Args:
+        docs (iterable): documents à insérer ou remplacer
+        cle (str): champ identifiant la ligne source
+
+    Yields:
+        tuple: (opération pymongo, document servant au calcul de taille)
+    """
+    for doc in docs:
+        yield pymongo.ReplaceOne({cle: doc[cle]}, doc, upsert=True), doc
+
+def decouper_lots(operations, max_docs, max_octets):
+    """
+    regroupement des opérations en lots bornés en nombre de documents et en octets
+
+    Args:
+        operations (iterable): couples (opération, document)
+        max_docs (int): nombre maximal d'opérations par lot
+        max_octets (int): taille bson maximale cumulée par lot
+
+    Yields:
+        list: lot d'opérations pymongo
+    """
+    lot = []
+    taille = 0
+    for operation, doc in operations:
+        octets = len(bson.encode(doc))
+        if lot and (len(lot) >= max_docs or taille + octets > max_octets):
+            yield lot
+            lot = []
+            taille = 0
+        lot.append(operation)
+        taille += octets
+    if lot:
+        yield lot
+
+def envoyer_lot(collection, lot, config):
+    """
+    envoi d'un lot non ordonné avec réessai des erreurs transitoires
+
+    seules les opérations en erreur transitoire sont renvoyées, après une attente
+    qui double à chaque tentative. un doublon de clé signifie que le document est
+    déjà présent (tentative précédente ou migration interrompue rejouée) : l'opération
+    est comptée comme écrite, dès la première tentative.
+
+    Args:
+        collection (pymongo.collection.Collection): collection cible
+        lot (list): opérations pymongo
+        config (dict): configuration de migration
+
+    Returns:
+        Counter: documents écrits, en échec et réessayés
+    """
+    compteurs = Counter(ecrits=0, echecs=0, reessais=0)
+    a_envoyer = lot
+    for tentative in range(config["max_reessais"] + 1):
+        if tentative:
+            compteurs["reessais"] += len(a_envoyer)
+            time.sleep(config["backoff"] * 2 ** (tentative - 1))
+        try:
+            res = collection.bulk_write(a_envoyer, ordered=False)
+            compteurs["ecrits"] += res.inserted_count + res.upserted_count + res.matched_count
+            return compteurs
+        except BulkWriteError as e:
+            details = e.details
+            compteurs["ecrits"] += details["nInserted"] + details["nUpserted"] + details["nMatched"]
+            a_reessayer = []
+            for erreur in details["writeErrors"]:
+                if erreur["code"] in CODES_REESSAYABLES:
+                    a_reessayer.append(a_envoyer[erreur["index"]])
+                elif erreur["code"] == CODE_DOUBLON:
+                    compteurs["ecrits"] += 1
+                else:
+                    compteurs["echecs"] += 1
+            a_envoyer = a_reessayer
+            if not a_envoyer:
+                return compteurs
+        except ConnectionFailure:
+            # erreur réseau : l'état du lot est inconnu, il est renvoyé en entier
+            pass
+    compteurs["echecs"] += len(a_envoyer)
+    return compteurs
+
+def ecrire_en_masse(collection, operations, config):
+    """
+    écriture d'un flux d'opérations par lots, avec un nombre borné de lots en vol
+
+    la lecture du flux est suspendue tant que LOTS_EN_VOL lots sont en cours d'envoi,
+    ce qui borne la mémoire même si mongodb est plus lent que la source.
+
+    Args:
+        collection (pymongo.collection.Collection): collection cible
+        operations (iterable): couples (opération, document)
+        config (dict): configuration de migration
+
+    Returns:
+        Counter: documents écrits, en échec et réessayés
+    """
+    collection = collection.with_options(write_concern=WriteConcern(w=config["w"], j=config["j"]))
+    compteurs = Counter(ecrits=0, echecs=0, reessais=0)
+    en_vol = set()
+    with ThreadPoolExecutor(max_workers=config["en_vol"]) as pool:
+        for lot in decouper_lots(operations, config["batch_size"], config["batch_octets"]):
+            if len(en_vol) >= config["en_vol"]:
+                termines, en_vol = wait(en_vol, return_when=FIRST_COMPLETED)
+                for future in termines:
+                    compteurs.update(future.result())
+            en_vol.add(pool.submit(envoyer_lot, collection, lot, config))
+        for future in en_vol:
+            compteurs.update(future.result())
+    return compteurs
+
+def ecrire_par_lots(collection, docs, config):
+    """
+    écriture selon le mode : insertion en migration complète, upsert en incrémental
+
+    Args:
+        collection (pymongo.collection.Collection): collection cible
+        docs (iterable): documents à écrire
+        config (dict): configuration de migration
+
+    Returns:
+        Counter: documents écrits, en échec et réessayés
+    """
+    operations = operations_upsert(docs) if config["incremental"] else operations_insertion(docs)
+    return ecrire_en_masse(collection, operations, config)
+
+# ==============================================================================
+# Outils de construction vectorisée des documents
+# ==============================================================================
+def dates_ou_none(serie):
+    """
+    conversion vectorisée d'une colonne texte en dates (NaT remplacé par None)
+
+    Args:
+        serie (pd.Series): colonne d'horodatages
+
+    Returns:
+        pd.Series: colonne object de Timestamp ou None
+    """
+    dates = pd.to_datetime(serie, errors='coerce')
+    return dates.astype(object).where(dates.notnull(), None)
+
+def points_geojson(longitudes, latitudes):
+    """
+    construction des points geojson à partir des colonnes longitude / latitude
+
+    Args:
+        longitudes (pd.Series): colonne des longitudes
+        latitudes (pd.Series): colonne des latitudes
+
+    Returns:
+        list: liste de dictionnaires geojson de type Point
+    """
+    return [
+        {"type": "Point", "coordinates": [lon, lat]}
+        for lon, lat in zip(longitudes.astype(float).tolist(), latitudes.astype(float).tolist())
+    ]
+
+def grouper_records(cles, records):
+    """
+    regroupement de documents par clé en une seule passe
+
+    Args:
+        cles (iterable): clé de regroupement de chaque document
+        records (iterable): documents à regrouper
+
+    Returns:
+        dict: clé -> liste des documents associés
+    """
+    groupes = {}
+    for cle, record in zip(cles, records):
+        groupes.setdefault(cle, []).append(record)
+    return groupes
 
 # ==============================================================================
 # 2. Préparation : Table de liaison Arret-Quartier
 # ==============================================================================
-print("--- Pré-traitement : Liaison Arret-Quartier ---")
+def charger_liaisons(config):
+    """
+    chargement de la table de liaison arrêt -> quartiers
+
+    Args:
+        config (dict): configuration de migration
+
+    Returns:
+        dict: id_arret -> liste des id_quartier
+    """
+    print("--- Pré-traitement : Liaison Arret-Quartier ---")
+    sqlite_conn = connecter(config["sqlite_path"])
+    # chargement des données de liaison en mémoire
+    df_aq = pd.read_sql_query("SELECT * FROM ArretQuartier", sqlite_conn)
+    sqlite_conn.close()
 
-# chargement des données de liaison en mémoire
-df_aq = pd.read_sql_query("SELECT * FROM ArretQuartier", sqlite_conn)
-map_arret_quartiers = {}
+    # création dictionnaire avec l'identifiant de l'arrêt en clé et la liste des quartiers en valeur
+    map_arret_quartiers = grouper_records(
+        df_aq['id_arret'].astype(int).tolist(),
+        df_aq['id_quartier'].astype(int).tolist()
+    )
+    print(f"Liaisons chargées ({len(map_arret_quartiers)} arrêts).")
+    return map_arret_quartiers
 
-# création dictionnaire avec l'identifiant de l'arrêt en clé et l'identifiant de quartier en valeur
-for _, row in df_aq.iterrows():
-    aid = int(row['id_arret'])
-    qid = int(row['id_quartier'])
-    if aid not in map_arret_quartiers:
-        map_arret_quartiers[aid] = []
-    map_arret_quartiers[aid].append(qid)
+def charger_denormalisation(config, map_arret_quartiers):
+    """
+    chargement des correspondances recopiées dans les documents Mesures
 
-print(f"Liaisons chargées ({len(map_arret_quartiers)} arrêts).")
+    Args:
+        config (dict): configuration de migration
+        map_arret_quartiers (dict): résultat de la tâche de liaison arrêt -> quartiers
+
+    Returns:
+        dict: {"lignes": id_arret -> id_ligne, "quartiers": id_arret -> liste des id_quartier}
+    """
+    print("--- Pré-traitement : Dénormalisation Arret -> Ligne / Quartiers ---")
+    sqlite_conn = connecter(config["sqlite_path"])
+    df_arrets = pd.read_sql_query("SELECT id_arret, id_ligne FROM Arret WHERE id_ligne IS NOT NULL", sqlite_conn)
+    sqlite_conn.close()
+
+    map_arret_ligne = dict(zip(
+        df_arrets['id_arret'].astype(int).tolist(),
+        df_arrets['id_ligne'].astype(int).tolist()
+    ))
+    return {"lignes": map_arret_ligne, "quartiers": map_arret_quartiers}
 
 # ==============================================================================
 # 3. Collection : Quartiers (GeoJSON)
 # ==============================================================================
-print("--- Migration : Quartiers ---")
-
 def parse_wkt_polygon(wkt_string):
     # conversion format wkt vers structure geojson
     try:
@@ -62,244 +395,969 @@ def parse_wkt_polygon(wkt_string):
     except:
         return None
 
-df_quartiers = pd.read_sql_query("SELECT * FROM Quartier", sqlite_conn)
-quartiers_docs = []
+def construire_docs_quartiers(df_quartiers):
+    """
+    construction vectorisée des documents quartiers
 
-# construction documents quartiers
-for _, row in df_quartiers.iterrows():
-    doc = {
-        "_id": int(row['id_quartier']),
-        "nom": str(row['nom']),
-        "geometry": parse_wkt_polygon(row['geojson'])
-    }
-    quartiers_docs.append(doc)
+    Args:
+        df_quartiers (pd.DataFrame): table Quartier
+
+    Returns:
+        list: documents Quartiers
+    """
+    return pd.DataFrame({
+        "_id": df_quartiers['id_quartier'].astype(int),
+        "nom": df_quartiers['nom'].astype(str),
+        "geometry": df_quartiers['geojson'].map(parse_wkt_polygon)
+    }).to_dict(orient='records')
+
+def migrer_quartiers(config):
+    """
+    migration de la table Quartier vers la collection Quartiers
 
-if quartiers_docs:
-    db.Quartiers.insert_many(quartiers_docs)
-    # index géospatial pour requêtes géographiques
-    db.Quartiers.create_index([("geometry", "2dsphere")])
-    print(f"{len(quartiers_docs)} Quartiers insérés.")
+    Args:
+        config (dict): configuration de migration
+
+    Returns:
+        Counter: documents écrits, en échec et réessayés
+    """
+    print("--- Migration : Quartiers ---")
+    sqlite_conn, client, db = ouvrir_connexions(config)
+    df_quartiers = pd.read_sql_query("SELECT * FROM Quartier", sqlite_conn)
+    compteurs = ecrire_par_lots(db.Quartiers, construire_docs_quartiers(df_quartiers), config)
+    sqlite_conn.close()
+    client.close()
+    print(f"{compteurs['ecrits']} Quartiers insérés.")
+    return compteurs
 
 # ==============================================================================
 # 4. Collection : Reseau (Lignes + Arrêts imbriqués + Véhicules)
 # ==============================================================================
-print("--- Migration : Reseau ---")
-
-df_lignes = pd.read_sql_query("SELECT * FROM Ligne", sqlite_conn)
-df_arrets = pd.read_sql_query("SELECT * FROM Arret", sqlite_conn)
-# récupération des véhicules avec les infos chauffeur
-df_vehicules = pd.read_sql_query("""
-    SELECT V.*, C.nom as nom_chauffeur, C.date_embauche 
-    FROM Vehicule V 
-    LEFT JOIN Chauffeur C ON V.id_chauffeur = C.id_chauffeur
-""", sqlite_conn)
-
-reseau_docs = []
-
-# itération par ligne de transport
-for _, row_ligne in df_lignes.iterrows():
-    id_ligne = int(row_ligne['id_ligne'])
-    
-    # récupération des arrêts associés à la ligne
-    arrets_subset = df_arrets[df_arrets['id_ligne'] == id_ligne]
-    liste_arrets = []
-    for _, arr in arrets_subset.iterrows():
-        id_arret = int(arr['id_arret'])
+def construire_docs_reseau(df_lignes, df_arrets, df_vehicules, map_arret_quartiers):
+    """
+    construction vectorisée des documents lignes avec arrêts et véhicules imbriqués
+
+    les arrêts et véhicules sont convertis en une fois puis répartis par ligne
+    en une seule passe, au lieu d'un filtrage du dataframe pour chaque ligne.
+
+    Args:
+        df_lignes (pd.DataFrame): table Ligne
+        df_arrets (pd.DataFrame): table Arret
+        df_vehicules (pd.DataFrame): table Vehicule jointe aux chauffeurs
+        map_arret_quartiers (dict): id_arret -> liste des id_quartier
+
+    Returns:
+        list: documents Reseau
+    """
+    # arrêts rattachés à aucune ligne : absents du réseau
+    df_arrets = df_arrets[df_arrets['id_ligne'].notnull()]
+    ids_arrets = df_arrets['id_arret'].astype(int)
+    arrets = pd.DataFrame({
+        "id_arret": ids_arrets,
+        "nom": df_arrets['nom'].astype(str),
+        "localisation": points_geojson(df_arrets['longitude'], df_arrets['latitude']),
         # récupération des ids quartiers via un dictionnaire
-        quartiers_ids = map_arret_quartiers.get(id_arret, [])
-        
-        liste_arrets.append({
-            "id_arret": id_arret,
-            "nom": str(arr['nom']),
-            "localisation": {
-                "type": "Point",
-                "coordinates": [float(arr['longitude']), float(arr['latitude'])]
-            },
-            "quartiers_ids": quartiers_ids
-        })
-
-    # récupération des véhicules associés à la ligne
-    vehicules_subset = df_vehicules[df_vehicules['id_ligne'] == id_ligne]
-    liste_vehicules = []
-    for _, veh in vehicules_subset.iterrows():
-        liste_vehicules.append({
-            "id_vehicule": int(veh['id_vehicule']),
-            "immatriculation": str(veh['immatriculation']),
-            "type_vehicule": str(veh['type_vehicule']),
-            "capacite": int(veh['capacite']),
-            "chauffeur": {
-                "id": int(veh['id_chauffeur']) if pd.notnull(veh['id_chauffeur']) else None,
-                "nom": str(veh['nom_chauffeur']) if pd.notnull(veh['nom_chauffeur']) else "Inconnu",
-                "date_embauche": str(veh['date_embauche'])
-            }
-        })
-
-    # assemblage document ligne
-    doc = {
-        "_id": id_ligne,
-        "nom_ligne": str(row_ligne['nom_ligne']),
-        "type": str(row_ligne['type']),
-        "frequentation_moyenne": float(row_ligne['frequentation_moyenne']),
-        "arrets": liste_arrets,
-        "vehicules": liste_vehicules
-    }
-    reseau_docs.append(doc)
+        "quartiers_ids": [map_arret_quartiers.get(aid, []) for aid in ids_arrets.tolist()]
+    }).to_dict(orient='records')
+    arrets_par_ligne = grouper_records(df_arrets['id_ligne'].astype(int).tolist(), arrets)
+
+    # sous-document chauffeur construit colonne par colonne
+    chauffeurs = [
+        {
+            "id": int(cid) if pd.notnull(cid) else None,
+            "nom": str(nom) if pd.notnull(nom) else "Inconnu",
+            "date_embauche": str(date)
+        }
+        for cid, nom, date in zip(df_vehicules['id_chauffeur'], df_vehicules['nom_chauffeur'], df_vehicules['date_embauche'])
+    ]
+    vehicules = pd.DataFrame({
+        "id_vehicule": df_vehicules['id_vehicule'].astype(int),
+        "immatriculation": df_vehicules['immatriculation'].astype(str),
+        "type_vehicule": df_vehicules['type_vehicule'].astype(str),
+        "capacite": df_vehicules['capacite'].astype(int),
+        "chauffeur": chauffeurs
+    }).to_dict(orient='records')
+    vehicules_par_ligne = grouper_records(df_vehicules['id_ligne'].tolist(), vehicules)
+
+    # assemblage documents lignes
+    docs = pd.DataFrame({
+        "_id": df_lignes['id_ligne'].astype(int),
+        "nom_ligne": df_lignes['nom_ligne'].astype(str),
+        "type": df_lignes['type'].astype(str),
+        "frequentation_moyenne": df_lignes['frequentation_moyenne'].astype(float)
+    }).to_dict(orient='records')
+    for doc in docs:
+        doc["arrets"] = arrets_par_ligne.get(doc["_id"], [])
+        doc["vehicules"] = vehicules_par_ligne.get(doc["_id"], [])
+    return docs
 
-if reseau_docs:
-    db.Reseau.insert_many(reseau_docs)
-    print(f"{len(reseau_docs)} Lignes insérées.")
+def migrer_reseau(config, map_arret_quartiers):
+    """
+    migration des tables Ligne, Arret, Vehicule et Chauffeur vers la collection Reseau
+
+    Args:
+        config (dict): configuration de migration
+        map_arret_quartiers (dict): résultat de la tâche de liaison arrêt -> quartiers
+
+    Returns:
+        Counter: documents écrits, en échec et réessayés
+    """
+    print("--- Migration : Reseau ---")
+    sqlite_conn, client, db = ouvrir_connexions(config)
+    df_lignes = pd.read_sql_query("SELECT * FROM Ligne", sqlite_conn)
+    df_arrets = pd.read_sql_query("SELECT * FROM Arret", sqlite_conn)
+    # récupération des véhicules avec les infos chauffeur
+    df_vehicules = pd.read_sql_query("""
+        SELECT V.*, C.nom as nom_chauffeur, C.date_embauche
+        FROM Vehicule V
+        LEFT JOIN Chauffeur C ON V.id_chauffeur = C.id_chauffeur
+    """, sqlite_conn)
+
+    reseau_docs = construire_docs_reseau(df_lignes, df_arrets, df_vehicules, map_arret_quartiers)
+    compteurs = ecrire_par_lots(db.Reseau, reseau_docs, config)
+    sqlite_conn.close()
+    client.close()
+    print(f"{compteurs['ecrits']} Lignes insérées.")
+    return compteurs
 
 # ==============================================================================
 # 5. Collection : TraficEvents (Trafic + Incidents)
 # ==============================================================================
-print("--- Migration : TraficEvents ---")
-
-# jointure trafic et incidents
-df_trafic = pd.read_sql_query("""
+# jointure trafic et incidents sur une plage d'id_trafic, triée pour que les incidents
+# d'un même trafic soient contigus (incidents limités à la high-water mark courante)
+query_trafic = """
     SELECT T.*, I.id_incident, I.description, I.gravite, I.horodatage as incident_time
     FROM Trafic T
-    LEFT JOIN Incident I ON T.id_trafic = I.id_trafic
-""", sqlite_conn)
+    LEFT JOIN Incident I ON T.id_trafic = I.id_trafic AND I.id_incident <= ?
+    WHERE T.id_trafic >= ? AND T.id_trafic < ?
+    ORDER BY T.id_trafic, I.id_incident
+"""
 
-trafic_docs = []
+# nouveaux incidents rattachés à des trafics déjà migrés (mode incrémental)
+query_incidents_tardifs = """
+    SELECT I.id_trafic, I.id_incident, I.description, I.gravite, I.horodatage as incident_time
+    FROM Incident I
+    WHERE I.id_incident > ? AND I.id_incident <= ? AND I.id_trafic <= ?
+"""
 
-# regroupement par événement trafic
-for id_trafic, group in df_trafic.groupby("id_trafic"):
-    first = group.iloc[0]
+def construire_incidents(df_inc):
+    """
+    construction vectorisée des sous-documents incidents, regroupés par trafic
 
-    try:
-        trafic_time = pd.to_datetime(first['horodatage'])
-    except:
-        trafic_time = None
-    
-    doc = {
-        "_id": int(first['id_trafic']),
-        "id_ligne": int(first['id_ligne']),
-        "horodatage": trafic_time,
-        "retard_minutes": int(first['retard_minutes']),
-        "evenement": str(first['evenement']),
-        "incidents": []
-    }
-    
-    # ajout liste incidents imbriqués
-    for _, row in group.iterrows():
-        if pd.notnull(row['id_incident']):
-            try:
-                inc_time = pd.to_datetime(row['incident_time'])
-            except:
-                inc_time = None
-
-            doc['incidents'].append({
-                "id_incident": int(row['id_incident']),
-                "description": str(row['description']),
-                "gravite": int(row['gravite']) if pd.notnull(row['gravite']) else 1,
-                "heure": inc_time
-            })
-            
-    trafic_docs.append(doc)
-
-if trafic_docs:
-    db.TraficEvents.insert_many(trafic_docs)
-    # index sur id_ligne pour requêtes fréquentes
-    db.TraficEvents.create_index("id_ligne")
-    print(f"{len(trafic_docs)} Evénements trafic insérés.")
+    Args:
+        df_inc (pd.DataFrame): lignes d'incidents (id_trafic, id_incident, description, gravite, incident_time)
+
+    Returns:
+        dict: id_trafic -> liste des incidents
+    """
+    incidents = pd.DataFrame({
+        "id_incident": df_inc['id_incident'].astype(int),
+        "description": df_inc['description'].astype(str),
+        "gravite": df_inc['gravite'].fillna(1).astype(int),
+        "heure": dates_ou_none(df_inc['incident_time'])
+    }).to_dict(orient='records')
+    return grouper_records(df_inc['id_trafic'].astype(int).tolist(), incidents)
+
+def construire_docs_trafic(df_trafic):
+    """
+    construction vectorisée des documents trafic avec leurs incidents imbriqués
+
+    Args:
+        df_trafic (pd.DataFrame): lignes de la jointure Trafic / Incident
+
+    Returns:
+        list: documents TraficEvents
+    """
+    # conversion en bloc des incidents puis répartition par trafic
+    incidents_par_trafic = construire_incidents(df_trafic[df_trafic['id_incident'].notnull()])
+
+    # une ligne par événement trafic
+    df_evt = df_trafic.drop_duplicates('id_trafic')
+    docs = pd.DataFrame({
+        "_id": df_evt['id_trafic'].astype(int),
+        "id_ligne": df_evt['id_ligne'].astype(int),
+        "horodatage": dates_ou_none(df_evt['horodatage']),
+        "retard_minutes": df_evt['retard_minutes'].astype(int),
+        "evenement": df_evt['evenement'].astype(str)
+    }).to_dict(orient='records')
+    for doc in docs:
+        doc["incidents"] = incidents_par_trafic.get(doc["_id"], [])
+    return docs
+
+def generer_trafic_docs(sqlite_conn, plage, max_incident, chunksize=CHUNK_SIZE):
+    """
+    générateur de documents trafic lus par blocs
+
+    le dernier id_trafic d'un bloc peut avoir des incidents dans le bloc suivant :
+    ses lignes sont donc reportées et traitées avec le bloc suivant.
+
+    Args:
+        sqlite_conn (sqlite3.Connection): connexion sqlite source
+        plage (tuple): bornes (incluse, exclue) d'id_trafic
+        max_incident (int): dernier id_incident pris en compte
+        chunksize (int): nombre de lignes par bloc
+
+    Yields:
+        dict: document TraficEvents
+    """
+    reste = None
+    for bloc in lire_par_blocs(query_trafic, sqlite_conn, chunksize, (max_incident, *plage)):
+        # plage sans ligne (trou dans les id_trafic) : un bloc vide est lu
+        if bloc.empty:
+            continue
+        if reste is not None:
+            bloc = pd.concat([reste, bloc], ignore_index=True)
+        dernier_id = bloc['id_trafic'].iloc[-1]
+        reste = bloc[bloc['id_trafic'] == dernier_id]
+        yield from construire_docs_trafic(bloc[bloc['id_trafic'] != dernier_id])
+    if reste is not None and not reste.empty:
+        yield from construire_docs_trafic(reste)
+
+def migrer_trafic(config, plage):
+    """
+    migration d'une plage d'id_trafic vers la collection TraficEvents
+
+    Args:
+        config (dict): configuration de migration
+        plage (tuple): bornes (incluse, exclue) d'id_trafic
+
+    Returns:
+        Counter: documents écrits, en échec et réessayés
+    """
+    print(f"--- Migration : TraficEvents {plage} ---")
+    sqlite_conn, client, db = ouvrir_connexions(config)
+    max_incident = config["marques"]["Incident"][1]
+    docs = generer_trafic_docs(sqlite_conn, plage, max_incident, config["chunk_size"])
+    # incidents comptés au fil de l'écriture (kpis), rapportés avec les compteurs
+    cumuls = Counter()
+    compteurs = ecrire_par_lots(db.TraficEvents, cumuler_trafic(docs, cumuls), config)
+    compteurs.update(cumuls)
+    sqlite_conn.close()
+    client.close()
+    return compteurs
+
+def compter_incidents(db, ids_trafics, depuis, jusqu_a):
+    """
+    nombre d'incidents d'une plage d'id_incident présents dans des trafics donnés
+
+    Args:
+        db (pymongo.database.Database): base mongodb cible
+        ids_trafics (list): trafics complétés (lus par _id)
+        depuis (int): borne exclue d'id_incident
+        jusqu_a (int): borne incluse d'id_incident
+
+    Returns:
+        int: incidents effectivement présents dans la collection
+    """
+    if not ids_trafics:
+        return 0
+    dans_plage = {"$and": [{"$gt": ["$$this.id_incident", depuis]}, {"$lte": ["$$this.id_incident", jusqu_a]}]}
+    resultat = list(db.TraficEvents.aggregate([
+        {"$match": {"_id": {"$in": ids_trafics}}},
+        {"$project": {"nb": {"$size": {"$filter": {"input": {"$ifNull": ["$incidents", []]}, "cond": dans_plage}}}}},
+        {"$group": {"_id": None, "nb": {"$sum": "$nb"}}}
+    ]))
+    return resultat[0]["nb"] if resultat else 0
+
+def migrer_incidents_tardifs(config):
+    """
+    ajout des nouveaux incidents aux trafics déjà présents dans TraficEvents
+
+    $addToSet rend l'opération rejouable sans doublon si une migration est interrompue.
+    les incidents de la plage (kpis) sont ensuite comptés dans les trafics complétés :
+    ceux déjà ajoutés par une migration interrompue ne sont pas comptés deux fois.
+
+    Args:
+        config (dict): configuration de migration
+
+    Returns:
+        Counter: documents trafic mis à jour, en échec et réessayés, incidents de la plage
+    """
+    print("--- Migration : incidents tardifs ---")
+    sqlite_conn, client, db = ouvrir_connexions(config)
+    depuis, jusqu_a = config["marques"]["Incident"]
+    dernier_trafic = config["marques"]["Trafic"][0]
+    params = (depuis, jusqu_a, dernier_trafic)
+
+    ids_trafics = set()
+
+    def operations_incidents():
+        for df_inc in lire_par_blocs(query_incidents_tardifs, sqlite_conn, config["chunk_size"], params):
+            for id_trafic, incidents in construire_incidents(df_inc).items():
+                ids_trafics.add(id_trafic)
+                maj = {"$addToSet": {"incidents": {"$each": incidents}}}
+                yield pymongo.UpdateOne({"_id": id_trafic}, maj), maj
+
+    compteurs = ecrire_en_masse(db.TraficEvents, operations_incidents(), config)
+    compteurs["nb_incidents"] = compter_incidents(db, sorted(ids_trafics), depuis, jusqu_a)
+    sqlite_conn.close()
+    client.close()
+    print(f"{compteurs['nb_incidents']} incidents tardifs ajoutés.")
+    return compteurs
 
 # ==============================================================================
 # 6. Collection : Mesures (IoT - Capteurs)
 # ==============================================================================
-print("--- Migration : Mesures ---")
-
-# récupération des mesures avec coordonnées capteur
+# récupération des mesures avec coordonnées capteur sur une plage de rowid
 query_mesures = """
-    SELECT M.valeur, M.horodatage, M.unite, 
+    SELECT M.rowid AS id_mesure, M.valeur, M.horodatage, M.unite,
         C.id_capteur, C.type_capteur, C.latitude, C.longitude, C.id_arret
     FROM Mesure M
     JOIN Capteur C ON M.id_capteur = C.id_capteur
+    WHERE M.rowid >= ? AND M.rowid < ?
 """
-df_mesures = pd.read_sql_query(query_mesures, sqlite_conn)
 
-mesures_docs = []
-for _, row in df_mesures.iterrows():
-    # gestion de typage de valeur (int/float/str)
-    try:
-        val = float(row['valeur'])
-    except:
-        val = str(row['valeur'])
-
-    doc = {
-        "date": pd.to_datetime(row['horodatage']),
-        "valeur": val,
-        "unite": str(row['unite']),
-        "type_capteur": str(row['type_capteur']),
-        "id_capteur": int(row['id_capteur']),
-        "id_arret": int(row['id_arret']),
-        "localisation": {
-            "type": "Point",
-            "coordinates": [float(row['longitude']), float(row['latitude'])]
-        }
+def construire_docs_mesures(df_mesures, denormalisation=None, serie_temporelle=False):
+    """
+    construction vectorisée des documents mesures
+
+    Args:
+        df_mesures (pd.DataFrame): bloc de la jointure Mesure / Capteur
+        denormalisation (dict): correspondances arrêt -> ligne / quartiers à recopier (optionnel)
+        serie_temporelle (bool): champs du capteur regroupés dans le metaField
+
+    Returns:
+        list: documents Mesures
+    """
+    # gestion de typage de valeur : numérique si possible, texte sinon, None si absente
+    valeurs_num = pd.to_numeric(df_mesures['valeur'], errors='coerce')
+    valeurs = valeurs_num.astype(object).where(valeurs_num.notnull(), None)
+    non_numeriques = valeurs_num.isnull() & df_mesures['valeur'].notnull()
+    valeurs[non_numeriques] = df_mesures.loc[non_numeriques, 'valeur'].astype(str)
+
+    colonnes = {
+        # clé de la ligne source : relance d'une migration incrémentale sans doublon
+        "id_mesure": df_mesures['id_mesure'].astype(int),
+        "date": dates_ou_none(df_mesures['horodatage']),
+        "valeur": valeurs,
+        "unite": df_mesures['unite'].astype(str),
+        "type_capteur": df_mesures['type_capteur'].astype(str),
+        "id_capteur": df_mesures['id_capteur'].astype(int),
+        "id_arret": df_mesures['id_arret'].astype(int),
+        "localisation": points_geojson(df_mesures['longitude'], df_mesures['latitude'])
     }
-    mesures_docs.append(doc)
+    if denormalisation is not None:
+        # ligne et quartiers de l'arrêt du capteur : plus de $lookup vers Reseau à la lecture
+        ids_arrets = colonnes["id_arret"].tolist()
+        lignes = [denormalisation["lignes"].get(id_arret) for id_arret in ids_arrets]
+        colonnes["id_ligne"] = pd.Series(lignes, index=df_mesures.index, dtype=object)
+        colonnes["quartiers_ids"] = pd.Series(
+            [denormalisation["quartiers"].get(id_arret, []) for id_arret in ids_arrets],
+            index=df_mesures.index, dtype=object
+        )
+    if serie_temporelle:
+        # un bucket par capteur : tous les champs constants du capteur vont dans le metaField
+        champs = [champ for champ in CHAMPS_CAPTEUR if champ in colonnes]
+        meta = pd.DataFrame({champ: colonnes.pop(champ) for champ in champs}).to_dict(orient='records')
+        colonnes[META_MESURES] = pd.Series(meta, index=df_mesures.index, dtype=object)
+    return pd.DataFrame(colonnes).to_dict(orient='records')
+
+def generer_mesures_docs(sqlite_conn, plage, chunksize=CHUNK_SIZE, denormalisation=None, serie_temporelle=False):
+    """
+    générateur de documents mesures lus par blocs
+
+    Args:
+        sqlite_conn (sqlite3.Connection): connexion sqlite source
+        plage (tuple): bornes (incluse, exclue) de rowid
+        chunksize (int): nombre de lignes par bloc
+        denormalisation (dict): correspondances arrêt -> ligne / quartiers (optionnel)
+        serie_temporelle (bool): documents au format de la collection de séries temporelles
+
+    Yields:
+        dict: document Mesures
+    """
+    for df_mesures in lire_par_blocs(query_mesures, sqlite_conn, chunksize, plage):
+        yield from construire_docs_mesures(df_mesures, denormalisation, serie_temporelle)
 
-if mesures_docs:
-    db.Mesures.insert_many(mesures_docs)
-    # index pour requêtes géospatiales et par arrêt
-    db.Mesures.create_index([("localisation", "2dsphere")])
-    db.Mesures.create_index("id_arret")
-    print(f"{len(mesures_docs)} Mesures insérées.")
+def migrer_mesures(config, plage, denormalisation=None):
+    """
+    migration d'une plage de rowid de Mesure vers la collection Mesures
+
+    Args:
+        config (dict): configuration de migration
+        plage (tuple): bornes (incluse, exclue) de rowid
+        denormalisation (dict): résultat de la tâche de dénormalisation (optionnel)
+
+    Returns:
+        Counter: documents écrits, en échec et réessayés
+    """
+    print(f"--- Migration : Mesures {plage} ---")
+    sqlite_conn, client, db = ouvrir_connexions(config)
+    docs = generer_mesures_docs(
+        sqlite_conn, plage, config["chunk_size"], denormalisation, config["serie_temporelle"] is not None
+    )
+    cumuls = Counter()
+    docs = cumuler_mesures(docs, cumuls)
+    if not config["incremental"]:
+        operations = operations_insertion(docs)
+    elif config["serie_temporelle"] is None:
+        # une relance depuis la même high-water mark remplace les mesures déjà écrites
+        operations = operations_upsert(docs, "id_mesure")
+    else:
+        # pas d'upsert en série temporelle : les mesures de la plage déjà écrites par
+        # une migration interrompue sont supprimées avant leur réinsertion
+        db.Mesures.delete_many({"id_mesure": {"$gte": plage[0], "$lt": plage[1]}})
+        operations = operations_insertion(docs)
+    compteurs = ecrire_en_masse(db.Mesures, operations, config)
+    compteurs.update(cumuls)
+    sqlite_conn.close()
+    client.close()
+    return compteurs
 
 # ==============================================================================
 # 7. Collection : Horaires
 # ==============================================================================
-print("--- Migration : Horaires ---")
-
-# chargement des données avec id_ligne
+# chargement des données avec id_ligne sur une plage d'id_horaire
 query_horaires = """
-    SELECT H.id_horaire, H.id_arret, H.id_vehicule, H.heure_prevue, 
-           H.heure_effective, H.passagers_estimes, V.id_ligne 
+    SELECT H.id_horaire, H.id_arret, H.id_vehicule, H.heure_prevue,
+           H.heure_effective, H.passagers_estimes, V.id_ligne
     FROM Horaire H
     JOIN Vehicule V ON H.id_vehicule = V.id_vehicule
+    WHERE H.id_horaire >= ? AND H.id_horaire < ?
 """
-df_horaires = pd.read_sql_query(query_horaires, sqlite_conn)
 
-# conversion vectorisée des dates (optimisation performance)
-df_horaires['heure_prevue'] = pd.to_datetime(df_horaires['heure_prevue'], errors='coerce')
-df_horaires['heure_effective'] = pd.to_datetime(df_horaires['heure_effective'], errors='coerce')
+def construire_docs_horaires(df_horaires):
+    """
+    construction vectorisée des documents horaires
+
+    Args:
+        df_horaires (pd.DataFrame): bloc de la jointure Horaire / Vehicule
+
+    Returns:
+        list: documents Horaires
+    """
+    # conversion vectorisée des dates, NaT remplacé par None pour compatibilité json
+    df_horaires['heure_prevue'] = dates_ou_none(df_horaires['heure_prevue'])
+    df_horaires['heure_effective'] = dates_ou_none(df_horaires['heure_effective'])
+
+    # renommage clé primaire pour mongodb
+    df_horaires = df_horaires.rename(columns={'id_horaire': '_id'})
+
+    # conversion directe dataframe vers liste dictionnaires
+    return df_horaires.to_dict(orient='records')
+
+def generer_horaires_docs(sqlite_conn, plage, chunksize=CHUNK_SIZE):
+    """
+    générateur de documents horaires lus par blocs
+
+    Args:
+        sqlite_conn (sqlite3.Connection): connexion sqlite source
+        plage (tuple): bornes (incluse, exclue) d'id_horaire
+        chunksize (int): nombre de lignes par bloc
+
+    Yields:
+        dict: document Horaires
+    """
+    for df_horaires in lire_par_blocs(query_horaires, sqlite_conn, chunksize, plage):
+        yield from construire_docs_horaires(df_horaires)
+
+# totaux journaliers d'un bucket, recalculés à partir de ses passages
+TOTAUX_BUCKET = {
+    "nb_passages": {"$size": "$passages"},
+    "passagers_total": {"$sum": "$passages.passagers_estimes"},
+    "nb_effectifs": {"$size": {"$filter": {
+        "input": "$passages",
+        "cond": {"$ne": [{"$ifNull": ["$$this.heure_effective", None]}, None]}
+    }}},
+    "nb_ponctuels": {"$size": {"$filter": {
+        "input": "$passages",
+        "cond": {"$and": [
+            {"$ne": [{"$ifNull": ["$$this.heure_effective", None]}, None]},
+            {"$lte": ["$$this.heure_effective", "$$this.heure_prevue"]}
+        ]}
+    }}},
+}
+
+def construire_buckets_horaires(df_horaires):
+    """
+    regroupement vectorisé des passages d'un bloc par véhicule et par jour effectif
 
-# renommage clé primaire pour mongodb
-df_horaires = df_horaires.rename(columns={'id_horaire': '_id'})
+    un même bucket peut recevoir des passages de plusieurs blocs ou plages : chaque
+    bloc produit donc une mise à jour partielle du bucket.
 
-# remplacement des valeurs NaT par None pour compatibilité json
-df_horaires['heure_prevue'] = df_horaires['heure_prevue'].astype(object).where(df_horaires['heure_prevue'].notnull(), None)
-df_horaires['heure_effective'] = df_horaires['heure_effective'].astype(object).where(df_horaires['heure_effective'].notnull(), None)
+    Args:
+        df_horaires (pd.DataFrame): bloc de la jointure Horaire / Vehicule
 
-# conversion directe dataframe vers liste dictionnaires
-horaires_docs = df_horaires.to_dict(orient='records')
+    Returns:
+        list: tuples (_id du bucket, id_ligne, passages du bloc)
+    """
+    jours = dates_ou_none(pd.to_datetime(df_horaires['heure_effective'], errors='coerce').dt.normalize())
+    vehicules = df_horaires['id_vehicule'].astype(int).tolist()
+    passages = pd.DataFrame({
+        "id_horaire": df_horaires['id_horaire'].astype(int),
+        "id_arret": df_horaires['id_arret'].astype(int),
+        "heure_prevue": dates_ou_none(df_horaires['heure_prevue']),
+        "heure_effective": dates_ou_none(df_horaires['heure_effective']),
+        "passagers_estimes": df_horaires['passagers_estimes']
+    }).to_dict(orient='records')
+    ligne_par_vehicule = dict(zip(vehicules, df_horaires['id_ligne'].astype(int).tolist()))
+    groupes = grouper_records(list(zip(vehicules, jours.tolist())), passages)
+    return [
+        ({"id_vehicule": vehicule, "jour": jour}, ligne_par_vehicule[vehicule], passages_bucket)
+        for (vehicule, jour), passages_bucket in groupes.items()
+    ]
 
-if horaires_docs:
-    db.Horaires.insert_many(horaires_docs)
-    db.Horaires.create_index("id_ligne")
-    print(f"{len(horaires_docs)} Horaires insérés.")
+def operation_bucket(cle, id_ligne, passages):
+    """
+    mise à jour idempotente d'un bucket : ajout des passages absents puis recalcul des totaux
+
+    Args:
+        cle (dict): _id du bucket (id_vehicule, jour)
+        id_ligne (int): ligne du véhicule
+        passages (list): passages à ajouter
+
+    Returns:
+        tuple: (opération pymongo, mise à jour utilisée pour la taille du lot)
+    """
+    deja_presents = {"$ifNull": ["$passages.id_horaire", []]}
+    maj = [
+        {"$set": {
+            "id_vehicule": cle["id_vehicule"],
+            "id_ligne": id_ligne,
+            "jour": cle["jour"],
+            "passages": {"$concatArrays": [
+                {"$ifNull": ["$passages", []]},
+                {"$filter": {
+                    "input": {"$literal": passages},
+                    "cond": {"$not": [{"$in": ["$$this.id_horaire", deja_presents]}]}
+                }}
+            ]}
+        }},
+        {"$set": TOTAUX_BUCKET},
+    ]
+    return pymongo.UpdateOne({"_id": cle}, maj, upsert=True), {"_id": cle, "maj": maj}
+
+def generer_operations_buckets(sqlite_conn, plage, chunksize=CHUNK_SIZE):
+    """
+    générateur des mises à jour de buckets horaires lues par blocs
+
+    Args:
+        sqlite_conn (sqlite3.Connection): connexion sqlite source
+        plage (tuple): bornes (incluse, exclue) d'id_horaire
+        chunksize (int): nombre de lignes par bloc
+
+    Yields:
+        tuple: (opération pymongo, mise à jour)
+    """
+    for df_horaires in lire_par_blocs(query_horaires, sqlite_conn, chunksize, plage):
+        for cle, id_ligne, passages in construire_buckets_horaires(df_horaires):
+            yield operation_bucket(cle, id_ligne, passages)
+
+def migrer_horaires(config, plage):
+    """
+    migration d'une plage d'id_horaire vers la collection Horaires
+
+    Args:
+        config (dict): configuration de migration
+        plage (tuple): bornes (incluse, exclue) d'id_horaire
+
+    Returns:
+        Counter: documents écrits, en échec et réessayés
+    """
+    print(f"--- Migration : Horaires {plage} ---")
+    sqlite_conn, client, db = ouvrir_connexions(config)
+    if config["buckets_horaires"]:
+        # buckets partagés entre plages et blocs : mises à jour upsert rejouables
+        operations = generer_operations_buckets(sqlite_conn, plage, config["chunk_size"])
+    else:
+        # lignes déjà présentes (relance d'une migration interrompue) : doublons comptés comme écrits
+        operations = operations_insertion(generer_horaires_docs(sqlite_conn, plage, config["chunk_size"]))
+    compteurs = ecrire_en_masse(db.Horaires, operations, config)
+    sqlite_conn.close()
+    client.close()
+    return compteurs
 
 # ==============================================================================
-# Rapport final de la migration de chaque collection
+# 8. Ordonnanceur : graphe de dépendances des tâches de migration
 # ==============================================================================
-print("\n--- RAPPORT ---")
-# Comptage des documents par collection
-for col in ["Reseau", "TraficEvents", "Quartiers", "Mesures", "Horaires"]:
-    count = db[col].count_documents({})
-    print(f"Collection {col:<15} : {count:>6} documents")
-
-# Test requête géospatiale (paris centre)
-test_geo = db.Quartiers.find_one({
-    "geometry": {
-        "$geoIntersects": {
-            "$geometry": { "type": "Point", "coordinates": [2.3522, 48.8566] }
-        }
+# nom -> (fonction, dépendances, partitionnement (table, clé) ou None)
+# seule la collection Reseau dépend du pré-traitement Arret-Quartier
+PLAN_MIGRATION = {
+    "Liaisons": (charger_liaisons, [], None),
+    "Quartiers": (migrer_quartiers, [], None),
+    "Reseau": (migrer_reseau, ["Liaisons"], None),
+    "TraficEvents": (migrer_trafic, [], ("Trafic", "id_trafic")),
+    "Mesures": (migrer_mesures, [], ("Mesure", "rowid")),
+    "Horaires": (migrer_horaires, [], ("Horaire", "id_horaire")),
+}
+
+def construire_plan(config):
+    """
+    plan de migration selon le mode (complet ou incrémental)
+
+    Args:
+        config (dict): configuration de migration
+
+    Returns:
+        dict: plan transmis à executer_plan
+    """
+    plan = dict(PLAN_MIGRATION)
+    if config["denormalisation"]:
+        plan["Denormalisation"] = (charger_denormalisation, ["Liaisons"], None)
+        plan["Mesures"] = (migrer_mesures, ["Denormalisation"], PLAN_MIGRATION["Mesures"][2])
+    if config["incremental"]:
+        plan["IncidentsTardifs"] = (migrer_incidents_tardifs, [], None)
+    return plan
+
+# ==============================================================================
+# 9. High-water marks (migration incrémentale)
+# ==============================================================================
+def lire_marques_sqlite(config):
+    """
+    lecture de la valeur maximale actuelle de chaque colonne de high-water mark
+
+    Args:
+        config (dict): configuration de migration
+
+    Returns:
+        dict: table -> valeur maximale (None si table vide)
+    """
+    sqlite_conn = connecter(config["sqlite_path"])
+    marques = {
+        table: sqlite_conn.execute(f"SELECT MAX({cle}) FROM {table}").fetchone()[0]
+        for table, cle in MARQUES_TABLES.items()
+    }
+    sqlite_conn.close()
+    return marques
+
+def lire_marques_mongo(db):
+    """
+    lecture des high-water marks enregistrées lors de la dernière migration
+
+    Args:
+        db (pymongo.database.Database): base mongodb cible
+
+    Returns:
+        dict or None: table -> dernière valeur migrée, None si aucune migration
+    """
+    meta = db[META_COLLECTION].find_one({"_id": "high_water_marks"})
+    if meta is None:
+        return None
+    return {table: meta.get(table) for table in MARQUES_TABLES}
+
+def ecrire_marques(db, marques, incremental):
+    """
+    enregistrement des high-water marks à la fin d'une migration réussie
+
+    l'écriture est journalisée (j=True) : elle force la mise sur disque du journal
+    pour toutes les écritures du chargement effectuées sans journalisation.
+
+    Args:
+        db (pymongo.database.Database): base mongodb cible
+        marques (dict): table -> dernière valeur migrée
+        incremental (bool): mode de la migration terminée
+    """
+    meta = db[META_COLLECTION].with_options(write_concern=WriteConcern(w=WRITE_W, j=True))
+    meta.replace_one(
+        {"_id": "high_water_marks"},
+        {**marques, "date_migration": datetime.now(), "incremental": incremental},
+        upsert=True
+    )
+
+def options_schema(config):
+    """
+    options de modélisation de la configuration, telles qu'enregistrées dans MigrationMeta
+
+    Args:
+        config (dict): configuration de migration
+
+    Returns:
+        dict: options du schéma
+    """
+    return {
+        "denormalisation": config["denormalisation"],
+        "serie_temporelle": config["serie_temporelle"],
+        "rollups": config["rollups"],
+        "buckets_horaires": config["buckets_horaires"],
     }
-})
-print(f"Test Geo : Trouvé '{test_geo['nom']}'" if test_geo else "Test Geo : Aucun résultat")
 
-# fermeture des connexions
-sqlite_conn.close()
-client.close()
-print("\nFIN DE TRAITEMENT")
\ No newline at end of file
+def ecrire_schema(db, config):
+    """
+    enregistrement des options de modélisation utilisées par la migration
+
+    les requêtes (partie 3, dashboard) choisissent leurs pipelines selon ce document.
+
+    Args:
+        db (pymongo.database.Database): base mongodb cible
+        config (dict): configuration de migration
+    """
+    db[META_COLLECTION].replace_one({"_id": "schema"}, options_schema(config), upsert=True)
+
+def creer_collection_mesures(db, config):
+    """
+    création explicite de Mesures en collection de séries temporelles
+
+    Args:
+        db (pymongo.database.Database): base mongodb cible
+        config (dict): configuration de migration (granularité dans "serie_temporelle")
+    """
+    db.create_collection("Mesures", timeseries={
+        "timeField": "date",
+        "metaField": META_MESURES,
+        "granularity": config["serie_temporelle"],
+    })
+
+def plages_cles(config, table, cle):
+    """
+    découpage en plages contiguës de clé primaire des lignes à migrer
+
+    seules les lignes situées entre les high-water marks de la configuration
+    sont découpées (toute la table en migration complète).
+
+    Args:
+        config (dict): configuration de migration
+        table (str): table sqlite à découper
+        cle (str): colonne entière servant au découpage
+
+    Returns:
+        list: bornes (incluse, exclue) de chaque plage, vide si rien à migrer
+    """
+    sqlite_conn = connecter(config["sqlite_path"])
+    mini, maxi = sqlite_conn.execute(
+        f"SELECT MIN({cle}), MAX({cle}) FROM {table} WHERE {cle} > ? AND {cle} <= ?",
+        config["marques"][table]
+    ).fetchone()
+    sqlite_conn.close()
+    if mini is None:
+        return []
+    pas = (maxi - mini) // max(config["partitions"], 1) + 1
+    return [(borne, min(borne + pas, maxi + 1)) for borne in range(mini, maxi + 1, pas)]
+
+def executer_plan(plan, config):
+    """
+    exécution des tâches de migration dès que leurs dépendances sont terminées
+
+    les collections indépendantes tournent en parallèle et les grandes tables
+    sont réparties sur plusieurs workers par plages de clé primaire.
+
+    Args:
+        plan (dict): nom -> (fonction, dépendances, partitionnement)
+        config (dict): configuration de migration
+
+    Returns:
+        tuple: (résultat de chaque tâche, débit {nom: (nb documents, durée)})
+    """
+    pool_cls = ProcessPoolExecutor if config["executeur"] == "processus" else ThreadPoolExecutor
+    restants = dict(plan)
+    resultats = {}
+    debits = {}
+    en_cours = {}
+    # nom -> [nb de plages restantes, résultat cumulé, instant de début]
+    suivi = {}
+
+    with pool_cls(max_workers=config["workers"]) as pool:
+        while restants or en_cours:
+            prets = [nom for nom, (_, deps, _) in restants.items() if all(d in resultats for d in deps)]
+            if not prets and not en_cours:
+                raise ValueError(f"Dépendances impossibles à satisfaire : {list(restants)}")
+
+            for nom in prets:
+                fonction, deps, partition = restants.pop(nom)
+                args_deps = [resultats[d] for d in deps]
+                debut = time.perf_counter()
+                if partition is None:
+                    suivi[nom] = [1, None, debut]
+                    en_cours[pool.submit(fonction, config, *args_deps)] = nom
+                    continue
+                plages = plages_cles(config, *partition)
+                suivi[nom] = [len(plages), Counter(ecrits=0, echecs=0, reessais=0), debut]
+                if not plages:
+                    resultats[nom] = suivi[nom][1]
+                for plage in plages:
+                    en_cours[pool.submit(fonction, config, plage, *args_deps)] = nom
+
+            if not en_cours:
+                continue
+            termines, _ = wait(list(en_cours), return_when=FIRST_COMPLETED)
+            for future in termines:
+                nom = en_cours.pop(future)
+                resultat = future.result()
+                suivi[nom][0] -= 1
+                if plan[nom][2] is None:
+                    suivi[nom][1] = resultat
+                else:
+                    suivi[nom][1].update(resultat)
+                if suivi[nom][0] == 0:
+                    resultats[nom] = suivi[nom][1]
+                    if isinstance(resultats[nom], Counter):
+                        debits[nom] = (resultats[nom]["ecrits"], time.perf_counter() - suivi[nom][2])
+
+    return resultats, debits
+
+# ==============================================================================
+# Programme principal
+# ==============================================================================
+def lire_arguments():
+    """
+    lecture des options de la ligne de commande
+
+    Returns:
+        dict: configuration de migration
+    """
+    config = config_par_defaut()
+    parser = argparse.ArgumentParser(description="Migration Paris2055 SQLite -> MongoDB")
+    parser.add_argument("--workers", type=int, default=config["workers"], help="nombre de workers en parallèle")
+    parser.add_argument("--partitions", type=int, default=None, help="plages de clés par grande table (défaut : nombre de workers)")
+    parser.add_argument("--executeur", choices=["processus", "threads"], default=config["executeur"])
+    parser.add_argument("--chunk-size", type=int, default=config["chunk_size"], help="lignes sqlite lues par bloc")
+    parser.add_argument("--batch-size", type=int, default=config["batch_size"], help="documents par lot")
+    parser.add_argument("--batch-octets", type=int, default=config["batch_octets"], help="taille bson maximale d'un lot")
+    parser.add_argument("--w", default=str(config["w"]), help="write concern w (nombre ou 'majority')")
+    parser.add_argument("--journal", action="store_true", help="journaliser chaque lot (j=True)")
+    parser.add_argument("--en-vol", type=int, default=config["en_vol"], help="lots en cours d'envoi par collection")
+    parser.add_argument("--reessais", type=int, default=config["max_reessais"], help="réessais des erreurs transitoires")
+    parser.add_argument("--incremental", action="store_true", help="ne migrer que les lignes postérieures aux high-water marks")
+    parser.add_argument("--verifier-index", action="store_true", help="explain des requêtes de la partie 3 après création des index")
+    parser.add_argument("--index-source", action="store_true", help="créer les index de jointure manquants dans la base sqlite source")
+    parser.add_argument("--denormaliser", action="store_true", help="recopier id_ligne et quartiers_ids dans les documents Mesures")
+    parser.add_argument("--rollups", action="store_true", help="maintenir les agrégats pré-calculés par ligne/jour et par arrêt/capteur")
+    parser.add_argument("--buckets-horaires", action="store_true", help="un document Horaires par véhicule et par jour")
+    parser.add_argument("--serie-temporelle", choices=["seconds", "minutes", "hours"], default=None,
+                        help="créer Mesures en collection de séries temporelles avec cette granularité")
+    args = parser.parse_args()
+
+    config.update({
+        "workers": max(args.workers, 1),
+        "partitions": args.partitions or max(args.workers, 1),
+        "executeur": args.executeur,
+        "chunk_size": args.chunk_size,
+        "batch_size": args.batch_size,
+        "batch_octets": args.batch_octets,
+        "w": int(args.w) if args.w.isdigit() else args.w,
+        "j": args.journal,
+        "en_vol": max(args.en_vol, 1),
+        "max_reessais": args.reessais,
+        "incremental": args.incremental,
+        "verifier_index": args.verifier_index,
+        "index_source": args.index_source,
+        "denormalisation": args.denormaliser,
+        "serie_temporelle": args.serie_temporelle,
+        "rollups": args.rollups,
+        "buckets_horaires": args.buckets_horaires,
+    })
+    return config
+
+if __name__ == "__main__":
+    config = lire_arguments()
+    print("--- DÉBUT DE LA MIGRATION ---")
+
+    # seule écriture dans la base source, avant l'ouverture des connexions en lecture seule
+    if config["index_source"]:
+        crees = creer_index_source(config["sqlite_path"])
+        print(f"Index sqlite créés : {', '.join(crees) if crees else 'aucun (déjà présents)'}")
+
+    # connexions à la base de données sqlite et la bdd MongoDB
+    try:
+        sqlite_conn, client, db = ouvrir_connexions(config)
+        client.admin.command("ping")
+        print("Connexions établies.")
+    except Exception as e:
+        print(f"Erreur de connexion : {e}")
+        exit()
+
+    # bornes des lignes à migrer : de la dernière marque enregistrée à l'état actuel de la base
+    marques_actuelles = lire_marques_sqlite(config)
+    marques_precedentes = lire_marques_mongo(db) if config["incremental"] else None
+    if config["incremental"] and marques_precedentes is None:
+        print("Aucune high-water mark enregistrée : migration complète.")
+        config["incremental"] = False
+    # les documents déjà migrés doivent suivre le même schéma que les nouveaux
+    schema_precedent = lire_schema(db)
+    if config["incremental"] and any(schema_precedent.get(o) != config[o] for o in OPTIONS_DOCUMENTS):
+        print("Options de schéma différentes de la dernière migration : migration complète.")
+        config["incremental"] = False
+
+    if config["incremental"]:
+        config["marques"] = {
+            table: (marques_precedentes[table] if marques_precedentes[table] is not None else DEBUT_TABLE, maxi)
+            for table, maxi in marques_actuelles.items()
+        }
+        print(f"Migration incrémentale depuis : {marques_precedentes}")
+    else:
+        config["marques"] = {table: (DEBUT_TABLE, maxi) for table, maxi in marques_actuelles.items()}
+        # suppression anciennes collections pour repartir au propre
+        for col in COLLECTIONS:
+            db[col].drop()
+        if config["serie_temporelle"]:
+            creer_collection_mesures(db, config)
+
+    print(f"Ordonnanceur : {config['workers']} workers ({config['executeur']}), {config['partitions']} plages par grande table.")
+    resultats, debits = executer_plan(construire_plan(config), config)
+
+    # cumuls des seuls nouveaux documents si les rollups existent déjà, reconstruction sinon.
+    # une plage déjà cumulée par une migration interrompue avant ses marques n'est pas rajoutée
+    if config["rollups"]:
+        print("--- Agrégats pré-calculés (rollups) ---")
+        etat = "reconstruction"
+        if config["incremental"] and schema_precedent.get("rollups"):
+            etat = etat_rollups(db, config["marques"])
+        if etat == "a_jour":
+            print("Rollups déjà à jour pour ces plages.")
+            durees = {}
+        elif etat == "incremental":
+            durees = mettre_a_jour_rollups(db, options_schema(config), config["marques"])
+        else:
+            durees = reconstruire_rollups(db, options_schema(config), config["marques"])
+        for source, duree in durees.items():
+            print(f"Rollup {source:<15} : {duree:.2f} s")
+
+    # kpis du bandeau : cumuls des documents écrits, ajoutés aux précédents en incrémental
+    # (recalculés à partir des collections si des écritures ont échoué)
+    echecs = sum(r["echecs"] for r in resultats.values() if isinstance(r, Counter))
+    kpis = maj_kpis(db, cumuls_taches(resultats), marques_precedentes, marques_actuelles,
+                    config["incremental"], echecs)
+    print(f"KPIs : {kpis['nb_incidents']} incidents, {kpis['nb_co2']} mesures CO2")
+
+    # les marques ne sont enregistrées qu'une fois toutes les tâches terminées
+    ecrire_schema(db, config)
+    ecrire_marques(db, marques_actuelles, config["incremental"])
+
+    # phase d'index différée : plan d'index construit une seule fois après le chargement
+    print("--- Création des index ---")
+    for col, noms in creer_index(db, plan_pour_schema(options_schema(config))).items():
+        print(f"Index {col:<15} : {', '.join(noms)}")
+
+    # nouvelle version des données : les résultats en cache des versions précédentes sont invalidés
+    version = ecrire_version(db)
+    print(f"Version des données : {version}")
+    # contours simplifiés des quartiers pour la carte du dashboard, mis en cache pour cette version
+    print(f"GeoJSON quartiers : {len(geojson_quartiers(db, version).encode('utf-8')) / 1e3:.0f} ko")
+
+    if config["verifier_index"]:
+        print("--- Vérification des plans d'exécution (partie 3) ---")
+        for lettre, scans in verifier_plans(db, requetes_pour_schema(lire_schema(db))).items():
+            statut = "OK" if not scans else f"COLLSCAN sur {', '.join(scans)}"
+            print(f"Requete {lettre.upper()} : {statut}")
+
+    # ==============================================================================
+    # Rapport final de la migration de chaque collection
+    # ==============================================================================
+    print("\n--- RAPPORT ---")
+    # Comptage des documents par collection
+    for col in COLLECTIONS:
+        count = db[col].count_documents({})
+        print(f"Collection {col:<15} : {count:>6} documents")
+
+    # débit de migration par collection (construction + insertion)
+    for col, (nb, duree) in debits.items():
+        print(f"Débit {col:<15} : {nb / duree if duree > 0 else 0:>10.0f} lignes/s")
+
+    # bilan des écritures en masse
+    for col, compteurs in resultats.items():
+        if isinstance(compteurs, Counter):
+            print(f"Ecritures {col:<15} : {compteurs['ecrits']} écrits, {compteurs['echecs']} échecs, {compteurs['reessais']} réessais")
+
+    # Test requête géospatiale (paris centre)
+    test_geo = db.Quartiers.find_one({
+        "geometry": {
+            "$geoIntersects": {
+                "$geometry": { "type": "Point", "coordinates": [2.3522, 48.8566] }
+            }
+        }
+    })
+    print(f"Test Geo : Trouvé '{test_geo['nom']}'" if test_geo else "Test Geo : Aucun résultat")
+
+    # fermeture des connexions
+    sqlite_conn.close()
+    client.close()
+    print("\nFIN DE TRAITEMENT")
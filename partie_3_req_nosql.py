@@ -1,20 +1,32 @@
+import argparse
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import pymongo
+from pymongo.errors import ExecutionTimeout
+
+from cache_resultats import agreger_en_cache, lire_version
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # export parquet optionnel
+    pa = pq = None
+
+# requêtes exécutées simultanément (une connexion du pool du client par requête en cours)
+CONCURRENCE = 4
+# durée maximale côté serveur de chaque pipeline (None : sans limite)
+MAX_TIME_MS = None
+# documents par lot renvoyé par le curseur d'agrégation
+BATCH_SIZE_CURSEUR = 2000
+# lignes par row group des fichiers parquet
+TAILLE_GROUPE_PARQUET = 50000
 
 # configuration affichage pandas
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 1000)
 
-print("--- REQUÊTES MONGODB (PARTIE 3) CORRIGÉES ---")
-
-try:
-    client = pymongo.MongoClient("mongodb://localhost:27017/")
-    db = client["Paris2055"]
-    print("Connexion MongoDB établie.")
-except Exception as e:
-    print(f"Erreur : {e}")
-    exit()
-
 
 # a. Moyenne des retards par ligne -> regroupement par ligne et calcul moyenne
 req_a = [
@@ -42,11 +54,6 @@ req_a = [
     },
     { "$sort": { "retard_moyen": -1 } }
 ]
-df_a = pd.DataFrame(list(db.TraficEvents.aggregate(req_a)))
-df_a = df_a[['id_ligne', 'nom_ligne', 'retard_moyen']]
-df_a.to_csv("./csv/A_nosql.csv", index=False)
-print("\n--- A. Moyenne retards (Top 5) ---")
-print(df_a.head())
 
 
 # b. Passagers moyens par jour et par ligne -> somme par jour d'abord puis moyenne globale par ligne
@@ -84,11 +91,6 @@ req_b = [
     },
     { "$sort": { "passagers_moyens_par_jour": -1 } }
 ]
-df_b = pd.DataFrame(list(db.Horaires.aggregate(req_b)))
-df_b = df_b[['id_ligne', 'nom_ligne', 'passagers_moyens_par_jour']]
-df_b.to_csv("./csv/B_nosql.csv", index=False)
-print("\n--- B. Passagers moyens/jour (Top 5) ---")
-print(df_b.head())
 
 
 # c. Taux d'incident sur chaque ligne -> comptage conditionnel si tableau incidents non vide
@@ -117,10 +119,6 @@ req_c = [
     },
     { "$sort": { "taux_incident": -1, "nom_ligne": 1 } }
 ]
-df_c = pd.DataFrame(list(db.TraficEvents.aggregate(req_c)))
-df_c.to_csv("./csv/C_nosql.csv", index=False)
-print("\n--- C. Taux incident (Top 5) ---")
-print(df_c.head(9)) 
 
 
 # d. Emissions moyennes CO2 par véhicule -> jointure mesures co2 vers reseau pour lier aux véhicules
@@ -146,14 +144,9 @@ req_d = [
         }
     },
     
-    { "$sort": { "emission_moyenne_CO2": -1, "_id": -1 } }
+    { "$sort": { "emission_moyenne_CO2": -1, "_id": -1 } },
+    { "$project": { "id_vehicule": "$_id", "emission_moyenne_CO2": 1, "_id": 0 } }
 ]
-df_d = pd.DataFrame(list(db.Mesures.aggregate(req_d)))
-df_d.rename(columns={'_id': 'id_vehicule'}, inplace=True)
-df_d = df_d[['id_vehicule', 'emission_moyenne_CO2']]
-df_d.to_csv("./csv/D_nosql.csv", index=False)
-print("\n--- D. CO2 Véhicule (Top 9) ---")
-print(df_d.head(9))
 
 
 # e. Top 5 quartiers nuisances sonores -> jointure mesures bruit vers reseau puis quartiers
@@ -195,11 +188,6 @@ req_e = [
     { "$sort": { "bruit_moyen": -1 } },
     { "$limit": 5 }
 ]
-df_e = pd.DataFrame(list(db.Mesures.aggregate(req_e)))
-df_e = df_e[['nom', 'bruit_moyen']]
-df_e.to_csv("./csv/E_nosql.csv", index=False)
-print("\n--- E. Top Bruit Quartier ---")
-print(df_e)
 
 
 # f. Lignes sans incident mais retards > 10 min -> filtrage sur taille tableau incidents et retard
@@ -226,10 +214,6 @@ req_f = [
     { "$project": { "nom_ligne": "$_id", "_id": 0 } },
     { "$sort": { "nom_ligne": 1 } }
 ]
-df_f = pd.DataFrame(list(db.TraficEvents.aggregate(req_f)))
-df_f.to_csv("./csv/F_nosql.csv", index=False)
-print("\n--- F. Retards sans incident (Top 5) ---")
-print(df_f.head())
 
 
 # g. Taux de ponctualité global -> comptage total vs trajets sans retard
@@ -248,10 +232,6 @@ req_g = [
     },
     { "$project": { "taux_ponctualite": { "$divide": ["$ponctuel", "$total"] }, "_id": 0 } }
 ]
-df_g = pd.DataFrame(list(db.Horaires.aggregate(req_g)))
-df_g.to_csv("./csv/G_nosql.csv", index=False)
-print("\n--- G. Ponctualité ---")
-print(df_g)
 
 
 # h. Nombre d’arrêts par quartier -> décompte arrêts uniques par quartier via tableau imbriqué
@@ -282,15 +262,12 @@ req_h = [
     },
     { "$sort": { "nombre_arrets": -1, "id_quartier": 1 } } 
 ]
-df_h = pd.DataFrame(list(db.Reseau.aggregate(req_h)))
-df_h = df_h[['id_quartier', 'nom', 'nombre_arrets']]
-df_h.to_csv("./csv/H_nosql.csv", index=False)
-print("\n--- H. Arrêts par quartier (Top 9) ---")
-print(df_h.head(9))
 
 
-# i. Corrélation Trafic / Pollution -> calcul moyennes croisées retard et co2 par ligne
-req_i = [
+# i. Corrélation Trafic / Pollution -> version d'origine : tout le trafic de la ligne puis
+# un $lookup corrélé par arrêt, chaque mesure co2 déroulée avec le tableau trafic
+# (coût quadratique, conservée comme référence du banc d'essai "correlation")
+req_i_lookup = [
     {
         "$lookup": {
             "from": "TraficEvents",
@@ -331,16 +308,69 @@ req_i = [
     },
     { "$sort": { "indice_correlation": -1 } }
 ]
-df_i = pd.DataFrame(list(db.Reseau.aggregate(req_i)))
-df_i = df_i[['id_ligne', 'nom_ligne', 'retard_moyen', 'co2_moyen', 'indice_correlation']]
-df_i.to_csv("./csv/I_nosql.csv", index=False)
-print("\n--- I. Corrélation (Top 5) ---")
-print(df_i.head())
+
+
+# i. Corrélation Trafic / Pollution -> deux agrégations groupées jointes par ligne :
+# sommes co2 par arrêt puis par ligne, retard moyen calculé une fois par ligne
+req_i = [
+    { "$match": { "type_capteur": "CO2" } },
+    {
+        "$group": {
+            "_id": "$id_arret",
+            "somme_co2": { "$sum": "$valeur" },
+            # valeurs non numériques ignorées, comme par $avg
+            "nb_co2": { "$sum": { "$cond": [{ "$isNumber": "$valeur" }, 1, 0] } }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "arrets.id_arret",
+            "as": "ligne"
+        }
+    },
+    { "$unwind": "$ligne" },
+    {
+        "$group": {
+            "_id": "$ligne._id",
+            "nom_ligne": { "$first": "$ligne.nom_ligne" },
+            "somme_co2": { "$sum": "$somme_co2" },
+            "nb_co2": { "$sum": "$nb_co2" }
+        }
+    },
+    { "$match": { "nb_co2": { "$gt": 0 } } },
+    {
+        "$lookup": {
+            "from": "TraficEvents",
+            "localField": "_id",
+            "foreignField": "id_ligne",
+            "pipeline": [
+                { "$group": { "_id": None, "retard_moyen": { "$avg": "$retard_minutes" } } }
+            ],
+            "as": "trafic"
+        }
+    },
+    # jointure interne : lignes sans trafic écartées, comme en SQL
+    { "$unwind": "$trafic" },
+    {
+        "$project": {
+            "id_ligne": "$_id",
+            "nom_ligne": 1,
+            "retard_moyen": "$trafic.retard_moyen",
+            "co2_moyen": { "$divide": ["$somme_co2", "$nb_co2"] },
+            "_id": 0
+        }
+    },
+    { "$addFields": { "indice_correlation": { "$multiply": ["$retard_moyen", "$co2_moyen"] } } },
+    { "$sort": { "indice_correlation": -1 } }
+]
 
 
 # j. Moyenne de température par ligne -> filtrage capteurs temp et moyenne par ligne
 req_j = [
-    { "$match": { "type_capteur": { "$regex": "Temp" } } },
+    # préfixe ancré (équivalent du LIKE 'Temp%') pour des bornes d'index serrées
+    { "$match": { "type_capteur": { "$regex": "^Temp" } } },
     {
         "$lookup": {
             "from": "Reseau",
@@ -367,15 +397,11 @@ req_j = [
     },
     { "$sort": { "temperature_moyenne": -1 } }
 ]
-df_j = pd.DataFrame(list(db.Mesures.aggregate(req_j)))
-df_j = df_j[['id_ligne', 'nom_ligne', 'temperature_moyenne']]
-df_j.to_csv("./csv/J_nosql.csv", index=False)
-print("\n--- J. Température Ligne (Top 5) ---")
-print(df_j.head())
 
 
-# k. Performance chauffeur -> liaison chauffeur véhicule vers incidents trafic
-req_k = [
+# k. Performance chauffeur -> version d'origine : chaque véhicule joint à tout le trafic
+# de sa ligne (véhicules x trafic documents avant le $group, conservée pour le banc "chauffeurs")
+req_k_lookup = [
     { "$unwind": "$vehicules" },
     { "$match": { "vehicules.chauffeur.id": { "$ne": None } } },
     {
@@ -404,11 +430,50 @@ req_k = [
     },
     { "$sort": { "retard_moyen": -1, "id_chauffeur": 1 } }
 ]
-df_k = pd.DataFrame(list(db.Reseau.aggregate(req_k)))
-df_k = df_k[['id_chauffeur', 'nom', 'retard_moyen']]
-df_k.to_csv("./csv/K_nosql.csv", index=False)
-print("\n--- K. Performance Chauffeur (Top 9) ---")
-print(df_k.head(9))
+
+
+# k. Performance chauffeur -> cumuls des retards par ligne, puis répartition sur les
+# chauffeurs des véhicules de la ligne (moyenne pondérée par le trafic de chaque ligne)
+req_k = [
+    {
+        "$group": {
+            "_id": "$id_ligne",
+            "somme_retard": { "$sum": "$retard_minutes" },
+            # retards absents ignorés, comme par $avg
+            "nb_retards": { "$sum": { "$cond": [{ "$isNumber": "$retard_minutes" }, 1, 0] } }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "ligne"
+        }
+    },
+    { "$unwind": "$ligne" },
+    { "$unwind": "$ligne.vehicules" },
+    { "$match": { "ligne.vehicules.chauffeur.id": { "$ne": None } } },
+    {
+        "$group": {
+            "_id": "$ligne.vehicules.chauffeur.id",
+            "nom": { "$first": "$ligne.vehicules.chauffeur.nom" },
+            "somme_retard": { "$sum": "$somme_retard" },
+            "nb_retards": { "$sum": "$nb_retards" }
+        }
+    },
+    {
+        "$project": {
+            "id_chauffeur": "$_id",
+            "nom": 1,
+            "retard_moyen": {
+                "$cond": [{ "$gt": ["$nb_retards", 0] }, { "$divide": ["$somme_retard", "$nb_retards"] }, None]
+            },
+            "_id": 0
+        }
+    },
+    { "$sort": { "retard_moyen": -1, "id_chauffeur": 1 } }
+]
 
 
 # l. % véhicules électriques -> filtre interne au tableau véhicules pour compter les électriques
@@ -442,11 +507,6 @@ req_l = [
     },
     { "$sort": { "pourcentage_electrique": -1 } }
 ]
-df_l = pd.DataFrame(list(db.Reseau.aggregate(req_l)))
-df_l = df_l[['id_ligne', 'nom_ligne', 'pourcentage_electrique']]
-df_l.to_csv("./csv/L_nosql.csv", index=False)
-print("\n--- L. Véhicules Electriques (Top 5) ---")
-print(df_l.head())
 
 
 # m. Classification Qualité Service (Case When) -> case when)
@@ -478,11 +538,6 @@ req_m = [
     },
     { "$sort": { "pollution_moyenne": -1 } }
 ]
-df_m = pd.DataFrame(list(db.Mesures.aggregate(req_m)))
-df_m = df_m[['id_capteur', 'id_arret', 'pollution_moyenne', 'niveau_pollution']]
-df_m.to_csv("./csv/M_nosql.csv", index=False)
-print("\n--- M. Classification Pollution (Top 9) ---")
-print(df_m.head(9))
 
 
 # n. Qualité Service -> classification qualité service selon retard
@@ -520,11 +575,949 @@ req_n = [
     },
     { "$sort": { "retard_moyen": -1 } }
 ]
-df_n = pd.DataFrame(list(db.TraficEvents.aggregate(req_n)))
-df_n = df_n[['id_ligne', 'nom_ligne', 'retard_moyen', 'niveau_service']]
-df_n.to_csv("./csv/N_nosql.csv", index=False)
-print("\n--- N. Qualité Service (Top 5) ---")
-print(df_n.head())
+# ==============================================================================
+# Catalogue des requêtes : collection interrogée, pipeline, colonnes du csv, aperçu affiché
+# ==============================================================================
+REQUETES = {
+    "a": {"titre": "A. Moyenne retards (Top 5)", "collection": "TraficEvents", "pipeline": req_a,
+          "colonnes": ['id_ligne', 'nom_ligne', 'retard_moyen'], "apercu": 5},
+    "b": {"titre": "B. Passagers moyens/jour (Top 5)", "collection": "Horaires", "pipeline": req_b,
+          "colonnes": ['id_ligne', 'nom_ligne', 'passagers_moyens_par_jour'], "apercu": 5},
+    "c": {"titre": "C. Taux incident (Top 5)", "collection": "TraficEvents", "pipeline": req_c,
+          "colonnes": ['nom_ligne', 'taux_incident'], "apercu": 9},
+    "d": {"titre": "D. CO2 Véhicule (Top 9)", "collection": "Mesures", "pipeline": req_d,
+          "colonnes": ['id_vehicule', 'emission_moyenne_CO2'], "apercu": 9},
+    "e": {"titre": "E. Top Bruit Quartier", "collection": "Mesures", "pipeline": req_e,
+          "colonnes": ['nom', 'bruit_moyen'], "apercu": None},
+    "f": {"titre": "F. Retards sans incident (Top 5)", "collection": "TraficEvents", "pipeline": req_f,
+          "colonnes": ['nom_ligne'], "apercu": 5},
+    "g": {"titre": "G. Ponctualité", "collection": "Horaires", "pipeline": req_g,
+          "colonnes": ['taux_ponctualite'], "apercu": None},
+    "h": {"titre": "H. Arrêts par quartier (Top 9)", "collection": "Reseau", "pipeline": req_h,
+          "colonnes": ['id_quartier', 'nom', 'nombre_arrets'], "apercu": 9},
+    "i": {"titre": "I. Corrélation (Top 5)", "collection": "Mesures", "pipeline": req_i,
+          "colonnes": ['id_ligne', 'nom_ligne', 'retard_moyen', 'co2_moyen', 'indice_correlation'], "apercu": 5},
+    "j": {"titre": "J. Température Ligne (Top 5)", "collection": "Mesures", "pipeline": req_j,
+          "colonnes": ['id_ligne', 'nom_ligne', 'temperature_moyenne'], "apercu": 5},
+    "k": {"titre": "K. Performance Chauffeur (Top 9)", "collection": "TraficEvents", "pipeline": req_k,
+          "colonnes": ['id_chauffeur', 'nom', 'retard_moyen'], "apercu": 9},
+    "l": {"titre": "L. Véhicules Electriques (Top 5)", "collection": "Reseau", "pipeline": req_l,
+          "colonnes": ['id_ligne', 'nom_ligne', 'pourcentage_electrique'], "apercu": 5},
+    "m": {"titre": "M. Classification Pollution (Top 9)", "collection": "Mesures", "pipeline": req_m,
+          "colonnes": ['id_capteur', 'id_arret', 'pollution_moyenne', 'niveau_pollution'], "apercu": 9},
+    "n": {"titre": "N. Qualité Service (Top 5)", "collection": "TraficEvents", "pipeline": req_n,
+          "colonnes": ['id_ligne', 'nom_ligne', 'retard_moyen', 'niveau_service'], "apercu": 5},
+}
+
+
+# ==============================================================================
+# Variantes dénormalisées (migration avec --denormaliser)
+# ==============================================================================
+# id_ligne et quartiers_ids sont recopiés dans chaque mesure : l'agrégation se fait
+# directement sur Mesures et la jointure ne porte plus que sur les groupes obtenus.
+
+# d. CO2 par véhicule -> moyenne par ligne puis diffusion aux véhicules de la ligne
+req_d_denorm = [
+    { "$match": { "type_capteur": "CO2", "id_ligne": { "$ne": None } } },
+    {
+        "$group": {
+            "_id": "$id_ligne",
+            "emission_moyenne_CO2": { "$avg": "$valeur" }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "ligne"
+        }
+    },
+    { "$unwind": "$ligne" },
+    { "$unwind": "$ligne.vehicules" },
+    {
+        "$project": {
+            "id_vehicule": "$ligne.vehicules.id_vehicule",
+            "emission_moyenne_CO2": 1,
+            "_id": 0
+        }
+    },
+    { "$sort": { "emission_moyenne_CO2": -1, "id_vehicule": -1 } }
+]
+
+
+# e. Top 5 quartiers nuisances sonores -> moyenne par quartier recopié dans la mesure
+req_e_denorm = [
+    { "$match": { "type_capteur": "Bruit" } },
+    { "$unwind": "$quartiers_ids" },
+    {
+        "$group": {
+            "_id": "$quartiers_ids",
+            "bruit_moyen": { "$avg": "$valeur" }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "Quartiers",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "infos"
+        }
+    },
+    {
+        "$project": {
+            "nom": { "$first": "$infos.nom" },
+            "bruit_moyen": 1,
+            "_id": 0
+        }
+    },
+    { "$sort": { "bruit_moyen": -1 } },
+    { "$limit": 5 }
+]
+
+
+# i. Corrélation Trafic / Pollution -> co2 moyen par ligne puis retard moyen de la ligne
+req_i_denorm = [
+    { "$match": { "type_capteur": "CO2", "id_ligne": { "$ne": None } } },
+    {
+        "$group": {
+            "_id": "$id_ligne",
+            "co2_moyen": { "$avg": "$valeur" }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "TraficEvents",
+            "localField": "_id",
+            "foreignField": "id_ligne",
+            "pipeline": [
+                { "$group": { "_id": None, "retard_moyen": { "$avg": "$retard_minutes" } } }
+            ],
+            "as": "trafic"
+        }
+    },
+    { "$unwind": "$trafic" },
+    {
+        "$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "ligne"
+        }
+    },
+    {
+        "$project": {
+            "id_ligne": "$_id",
+            "nom_ligne": { "$first": "$ligne.nom_ligne" },
+            "retard_moyen": "$trafic.retard_moyen",
+            "co2_moyen": 1,
+            "indice_correlation": { "$multiply": ["$trafic.retard_moyen", "$co2_moyen"] },
+            "_id": 0
+        }
+    },
+    { "$sort": { "indice_correlation": -1 } }
+]
+
+
+# j. Moyenne de température par ligne -> regroupement direct sur la ligne recopiée
+req_j_denorm = [
+    { "$match": { "type_capteur": { "$regex": "^Temp" }, "id_ligne": { "$ne": None } } },
+    {
+        "$group": {
+            "_id": "$id_ligne",
+            "temperature_moyenne": { "$avg": "$valeur" }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "ligne"
+        }
+    },
+    { "$unwind": "$ligne" },
+    {
+        "$project": {
+            "id_ligne": "$_id",
+            "nom_ligne": "$ligne.nom_ligne",
+            "temperature_moyenne": 1,
+            "_id": 0
+        }
+    },
+    { "$sort": { "temperature_moyenne": -1 } }
+]
+
+# même catalogue, pipelines dénormalisés à la place des $lookup par mesure
+REQUETES_DENORMALISEES = {
+    **REQUETES,
+    "d": {**REQUETES["d"], "pipeline": req_d_denorm},
+    "e": {**REQUETES["e"], "pipeline": req_e_denorm},
+    "i": {**REQUETES["i"], "collection": "Mesures", "pipeline": req_i_denorm},
+    "j": {**REQUETES["j"], "pipeline": req_j_denorm},
+}
+
+# ==============================================================================
+# Horaires en buckets (migration avec --buckets-horaires)
+# ==============================================================================
+# un document par (id_vehicule, jour effectif) avec ses passages et ses totaux du jour
+
+# b. Passagers moyens par jour et par ligne -> somme des totaux des véhicules de la ligne
+req_b_buckets = [
+    {
+        "$group": {
+            "_id": { "ligne": "$id_ligne", "jour": "$jour" },
+            "total_jour": { "$sum": "$passagers_total" }
+        }
+    },
+    *req_b[1:]
+]
+
+# g. Taux de ponctualité global -> cumul des comptages journaliers
+req_g_buckets = [
+    { "$match": { "nb_effectifs": { "$gt": 0 } } },
+    {
+        "$group": {
+            "_id": None,
+            "total": { "$sum": "$nb_effectifs" },
+            "ponctuel": { "$sum": "$nb_ponctuels" }
+        }
+    },
+    req_g[2]
+]
+
+def lire_schema(db):
+    """
+    lecture des options de modélisation enregistrées par la migration (partie 2)
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+
+    Returns:
+        dict: options du schéma, vide si la migration ne les a pas enregistrées
+    """
+    return db["MigrationMeta"].find_one({"_id": "schema"}, {"_id": 0}) or {}
+
+# ==============================================================================
+# Mesures en collection de séries temporelles (migration avec --serie-temporelle)
+# ==============================================================================
+# les champs propres au capteur sont regroupés dans le metaField
+META_MESURES = "capteur"
+CHAMPS_CAPTEUR = ["id_capteur", "type_capteur", "id_arret", "id_ligne", "quartiers_ids"]
+
+def renommer_champ(chemin):
+    """
+    chemin d'un champ de mesure dans le document série temporelle
+
+    Args:
+        chemin (str): chemin du champ dans le document à plat (ex: "id_arret")
+
+    Returns:
+        str: chemin préfixé par le metaField si le champ est propre au capteur
+    """
+    racine = chemin.split(".", 1)[0]
+    return f"{META_MESURES}.{chemin}" if racine in CHAMPS_CAPTEUR else chemin
+
+def renommer_references(valeur):
+    """
+    renommage des références "$champ" d'une expression d'agrégation
+
+    Args:
+        valeur: expression (chaîne, liste ou dictionnaire)
+
+    Returns:
+        expression avec les champs du capteur préfixés (variables "$$" inchangées)
+    """
+    if isinstance(valeur, str) and valeur.startswith("$") and not valeur.startswith("$$"):
+        return "$" + renommer_champ(valeur[1:])
+    if isinstance(valeur, list):
+        return [renommer_references(v) for v in valeur]
+    if isinstance(valeur, dict):
+        return {cle: renommer_references(v) for cle, v in valeur.items()}
+    return valeur
+
+def renommer_filtre(filtre):
+    """
+    renommage des champs d'un filtre de $match
+
+    Args:
+        filtre (dict): filtre de requête
+
+    Returns:
+        dict: filtre portant sur les champs du document série temporelle
+    """
+    adapte = {}
+    for cle, valeur in filtre.items():
+        if cle == "$expr":
+            adapte[cle] = renommer_references(valeur)
+        elif cle in ("$and", "$or", "$nor"):
+            adapte[cle] = [renommer_filtre(f) for f in valeur]
+        else:
+            adapte[renommer_champ(cle)] = valeur
+    return adapte
+
+def adapter_serie_temporelle(pipeline, sur_mesures=True):
+    """
+    réécriture d'un pipeline pour des Mesures en collection de séries temporelles
+
+    les champs des mesures ne sont référencés que jusqu'à la première étape qui
+    remodèle les documents ($group, $project, $replaceRoot) ; les étapes suivantes
+    sont conservées telles quelles. les sous-pipelines $lookup vers Mesures sont
+    réécrits de la même façon.
+
+    Args:
+        pipeline (list): pipeline écrit pour la collection Mesures à plat
+        sur_mesures (bool): le pipeline est exécuté sur la collection Mesures
+
+    Returns:
+        list: pipeline équivalent
+    """
+    adapte = []
+    for i, etape in enumerate(pipeline):
+        operateur, argument = next(iter(etape.items()))
+        if operateur == "$lookup":
+            argument = dict(argument)
+            if argument["from"] == "Mesures":
+                if "foreignField" in argument:
+                    argument["foreignField"] = renommer_champ(argument["foreignField"])
+                if "pipeline" in argument:
+                    argument["pipeline"] = adapter_serie_temporelle(argument["pipeline"])
+            if sur_mesures:
+                if "localField" in argument:
+                    argument["localField"] = renommer_champ(argument["localField"])
+                if "let" in argument:
+                    argument["let"] = renommer_references(argument["let"])
+        elif sur_mesures and operateur == "$match":
+            argument = renommer_filtre(argument)
+        elif sur_mesures and operateur == "$sort":
+            argument = {renommer_champ(cle): sens for cle, sens in argument.items()}
+        elif sur_mesures and operateur == "$project":
+            # inclusion d'un champ du capteur : recopie depuis le metaField
+            argument = {
+                cle: (f"${renommer_champ(cle)}" if v in (1, True) and renommer_champ(cle) != cle else renommer_references(v))
+                for cle, v in argument.items()
+            }
+        elif sur_mesures:
+            argument = renommer_references(argument)
+        adapte.append({operateur: argument})
+        if sur_mesures and operateur in ("$group", "$project", "$replaceRoot"):
+            sur_mesures = False
+    return adapte
+
+# ==============================================================================
+# Réponses depuis les agrégats pré-calculés (rollups.py, migration avec --rollups)
+# ==============================================================================
+# stats_ligne_jour : une entrée par (id_ligne, jour) avec sommes et comptages du trafic
+# et des horaires ; stats_arret_capteur : une entrée par (id_arret, id_capteur, type_capteur)
+# avec somme, nombre, min et max des valeurs. les moyennes sont recalculées à partir
+# des sommes et comptages, sans relire les collections brutes.
+STATS_LIGNE_JOUR = "stats_ligne_jour"
+STATS_ARRET_CAPTEUR = "stats_arret_capteur"
+
+def moyenne(somme, nombre):
+    """
+    expression de moyenne à partir d'une somme et d'un comptage
+
+    Args:
+        somme (str): référence au champ somme
+        nombre (str): référence au champ comptage
+
+    Returns:
+        dict: expression d'agrégation (null si le comptage est nul, comme $avg)
+    """
+    return {"$cond": [{"$gt": [nombre, 0]}, {"$divide": [somme, nombre]}, None]}
+
+# cumul des mesures d'un type par arrêt (tous capteurs de l'arrêt confondus)
+def stats_par_arret(filtre_type):
+    """
+    étapes de regroupement de stats_arret_capteur par arrêt pour un type de capteur
+
+    Args:
+        filtre_type: valeur ou filtre appliqué à _id.type_capteur
+
+    Returns:
+        list: étapes du pipeline
+    """
+    return [
+        { "$match": { "_id.type_capteur": filtre_type } },
+        {
+            "$group": {
+                "_id": "$_id.id_arret",
+                "somme": { "$sum": "$somme" },
+                "nb": { "$sum": "$nb" }
+            }
+        },
+        {
+            "$lookup": {
+                "from": "Reseau",
+                "localField": "_id",
+                "foreignField": "arrets.id_arret",
+                "as": "reseau"
+            }
+        },
+        { "$unwind": "$reseau" },
+    ]
+
+# retard cumulé d'une ligne, joint depuis Reseau ou depuis une ligne déjà regroupée
+lookup_trafic_ligne = {
+    "$lookup": {
+        "from": STATS_LIGNE_JOUR,
+        "localField": "_id",
+        "foreignField": "_id.id_ligne",
+        "pipeline": [
+            { "$match": { "nb_trafic": { "$gt": 0 } } },
+            {
+                "$group": {
+                    "_id": None,
+                    "somme_retard": { "$sum": "$somme_retard" },
+                    "nb_trafic": { "$sum": "$nb_trafic" }
+                }
+            }
+        ],
+        "as": "trafic"
+    }
+}
+
+# a, c, n. cumul du trafic par ligne
+trafic_par_ligne = [
+    { "$match": { "nb_trafic": { "$gt": 0 } } },
+    {
+        "$group": {
+            "_id": "$_id.id_ligne",
+            "somme_retard": { "$sum": "$somme_retard" },
+            "nb_trafic": { "$sum": "$nb_trafic" },
+            "nb_incidents": { "$sum": "$nb_incidents" }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "ligne"
+        }
+    },
+]
+
+req_a_rollup = trafic_par_ligne + [
+    {
+        "$project": {
+            "id_ligne": "$_id",
+            "nom_ligne": { "$first": "$ligne.nom_ligne" },
+            "retard_moyen": moyenne("$somme_retard", "$nb_trafic"),
+            "_id": 0
+        }
+    },
+    { "$sort": { "retard_moyen": -1 } }
+]
+
+req_b_rollup = [
+    { "$match": { "nb_horaires": { "$gt": 0 } } },
+    {
+        "$group": {
+            "_id": "$_id.id_ligne",
+            "passagers_moyens_par_jour": { "$avg": "$passagers" }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "info_ligne"
+        }
+    },
+    {
+        "$project": {
+            "id_ligne": "$_id",
+            "nom_ligne": { "$first": "$info_ligne.nom_ligne" },
+            "passagers_moyens_par_jour": 1,
+            "_id": 0
+        }
+    },
+    { "$sort": { "passagers_moyens_par_jour": -1 } }
+]
+
+req_c_rollup = trafic_par_ligne + [
+    {
+        "$project": {
+            "nom_ligne": { "$first": "$ligne.nom_ligne" },
+            "taux_incident": { "$divide": ["$nb_incidents", "$nb_trafic"] },
+            "_id": 0
+        }
+    },
+    { "$sort": { "taux_incident": -1, "nom_ligne": 1 } }
+]
+
+req_d_rollup = stats_par_arret("CO2") + [
+    { "$unwind": "$reseau.vehicules" },
+    {
+        "$group": {
+            "_id": "$reseau.vehicules.id_vehicule",
+            "somme": { "$sum": "$somme" },
+            "nb": { "$sum": "$nb" }
+        }
+    },
+    { "$project": { "id_vehicule": "$_id", "emission_moyenne_CO2": moyenne("$somme", "$nb"), "_id": 0 } },
+    { "$sort": { "emission_moyenne_CO2": -1, "id_vehicule": -1 } }
+]
+
+req_e_rollup = stats_par_arret("Bruit") + [
+    { "$unwind": "$reseau.arrets" },
+    { "$match": { "$expr": { "$eq": ["$_id", "$reseau.arrets.id_arret"] } } },
+    { "$unwind": "$reseau.arrets.quartiers_ids" },
+    {
+        "$group": {
+            "_id": "$reseau.arrets.quartiers_ids",
+            "somme": { "$sum": "$somme" },
+            "nb": { "$sum": "$nb" }
+        }
+    },
+    {
+        "$lookup": {
+            "from": "Quartiers",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "infos"
+        }
+    },
+    {
+        "$project": {
+            "nom": { "$first": "$infos.nom" },
+            "bruit_moyen": moyenne("$somme", "$nb"),
+            "_id": 0
+        }
+    },
+    { "$sort": { "bruit_moyen": -1 } },
+    { "$limit": 5 }
+]
+
+req_f_rollup = [
+    {
+        "$group": {
+            "_id": "$_id.id_ligne",
+            "nb_retard_sans_incident": { "$sum": "$nb_retard_sans_incident" }
+        }
+    },
+    { "$match": { "nb_retard_sans_incident": { "$gt": 0 } } },
+    {
+        "$lookup": {
+            "from": "Reseau",
+            "localField": "_id",
+            "foreignField": "_id",
+            "as": "ligne"
+        }
+    },
+    { "$group": { "_id": { "$first": "$ligne.nom_ligne" } } },
+    { "$project": { "nom_ligne": "$_id", "_id": 0 } },
+    { "$sort": { "nom_ligne": 1 } }
+]
+
+req_g_rollup = [
+    { "$match": { "nb_effectifs": { "$gt": 0 } } },
+    {
+        "$group": {
+            "_id": None,
+            "total": { "$sum": "$nb_effectifs" },
+            "ponctuel": { "$sum": "$nb_ponctuels" }
+        }
+    },
+    { "$project": { "taux_ponctualite": { "$divide": ["$ponctuel", "$total"] }, "_id": 0 } }
+]
+
+# co2 cumulé par ligne, puis retard cumulé de la ligne
+req_i_rollup = stats_par_arret("CO2") + [
+    {
+        "$group": {
+            "_id": "$reseau._id",
+            "nom_ligne": { "$first": "$reseau.nom_ligne" },
+            "somme": { "$sum": "$somme" },
+            "nb": { "$sum": "$nb" }
+        }
+    },
+    lookup_trafic_ligne,
+    { "$unwind": "$trafic" },
+    {
+        "$project": {
+            "id_ligne": "$_id",
+            "nom_ligne": 1,
+            "retard_moyen": moyenne("$trafic.somme_retard", "$trafic.nb_trafic"),
+            "co2_moyen": moyenne("$somme", "$nb"),
+            "_id": 0
+        }
+    },
+    { "$addFields": { "indice_correlation": { "$multiply": ["$retard_moyen", "$co2_moyen"] } } },
+    { "$sort": { "indice_correlation": -1 } }
+]
+
+req_j_rollup = stats_par_arret({ "$regex": "^Temp" }) + [
+    {
+        "$group": {
+            "_id": "$reseau._id",
+            "nom_ligne": { "$first": "$reseau.nom_ligne" },
+            "somme": { "$sum": "$somme" },
+            "nb": { "$sum": "$nb" }
+        }
+    },
+    {
+        "$project": {
+            "id_ligne": "$_id",
+            "nom_ligne": 1,
+            "temperature_moyenne": moyenne("$somme", "$nb"),
+            "_id": 0
+        }
+    },
+    { "$sort": { "temperature_moyenne": -1 } }
+]
+
+# chaque véhicule d'un chauffeur apporte tout le trafic de sa ligne
+req_k_rollup = [
+    { "$unwind": "$vehicules" },
+    { "$match": { "vehicules.chauffeur.id": { "$ne": None } } },
+    lookup_trafic_ligne,
+    { "$unwind": "$trafic" },
+    {
+        "$group": {
+            "_id": "$vehicules.chauffeur.id",
+            "nom": { "$first": "$vehicules.chauffeur.nom" },
+            "somme_retard": { "$sum": "$trafic.somme_retard" },
+            "nb_trafic": { "$sum": "$trafic.nb_trafic" }
+        }
+    },
+    {
+        "$project": {
+            "id_chauffeur": "$_id",
+            "nom": 1,
+            "retard_moyen": moyenne("$somme_retard", "$nb_trafic"),
+            "_id": 0
+        }
+    },
+    { "$sort": { "retard_moyen": -1, "id_chauffeur": 1 } }
+]
+
+req_m_rollup = [
+    { "$match": { "_id.type_capteur": "CO2" } },
+    {
+        "$project": {
+            "id_capteur": "$_id.id_capteur",
+            "id_arret": "$_id.id_arret",
+            "pollution_moyenne": moyenne("$somme", "$nb"),
+            "_id": 0
+        }
+    },
+    { "$addFields": { "niveau_pollution": req_m[2]["$project"]["niveau_pollution"] } },
+    req_m[3],
+]
+
+req_n_rollup = trafic_par_ligne + [
+    {
+        "$project": {
+            "id_ligne": "$_id",
+            "nom_ligne": { "$first": "$ligne.nom_ligne" },
+            "retard_moyen": moyenne("$somme_retard", "$nb_trafic"),
+            "_id": 0
+        }
+    },
+    { "$addFields": { "niveau_service": req_n[2]["$project"]["niveau_service"] } },
+    { "$sort": { "retard_moyen": -1 } }
+]
+
+# h et l ne lisent que Reseau et restent inchangées
+REQUETES_ROLLUPS = {
+    **REQUETES,
+    "a": {**REQUETES["a"], "collection": STATS_LIGNE_JOUR, "pipeline": req_a_rollup},
+    "b": {**REQUETES["b"], "collection": STATS_LIGNE_JOUR, "pipeline": req_b_rollup},
+    "c": {**REQUETES["c"], "collection": STATS_LIGNE_JOUR, "pipeline": req_c_rollup},
+    "d": {**REQUETES["d"], "collection": STATS_ARRET_CAPTEUR, "pipeline": req_d_rollup},
+    "e": {**REQUETES["e"], "collection": STATS_ARRET_CAPTEUR, "pipeline": req_e_rollup},
+    "f": {**REQUETES["f"], "collection": STATS_LIGNE_JOUR, "pipeline": req_f_rollup},
+    "g": {**REQUETES["g"], "collection": STATS_LIGNE_JOUR, "pipeline": req_g_rollup},
+    "i": {**REQUETES["i"], "collection": STATS_ARRET_CAPTEUR, "pipeline": req_i_rollup},
+    "j": {**REQUETES["j"], "collection": STATS_ARRET_CAPTEUR, "pipeline": req_j_rollup},
+    "k": {**REQUETES["k"], "collection": "Reseau", "pipeline": req_k_rollup},
+    "m": {**REQUETES["m"], "collection": STATS_ARRET_CAPTEUR, "pipeline": req_m_rollup},
+    "n": {**REQUETES["n"], "collection": STATS_LIGNE_JOUR, "pipeline": req_n_rollup},
+}
+
+def requetes_pour_schema(schema, rollups=False):
+    """
+    catalogue de requêtes adapté au schéma de la base migrée
+
+    Args:
+        schema (dict): options lues par lire_schema
+        rollups (bool): répondre depuis les agrégats pré-calculés s'ils existent
+
+    Returns:
+        dict: REQUETES_ROLLUPS si demandé et disponible, sinon REQUETES_DENORMALISEES
+        si les mesures sont dénormalisées, REQUETES sinon, avec B et G sur les buckets
+        horaires et pipelines réécrits si Mesures est une collection de séries temporelles
+    """
+    if rollups and schema.get("rollups"):
+        return REQUETES_ROLLUPS
+    requetes = REQUETES_DENORMALISEES if schema.get("denormalisation") else REQUETES
+    if schema.get("buckets_horaires"):
+        requetes = {
+            **requetes,
+            "b": {**requetes["b"], "pipeline": req_b_buckets},
+            "g": {**requetes["g"], "pipeline": req_g_buckets},
+        }
+    if schema.get("serie_temporelle"):
+        requetes = {
+            lettre: {**requete, "pipeline": adapter_serie_temporelle(requete["pipeline"], requete["collection"] == "Mesures")}
+            for lettre, requete in requetes.items()
+        }
+    return requetes
+
+# ==============================================================================
+# Exécution concurrente du catalogue
+# ==============================================================================
+def curseur_requete(db, requete, max_time_ms=None, batch_size=BATCH_SIZE_CURSEUR, version=None):
+    """
+    curseur d'agrégation d'une entrée du catalogue
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        requete (dict): entrée du catalogue (collection, pipeline)
+        max_time_ms (int, optional): durée maximale d'exécution côté serveur
+        batch_size (int): documents par lot renvoyé par le serveur
+        version (str, optional): version des données ; si fournie, résultat lu
+            dans le cache partagé ou calculé puis mis en cache
+
+    Returns:
+        iterator: documents résultats (curseur pymongo sans cache)
+    """
+    options = {"allowDiskUse": True, "batchSize": batch_size}
+    if max_time_ms:
+        options["maxTimeMS"] = max_time_ms
+    collection, pipeline = requete["collection"], requete["pipeline"]
+    if version is None:
+        return db[collection].aggregate(pipeline, **options)
+    return agreger_en_cache(db, collection, pipeline, lambda: db[collection].aggregate(pipeline, **options), version)
+
+def executer_requete(db, requete, max_time_ms=None):
+    """
+    exécution d'une entrée du catalogue
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        requete (dict): entrée du catalogue (collection, pipeline, colonnes)
+        max_time_ms (int, optional): durée maximale d'exécution côté serveur
+
+    Returns:
+        pd.DataFrame: résultat limité aux colonnes du csv
+    """
+    return pd.DataFrame(list(curseur_requete(db, requete, max_time_ms)), columns=requete["colonnes"])
+
+def lots_lignes(curseur, colonnes, taille):
+    """
+    lecture du curseur par lots de lignes, dans l'ordre de colonnes déclaré
+
+    Args:
+        curseur (iterable): documents résultats
+        colonnes (list): champs exportés, dans l'ordre du fichier
+        taille (int): lignes par lot
+
+    Yields:
+        list: lot d'au plus taille lignes (listes de valeurs, None si champ absent)
+    """
+    lot = []
+    for doc in curseur:
+        lot.append([doc.get(colonne) for colonne in colonnes])
+        if len(lot) >= taille:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+def exporter_csv(curseur, colonnes, chemin, batch_size=BATCH_SIZE_CURSEUR):
+    """
+    écriture incrémentale d'un csv à partir d'un curseur
+
+    seul le lot courant est en mémoire ; le format suit celui de DataFrame.to_csv
+    (champ absent -> cellule vide).
+
+    Args:
+        curseur (iterable): documents résultats
+        colonnes (list): en-tête et ordre des colonnes
+        chemin (str): fichier csv
+        batch_size (int): lignes écrites par appel à writerows
+
+    Yields:
+        list: chaque lot écrit (pour l'aperçu)
+    """
+    with open(chemin, "w", newline="", encoding="utf-8") as fichier:
+        writer = csv.writer(fichier, lineterminator="\n")
+        writer.writerow(colonnes)
+        for lot in lots_lignes(curseur, colonnes, batch_size):
+            writer.writerows(lot)
+            yield lot
+
+def exporter_parquet(curseur, colonnes, chemin, taille_groupe=TAILLE_GROUPE_PARQUET):
+    """
+    écriture d'un fichier parquet, un row group par lot de lignes
+
+    le schéma est déduit du premier lot et imposé aux suivants.
+
+    Args:
+        curseur (iterable): documents résultats
+        colonnes (list): colonnes du fichier, dans l'ordre
+        chemin (str): fichier parquet
+        taille_groupe (int): lignes par row group
+
+    Yields:
+        list: chaque lot écrit (pour l'aperçu)
+    """
+    writer = None
+    try:
+        for lot in lots_lignes(curseur, colonnes, taille_groupe):
+            table = pa.Table.from_pylist(
+                [dict(zip(colonnes, ligne)) for ligne in lot],
+                schema=writer.schema if writer else None
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(chemin, table.schema)
+            writer.write_table(table)
+            yield lot
+        if writer is None:
+            # résultat vide : fichier avec les seules colonnes
+            pq.write_table(pa.table({colonne: pa.array([], pa.null()) for colonne in colonnes}), chemin)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def exporter_requete(db, requete, chemin, max_time_ms=None, format_export="csv", batch_size=BATCH_SIZE_CURSEUR,
+                     version=None):
+    """
+    export en flux d'une entrée du catalogue, sans matérialiser tout le résultat
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        requete (dict): entrée du catalogue (collection, pipeline, colonnes, apercu)
+        chemin (str): fichier de sortie
+        max_time_ms (int, optional): durée maximale d'exécution côté serveur
+        format_export (str): "csv" ou "parquet"
+        batch_size (int): documents par lot du curseur
+        version (str, optional): version des données pour le cache partagé (None : sans cache)
+
+    Returns:
+        pd.DataFrame: premières lignes (toutes si l'aperçu n'est pas limité)
+    """
+    colonnes = requete["colonnes"]
+    curseur = curseur_requete(db, requete, max_time_ms, batch_size, version)
+    if format_export == "parquet":
+        lots = exporter_parquet(curseur, colonnes, chemin, max(batch_size, TAILLE_GROUPE_PARQUET))
+    else:
+        lots = exporter_csv(curseur, colonnes, chemin, batch_size)
+    apercu = []
+    for lot in lots:
+        if requete["apercu"] is None or len(apercu) < requete["apercu"]:
+            apercu.extend(lot)
+    df = pd.DataFrame(apercu, columns=colonnes)
+    return df if requete["apercu"] is None else df.head(requete["apercu"])
+
+def executer_catalogue(db, requetes, concurrence=CONCURRENCE, max_time_ms=MAX_TIME_MS, executer=None):
+    """
+    exécution concurrente des requêtes indépendantes du catalogue
+
+    les threads partagent le pool de connexions du client pymongo : la durée totale
+    tend vers celle de la requête la plus lente plutôt que vers la somme.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        requetes (dict): lettre -> entrée du catalogue
+        concurrence (int): nombre maximal de requêtes en cours
+        max_time_ms (int, optional): durée maximale de chaque requête côté serveur
+        executer (callable, optional): executer(db, lettre, requete, max_time_ms) -> DataFrame
+            (par défaut le résultat complet de executer_requete)
+
+    Returns:
+        dict: lettre -> (DataFrame ou None si interrompue, durée en secondes, erreur ou None),
+        dans l'ordre du catalogue
+    """
+    def chronometrer(lettre, requete):
+        debut = time.perf_counter()
+        try:
+            if executer is None:
+                df = executer_requete(db, requete, max_time_ms)
+            else:
+                df = executer(db, lettre, requete, max_time_ms)
+            erreur = None
+        except ExecutionTimeout:
+            df, erreur = None, f"interrompue après {max_time_ms} ms (maxTimeMS)"
+        return df, time.perf_counter() - debut, erreur
+
+    resultats = {}
+    with ThreadPoolExecutor(max_workers=max(concurrence, 1)) as executeur:
+        futures = {executeur.submit(chronometrer, lettre, requete): lettre for lettre, requete in requetes.items()}
+        for future in as_completed(futures):
+            resultats[futures[future]] = future.result()
+    return {lettre: resultats[lettre] for lettre in requetes}
+
+def lire_arguments():
+    """
+    lecture des options de la ligne de commande
+
+    Returns:
+        argparse.Namespace: options d'exécution
+    """
+    parser = argparse.ArgumentParser(description="Requêtes NoSQL Paris2055 (partie 3)")
+    parser.add_argument("--rollups", action="store_true", help="répondre depuis les agrégats pré-calculés")
+    parser.add_argument("--concurrence", type=int, default=CONCURRENCE, help="requêtes exécutées simultanément")
+    parser.add_argument("--max-time-ms", type=int, default=MAX_TIME_MS, help="durée maximale de chaque requête côté serveur")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE_CURSEUR, help="documents par lot du curseur")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="format des fichiers exportés")
+    parser.add_argument("--sans-cache", action="store_true", help="recalculer sans lire ni alimenter le cache partagé")
+    args = parser.parse_args()
+    if args.format == "parquet" and pa is None:
+        parser.error("l'export parquet nécessite pyarrow (pip install pyarrow)")
+    return args
+
+if __name__ == "__main__":
+    args = lire_arguments()
+    print("--- REQUÊTES MONGODB (PARTIE 3) CORRIGÉES ---")
+
+    try:
+        # pool assez grand pour toutes les requêtes simultanées
+        client = pymongo.MongoClient("mongodb://localhost:27017/", maxPoolSize=max(args.concurrence, 100))
+        db = client["Paris2055"]
+        print("Connexion MongoDB établie.")
+    except Exception as e:
+        print(f"Erreur : {e}")
+        exit()
+
+    # pipelines choisis selon le schéma enregistré par la migration
+    schema = lire_schema(db)
+    requetes = requetes_pour_schema(schema, args.rollups)
+    if args.rollups:
+        print("Réponses depuis les agrégats pré-calculés." if schema.get("rollups")
+              else "Aucun agrégat pré-calculé : requêtes sur les collections brutes.")
+    if schema.get("denormalisation"):
+        print("Mesures dénormalisées : variantes sans $lookup par mesure (D, E, I, J).")
+    if schema.get("serie_temporelle"):
+        print(f"Mesures en série temporelle (granularité {schema['serie_temporelle']}).")
+
+    # exécution concurrente et export en flux de chaque curseur, aperçu dans l'ordre du catalogue
+    # résultats de la même version des données repris du cache partagé
+    version = None if args.sans_cache else lire_version(db)
+
+    def exporter(db, lettre, requete, max_time_ms):
+        chemin = f"./csv/{lettre.upper()}_nosql.{args.format}"
+        return exporter_requete(db, requete, chemin, max_time_ms, args.format, args.batch_size, version)
+
+    debut = time.perf_counter()
+    resultats = executer_catalogue(db, requetes, args.concurrence, args.max_time_ms, exporter)
+    duree_totale = time.perf_counter() - debut
+    for lettre, (df, duree, erreur) in resultats.items():
+        requete = requetes[lettre]
+        print(f"\n--- {requete['titre']} ({duree * 1000:.0f} ms) ---")
+        if erreur:
+            print(f"Requete {lettre.upper()} : {erreur}")
+            continue
+        print(df)
+
+    durees = [duree for _, duree, _ in resultats.values()]
+    print(f"\nDurée totale : {duree_totale:.2f} s ({args.concurrence} requêtes simultanées), "
+          f"somme des requêtes : {sum(durees):.2f} s, plus lente : {max(durees):.2f} s")
 
-client.close()
-print("--- TERMINÉ ---")
\ No newline at end of file
+    client.close()
+    print("--- TERMINÉ ---")
\ No newline at end of file
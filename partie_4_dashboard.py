@@ -3,10 +3,19 @@ import streamlit as st
 import pandas as pd
 import pymongo
 import plotly.express as px
+import plotly.graph_objects as go
 import folium
-from streamlit_folium import st_folium
-from folium.plugins import MarkerCluster
+import streamlit.components.v1 as components
+from folium.plugins import FastMarkerCluster
 import os
+import json
+from datetime import datetime, time, timedelta
+
+import donnees_dashboard
+import geo_carte
+from cache_resultats import lire_version
+from comparateur import DOSSIER_CSV, comparer_requete, synthese
+from partie_3_req_nosql import lire_schema
 
 # --- CONFIGURATION DE LA PAGE ---
 # paramètres d'affichage streamlit
@@ -74,239 +83,226 @@ except Exception as e:
     st.error(f"Erreur de connexion MongoDB : {e}")
     st.stop()
 
-# --- 2. PIPELINES D'AGRÉGATION (Pour les onglets Graphiques et Carto) ---
+# version des données écrite par la dernière migration : clé des caches de résultats
+VERSION = lire_version(db)
+
+# --- 2. DONNÉES (module donnees_dashboard, mémorisées par version des données) ---
+# chaque fonction n'est appelée que par l'onglet qui l'affiche
 
-@st.cache_data(ttl=3600)
-def get_kpis():
+@st.cache_data
+def get_kpis(version, rollups=False):
     """
-    calcul des indicateurs clés de performance (kpi)
-    
+    indicateurs clés de performance (kpi)
+
+    Args:
+        version (str or None): version des données (clé des caches)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
     Returns:
         tuple: (nombre de lignes, total incidents, valeur moyenne co2)
     """
-    nb_lignes = db.Reseau.count_documents({})
-    
-    # agrégation pour compter le nombre total d'incidents
-    nb_incidents = db.TraficEvents.aggregate([
-        {"$project": {"nb_incidents": {"$size": {"$ifNull": ["$incidents", []]}}}},
-        {"$group": {"_id": None, "total": {"$sum": "$nb_incidents"}}}
-    ])
-    res_inc = list(nb_incidents)
-    total_incidents = res_inc[0]['total'] if res_inc else 0
-    
-    # calcul de la moyenne des mesures de co2
-    avg_co2 = list(db.Mesures.aggregate([
-        {"$match": {"type_capteur": "CO2"}},
-        {"$limit": 1000},
-        {"$group": {"_id": None, "avg": {"$avg": "$valeur"}}}
-    ]))
-    val_co2 = avg_co2[0]['avg'] if avg_co2 else 0
-    
-    return nb_lignes, total_incidents, val_co2
+    return donnees_dashboard.kpis(db, version, rollups)
 
-@st.cache_data(ttl=3600)
-def get_retards_par_ligne():
+@st.cache_data
+def get_retards_par_ligne(version, rollups=False):
     """
-    récupération des retards moyens par ligne de transport
-    
+    retards moyens par ligne de transport
+
+    Args:
+        version (str or None): version des données (clé des caches)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
     Returns:
         pd.DataFrame: dataframe avec nom_ligne et retard_moyen
     """
-    pipeline = [
-        {"$group": {
-            "_id": "$id_ligne",
-            "retard_moyen": {"$avg": "$retard_minutes"}
-        }},
-        {"$lookup": {
-            "from": "Reseau",
-            "localField": "_id",
-            "foreignField": "_id",
-            "as": "ligne_info"
-        }},
-        {"$unwind": "$ligne_info"},
-        {"$project": {
-            "nom_ligne": "$ligne_info.nom_ligne",
-            "retard_moyen": 1
-        }},
-        {"$sort": {"retard_moyen": -1}},
-        {"$limit": 15}
-    ]
-    return pd.DataFrame(list(db.TraficEvents.aggregate(pipeline)))
-
-@st.cache_data(ttl=3600)
-def get_repartition_vehicules():
+    return donnees_dashboard.retards_par_ligne(db, version, rollups)
+
+@st.cache_data
+def get_repartition_vehicules(version):
     """
     répartition du nombre de véhicules par type
-    
+
+    Args:
+        version (str or None): version des données (clé des caches)
+
     Returns:
         pd.DataFrame: dataframe avec type de véhicule et comptage
     """
-    pipeline = [
-        {"$unwind": "$vehicules"},
-        {"$group": {
-            "_id": "$vehicules.type_vehicule",
-            "count": {"$sum": 1}
-        }}
-    ]
-    return pd.DataFrame(list(db.Reseau.aggregate(pipeline)))
+    return donnees_dashboard.repartition_vehicules(db, version)
 
-@st.cache_data(ttl=3600)
-def get_emissions_co2_trend():
+@st.cache_data
+def get_bornes_mesures(version, colonne):
     """
-    évolution temporelle des émissions de co2
-    
+    premier et dernier relevé d'un type de capteur
+
+    Args:
+        version (str or None): version des données (clé des caches)
+        colonne (str): nom affiché du type de capteur
+
+    Returns:
+        tuple: (date min, date max)
+    """
+    return donnees_dashboard.bornes_mesures(db, colonne, version)
+
+@st.cache_data
+def get_tendance_mesures(version, colonne, debut, fin, methode):
+    """
+    évolution d'un type de mesure sur la période sélectionnée
+
+    Args:
+        version (str or None): version des données (clé des caches)
+        colonne (str): nom affiché du type de capteur
+        debut (datetime): début de la période
+        fin (datetime): fin de la période (exclue)
+        methode (str): découpage des intervalles ("calendrier" ou "effectifs")
+
+    Returns:
+        pd.DataFrame: relevés bruts (date, valeur) ou intervalles (date, min, moyenne, max, nb)
+    """
+    return donnees_dashboard.tendance_mesures(db, version, colonne, debut, fin, methode=methode)
+
+@st.cache_data
+def get_types_incidents(version):
+    """
+    top 5 des types d'incidents les plus fréquents
+
+    Args:
+        version (str or None): version des données (clé des caches)
+
     Returns:
-        pd.DataFrame: dataframe avec date et valeur de co2
+        pd.DataFrame: dataframe avec description d'incident et comptage
     """
-    pipeline = [
-        {"$match": {"type_capteur": "CO2"}},
-        {"$sample": {"size": 2000}},
-        {"$sort": {"date": 1}},
-        {"$project": {"date": 1, "valeur": 1, "_id": 0}}
-    ]
-    return pd.DataFrame(list(db.Mesures.aggregate(pipeline)))
+    return donnees_dashboard.types_incidents(db, version)
 
-@st.cache_data(ttl=3600)
-def get_arrets_data(nom_ligne_filtre=None):
+@st.cache_data
+def get_noms_lignes(version):
+    """
+    noms des lignes du filtre de la carte
+
+    Args:
+        version (str or None): version des données (clé des caches)
+
+    Returns:
+        list: noms triés
+    """
+    return donnees_dashboard.noms_lignes(db)
+
+@st.cache_data
+def get_arrets_data(version, nom_ligne_filtre=None, rollups=False):
     """
     données des arrêts avec statistiques environnementales
-    
+
     Args:
+        version (str or None): version des données (clé des caches)
         nom_ligne_filtre (str, optional): filtre sur une ligne spécifique
-    
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
     Returns:
         pd.DataFrame: dataframe avec informations des arrêts et mesures moyennes
     """
-    # construction du filtre de recherche
-    match_stage = {}
-    if nom_ligne_filtre and nom_ligne_filtre != "Toutes":
-        match_stage = {"nom_ligne": nom_ligne_filtre}
-
-    pipeline_arrets = [
-        {"$match": match_stage},
-        {"$unwind": "$arrets"},
-        {"$project": {
-            "id_arret": "$arrets.id_arret",
-            "nom": "$arrets.nom",
-            "lat": {"$arrayElemAt": ["$arrets.localisation.coordinates", 1]},
-            "lon": {"$arrayElemAt": ["$arrets.localisation.coordinates", 0]},
-            "_id": 0
-        }},
-        {"$group": {
-            "_id": "$id_arret",
-            "nom": {"$first": "$nom"},
-            "lat": {"$first": "$lat"},
-            "lon": {"$first": "$lon"},
-            "lignes_desservies": {"$sum": 1}
-        }}
-    ]
-    df_arrets = pd.DataFrame(list(db.Reseau.aggregate(pipeline_arrets)))
-    
-    if df_arrets.empty: return df_arrets
-
-    # récupération des statistiques moyennes par arrêt
-    pipeline_stats = [
-        {"$group": {
-            "_id": {"id_arret": "$id_arret", "type": "$type_capteur"},
-            "moyenne": {"$avg": "$valeur"}
-        }}
-    ]
-    stats_raw = list(db.Mesures.aggregate(pipeline_stats))
-    
-    # construction d'un dictionnaire pour mapper les stats par arrêt
-    stats_map = {}
-    for s in stats_raw:
-        aid = s['_id']['id_arret']
-        ctype = s['_id']['type']
-        if aid not in stats_map: stats_map[aid] = {}
-        stats_map[aid][ctype] = s['moyenne']
-
-    def enrich_arret(row):
-        """
-        enrichissement d'une ligne d'arrêt avec les mesures environnementales
-        
-        Args:
-            row (pd.Series): ligne contenant les infos de base de l'arrêt
-        
-        Returns:
-            pd.Series: série avec co2, bruit et température
-        """
-        aid = row['_id']
-        stats = stats_map.get(aid, {})
-        return pd.Series({
-            'CO2': stats.get('CO2', None),
-            'Bruit': stats.get('db', stats.get('Bruit', None)),
-            'Temp': stats.get('°C', stats.get('Temperature', None))
-        })
-
-    stats_df = df_arrets.apply(enrich_arret, axis=1)
-    return pd.concat([df_arrets, stats_df], axis=1)
-
-@st.cache_data(ttl=3600)
-def get_quartiers_pollution_real():
-    """
-    données de pollution par quartier via agrégation
-    
+    return donnees_dashboard.arrets_carte(db, version, nom_ligne_filtre, rollups)
+
+@st.cache_data
+def get_page_arrets(version, nom_ligne_filtre=None, page=0, rollups=False):
+    """
+    une page du tableau détaillé des arrêts
+
+    Args:
+        version (str or None): version des données (clé des caches)
+        nom_ligne_filtre (str, optional): filtre sur une ligne spécifique
+        page (int): numéro de page (à partir de 0)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
     Returns:
-        tuple: (liste des quartiers avec géométrie, dataframe avec nom et co2 moyen)
+        tuple: (dataframe de la page, nombre total d'arrêts)
     """
-    quartiers = list(db.Quartiers.find({}, {"nom": 1, "geometry": 1, "_id": 1}))
-    
-    # pipeline d'agrégation pour lier mesures et quartiers via le réseau
-    pipeline = [
-        {"$match": {"type_capteur": "CO2"}},
-        {"$lookup": {
-            "from": "Reseau",
-            "localField": "id_arret",
-            "foreignField": "arrets.id_arret",
-            "as": "reseau"
-        }},
-        {"$unwind": "$reseau"},
-        {"$unwind": "$reseau.arrets"},
-        
-        {"$match": {"$expr": {"$eq": ["$id_arret", "$reseau.arrets.id_arret"]}}},
-        
-        {"$unwind": "$reseau.arrets.quartiers_ids"},
-        
-        {"$group": {
-            "_id": "$reseau.arrets.quartiers_ids",
-            "avg_co2": {"$avg": "$valeur"}
-        }}
-    ]
-    
-    df_res = pd.DataFrame(list(db.Mesures.aggregate(pipeline)))
-    
-    # construction des données pour la carte choroplèthe
-    data_choropleth = []
-    if not df_res.empty:
-        dict_co2 = dict(zip(df_res['_id'], df_res['avg_co2']))
-        
-        # itération sur chaque quartier pour récupérer sa valeur de pollution
-        for q in quartiers:
-            val = dict_co2.get(q['_id'], 0) 
-            if val > 0:
-                data_choropleth.append({"nom": q['nom'], "co2": val})
-    
-    return quartiers, pd.DataFrame(data_choropleth)
+    return donnees_dashboard.page_arrets(db, version, nom_ligne_filtre, page, rollups=rollups)
 
-@st.cache_data(ttl=3600)
-def get_types_incidents():
+@st.cache_data
+def get_quartiers_pollution_real(version, rollups=False):
     """
-    top 5 des types d'incidents les plus fréquents
-    
+    données de pollution par quartier
+
+    Args:
+        version (str or None): version des données (clé des caches)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
     Returns:
-        pd.DataFrame: dataframe avec description d'incident et comptage
+        pd.DataFrame: dataframe avec nom et co2 moyen
     """
-    pipeline = [
-        {"$match": {"incidents": {"$exists": True, "$ne": []}}},
-        {"$unwind": "$incidents"},
-        {"$group": {"_id": "$incidents.description", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 5}
-    ]
-    return pd.DataFrame(list(db.TraficEvents.aggregate(pipeline)))
+    return donnees_dashboard.quartiers_pollution(db, version, rollups)
+
+# --- CARTES PRÉ-RENDUES ---
+# chaque carte est rendue une fois en html par version des données et par filtre,
+# puis affichée telle quelle : une nouvelle exécution du script ne reconstruit aucun
+# objet folium. les arrêts sont transmis en tableau compact et leurs marqueurs créés
+# par le navigateur (FastMarkerCluster) ; seuils co2 : vert < 400, orange < 600 ppm.
+MARQUEUR_ARRET = """
+function (row) {
+    var co2 = row[4];
+    var couleur = co2 === null ? "lightgray" : co2 < 400 ? "green" : co2 < 600 ? "orange" : "red";
+    var texte = function (v, unite, decimales) { return v === null ? "N/A" : v.toFixed(decimales) + " " + unite; };
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]),
+        {radius: 7, color: couleur, fillColor: couleur, fillOpacity: 0.8, weight: 1});
+    marker.bindPopup(
+        '<div style="font-family: sans-serif; width: 150px;"><b>' + row[2] + '</b><br>'
+        + '<hr style="margin: 5px 0;">Nombre lignes : ' + row[3] + '<br>'
+        + 'CO2 : ' + texte(row[4], "ppm", 0) + '<br>'
+        + 'Bruit : ' + texte(row[5], "dB", 0) + '<br>'
+        + 'Temp : ' + texte(row[6], "°C", 1) + '</div>',
+        {maxWidth: 200});
+    return marker;
+}
+"""
 
+@st.cache_data
+def get_carte_arrets(version, nom_ligne_filtre=None, rollups=False):
+    """
+    carte des arrêts rendue en html (marqueurs créés côté client)
+
+    Args:
+        version (str or None): version des données (clé des caches)
+        nom_ligne_filtre (str, optional): filtre sur une ligne spécifique
+        rollups (bool): lecture depuis les agrégats pré-calculés
 
+    Returns:
+        str: page html de la carte
+    """
+    df_arrets = get_arrets_data(version, nom_ligne_filtre, rollups)
+    m1 = folium.Map(location=[48.8566, 2.3522], zoom_start=12, tiles="OpenStreetMap")
+    FastMarkerCluster(geo_carte.points_arrets(df_arrets), callback=MARQUEUR_ARRET).add_to(m1)
+    return m1.get_root().render()
+
+@st.cache_data
+def get_carte_quartiers(version, rollups=False):
+    """
+    carte choroplèthe de pollution par quartier rendue en html
+
+    les contours simplifiés sont lus dans le cache partagé (geo_carte).
+
+    Args:
+        version (str or None): version des données (clé des caches)
+        rollups (bool): lecture depuis les agrégats pré-calculés
+
+    Returns:
+        str or None: page html de la carte, None sans géométrie valide
+    """
+    geo_data = json.loads(geo_carte.geojson_quartiers(db, version))
+    if not geo_data["features"]:
+        return None
+    m2 = folium.Map(location=[48.8566, 2.3522], zoom_start=12, tiles="OpenStreetMap")
+    folium.Choropleth(
+        geo_data=geo_data,
+        name="choropleth",
+        data=get_quartiers_pollution_real(version, rollups),
+        columns=["nom", "co2"],
+        key_on="feature.properties.nom",
+        fill_color="YlOrRd",
+        fill_opacity=0.7,
+        line_opacity=0.2,
+        legend_name="Niveau CO2 Moyen"
+    ).add_to(m2)
+    return m2.get_root().render()
 
 # --- GESTION DES FICHIERS CSV ---
 def get_csv_file(lettre, type_db):
@@ -322,13 +318,41 @@ def get_csv_file(lettre, type_db):
     """
     # conversion en majuscule et construction du nom de fichier
     lettre_maj = lettre.upper()
-    filename = f"{lettre_maj}_{type_db}.csv"
+    filename = os.path.join(DOSSIER_CSV, f"{lettre_maj}_{type_db}.csv")
     
     if os.path.exists(filename):
         return pd.read_csv(filename)
     else:
         return None
 
+def empreinte_csv(lettre):
+    """
+    dates de modification des deux fichiers d'une requête (clé du cache de comparaison)
+
+    Args:
+        lettre (str): identifiant de la requête (a-n)
+
+    Returns:
+        tuple: date de modification de chaque fichier, None si absent
+    """
+    chemins = [os.path.join(DOSSIER_CSV, f"{lettre.upper()}_{type_db}.csv") for type_db in ("sql", "nosql")]
+    return tuple(os.path.getmtime(c) if os.path.exists(c) else None for c in chemins)
+
+@st.cache_data
+def get_comparaison(lettre, ordre, empreinte):
+    """
+    comparaison automatique des résultats sql et nosql d'une requête
+
+    Args:
+        lettre (str): identifiant de la requête (a-n)
+        ordre (bool): vérification de l'ordre des lignes
+        empreinte (tuple): dates de modification des fichiers (clé du cache)
+
+    Returns:
+        dict: rapport de comparaison (statut, compteurs, premières lignes différentes)
+    """
+    return comparer_requete(lettre, DOSSIER_CSV, ordre=ordre)
+
 # dictionnaire de correspondance entre identifiant et titre de requête (mapping)
 REQUETES_MAP = {
     "a": "a. Moyenne des retards par ligne",
@@ -350,25 +374,39 @@ REQUETES_MAP = {
 
 # --- 3. MISE EN PAGE ---
 
-# affichage des indicateurs clés (kpi) en colonnes
-k1, k2, k3 = st.columns(3)
-lignes, incidents, co2 = get_kpis()
-k1.metric("Lignes actives", lignes)
-k2.metric("Incidents totaux", incidents)
-k3.metric("CO2 moyen (ppm)", f"{co2:.1f}")
+# lecture depuis les agrégats pré-calculés lorsque la migration les a construits
+rollups_dispo = bool(lire_schema(db).get("rollups"))
+utiliser_rollups = st.sidebar.checkbox(
+    "Agrégats pré-calculés (rollups)",
+    value=rollups_dispo,
+    disabled=not rollups_dispo,
+    help="stats_ligne_jour et stats_arret_capteur, construits par partie_2_migration.py --rollups"
+)
+
+# création des onglets de navigation : seul l'onglet affiché est exécuté et charge ses données
+# (st.tabs exécuterait le contenu de tous les onglets à chaque interaction)
+ONGLETS = ["Analyses & Stats", "Cartographie", "Comparateur (CSV)"]
+onglet = st.radio("Onglet", ONGLETS, horizontal=True, label_visibility="collapsed", key="onglet")
 
-st.markdown("---")
+# types de capteurs du graphique de tendance et leurs unités
+UNITES_TENDANCE = {"CO2": "ppm", "Bruit": "dB", "Temp": "°C"}
 
-# création des onglets de navigation
-tab_graph, tab_map, tab_compare = st.tabs(["Analyses & Stats", "Cartographie", "Comparateur (CSV)"])
+st.markdown("---")
 
 # --- ONGLET 1 : GRAPHIQUES ---
-with tab_graph:
+if onglet == "Analyses & Stats":
+    # affichage des indicateurs clés (kpi) en colonnes
+    k1, k2, k3 = st.columns(3)
+    lignes, incidents, co2 = get_kpis(VERSION, utiliser_rollups)
+    k1.metric("Lignes actives", lignes)
+    k2.metric("Incidents totaux", incidents)
+    k3.metric("CO2 moyen (ppm)", f"{co2:.1f}")
+
     c1, c2 = st.columns(2)
     
     with c1:
         st.subheader("Retards moyens par ligne")
-        df_retard = get_retards_par_ligne()
+        df_retard = get_retards_par_ligne(VERSION, utiliser_rollups)
         if not df_retard.empty:
             fig = px.bar(df_retard, x="nom_ligne", y="retard_moyen", 
                          labels={"retard_moyen": "Minutes"},
@@ -379,7 +417,7 @@ with tab_graph:
             
     with c2:
         st.subheader("Répartition véhicules (par type)")
-        df_veh = get_repartition_vehicules()
+        df_veh = get_repartition_vehicules(VERSION)
         if not df_veh.empty:
             fig = px.pie(df_veh, values="count", names="_id", hole=0.4, 
                          color_discrete_sequence=px.colors.qualitative.Pastel)
@@ -389,7 +427,7 @@ with tab_graph:
     c3, c4 = st.columns(2)
     with c3:
         st.subheader("Types d'incidents fréquents")
-        df_inc = get_types_incidents()
+        df_inc = get_types_incidents(VERSION)
         if not df_inc.empty:
             fig_inc = px.bar(df_inc, x="count", y="_id", orientation='h', 
                              labels={"_id": "Cause", "count": "Nombre"},
@@ -398,19 +436,48 @@ with tab_graph:
 
 
     with c4:
-        st.subheader("Évolution CO2 (capteurs)")
-        df_co2 = get_emissions_co2_trend()
-        if not df_co2.empty:
-            fig_line = px.line(df_co2, x="date", y="valeur", title="Relevés CO2 bruts")
-            fig_line.update_traces(line_color="#003366") 
-            st.plotly_chart(fig_line, use_container_width=True)
+        st.subheader("Évolution des mesures (capteurs)")
+        colonne = st.selectbox("Capteur", UNITES_TENDANCE, key="capteur_tendance")
+        date_min, date_max = get_bornes_mesures(VERSION, colonne)
+        if date_min is not None:
+            periode = st.date_input(
+                "Période", value=(date_min.date(), date_max.date()),
+                min_value=date_min.date(), max_value=date_max.date(), key="periode_tendance"
+            )
+            methode = st.radio(
+                "Intervalles", ["calendrier", "effectifs"], horizontal=True, key="methode_tendance",
+                help="pas de temps fixe ou nombre de relevés égal par intervalle"
+            )
+            # sélection en cours (une seule date) : la période attend sa date de fin
+            if len(periode) == 2:
+                debut = datetime.combine(periode[0], time.min)
+                fin = datetime.combine(periode[1] + timedelta(days=1), time.min)
+                df_tendance = get_tendance_mesures(VERSION, colonne, debut, fin, methode)
+                if not df_tendance.empty:
+                    titre = f"{colonne} ({UNITES_TENDANCE[colonne]})"
+                    if "moyenne" in df_tendance:
+                        # bande min-max de chaque intervalle autour de la moyenne
+                        fig_line = go.Figure([
+                            go.Scatter(x=df_tendance["date"], y=df_tendance["max"], mode="lines",
+                                       line_width=0, showlegend=False, name="max"),
+                            go.Scatter(x=df_tendance["date"], y=df_tendance["min"], mode="lines",
+                                       line_width=0, fill="tonexty", fillcolor="rgba(0, 51, 102, 0.2)",
+                                       name="min - max"),
+                            go.Scatter(x=df_tendance["date"], y=df_tendance["moyenne"], mode="lines",
+                                       line_color="#003366", name="moyenne"),
+                        ])
+                        fig_line.update_layout(title=titre)
+                    else:
+                        fig_line = px.line(df_tendance, x="date", y="valeur", title=f"{titre} - relevés bruts")
+                        fig_line.update_traces(line_color="#003366")
+                    st.plotly_chart(fig_line, use_container_width=True)
 
     
 
 # --- ONGLET 2 : CARTES ---
-with tab_map:
+elif onglet == "Cartographie":
     # sélecteur de ligne pour filtrage des arrêts
-    lignes_dispo = ["Toutes"] + sorted(db.Reseau.distinct("nom_ligne"))
+    lignes_dispo = ["Toutes"] + get_noms_lignes(VERSION)
     choix_ligne = st.selectbox("Filtrer les arrêts par ligne :", lignes_dispo)
     
     col_map1, col_map2 = st.columns(2)
@@ -418,52 +485,22 @@ with tab_map:
     # --- carte 1 : visualisation des arrêts avec indicateurs ---
     with col_map1:
         st.markdown("### Arrêts & Indicateurs")
-        df_arrets = get_arrets_data(choix_ligne)
+        df_arrets = get_arrets_data(VERSION, choix_ligne, utiliser_rollups)
         
         if not df_arrets.empty:
-            m1 = folium.Map(location=[48.8566, 2.3522], zoom_start=12, tiles="OpenStreetMap")
-            marker_cluster = MarkerCluster().add_to(m1)
-            
-            # itération sur chaque arrêt pour création des marqueurs
-            for _, row in df_arrets.iterrows():
-                # gestion des valeurs manquantes dans les mesures
-                txt_co2 = f"{row['CO2']:.0f} ppm" if pd.notnull(row['CO2']) else "N/A"
-                txt_bruit = f"{row['Bruit']:.0f} dB" if pd.notnull(row['Bruit']) else "N/A"
-                txt_temp = f"{row['Temp']:.1f} °C" if pd.notnull(row['Temp']) else "N/A"
-                
-                # détermination de la couleur du marqueur selon le niveau de co2
-                if pd.notnull(row['CO2']):
-                    val = float(row['CO2'])
-                    color = "green" if val < 400 else "orange" if val < 600 else "red"
-                else:
-                    color = "lightgray"
-
-                nb_lignes = int(row['lignes_desservies'])
-                
-                popup_txt = f"""
-                <div style="font-family: sans-serif; width: 150px;">
-                    <b>{row['nom']}</b><br>
-                    <hr style="margin: 5px 0;">
-                    Nombre lignes : {nb_lignes}<br>
-                    CO2 : {txt_co2}<br>
-                    Bruit : {txt_bruit}<br>
-                    Temp : {txt_temp}
-                </div>
-                """
-                
-                folium.Marker(
-                    location=[row['lat'], row['lon']],
-                    popup=folium.Popup(popup_txt, max_width=200),
-                    icon=folium.Icon(color=color, icon="info-sign")
-                ).add_to(marker_cluster)
-            
-            st_folium(m1, width=None, height=500)
-
-            with st.expander(f"Voir le détail des arrêts ({len(df_arrets)})", expanded=False):
-                st.dataframe(
-                    df_arrets[['nom', 'lignes_desservies', 'CO2', 'Bruit', 'Temp']],
-                    use_container_width=True
-                )
+            components.html(get_carte_arrets(VERSION, choix_ligne, utiliser_rollups), height=500)
+
+            # tableau détaillé paginé côté serveur, chargé seulement à l'ouverture
+            if st.checkbox(f"Voir le détail des arrêts ({len(df_arrets)})", value=False):
+                nb_pages = max(1, -(-len(df_arrets) // donnees_dashboard.TAILLE_PAGE_ARRETS))
+                page = st.number_input("Page", min_value=1, max_value=nb_pages, value=1, step=1)
+                df_page, total = get_page_arrets(VERSION, choix_ligne, int(page) - 1, utiliser_rollups)
+                if not df_page.empty:
+                    st.dataframe(
+                        df_page[['nom', 'lignes_desservies', 'CO2', 'Bruit', 'Temp']],
+                        use_container_width=True
+                    )
+                st.caption(f"Page {int(page)} / {nb_pages} ({total} arrêts)")
         else:
             st.warning("Aucun arrêt trouvé pour cette sélection.")
 
@@ -471,74 +508,73 @@ with tab_map:
     with col_map2:
         st.markdown("### Pollution par Quartier (CO2)")
         
-        quartiers_geo, df_choro = get_quartiers_pollution_real()
-        
-        # construction du geojson pour la carte
-        geo_data = {
-            "type": "FeatureCollection",
-            "features": []
-        }
-        # conversion des quartiers en features geojson
-        for q in quartiers_geo:
-            if q.get('geometry'):
-                feature = {
-                    "type": "Feature",
-                    "properties": {"nom": q['nom']},
-                    "geometry": q['geometry']
-                }
-                geo_data['features'].append(feature)
-        
-        if geo_data['features']:
-            m2 = folium.Map(location=[48.8566, 2.3522], zoom_start=12, tiles="OpenStreetMap")
-            
-            folium.Choropleth(
-                geo_data=geo_data,
-                name="choropleth",
-                data=df_choro,
-                columns=["nom", "co2"],
-                key_on="feature.properties.nom",
-                fill_color="YlOrRd",
-                fill_opacity=0.7,
-                line_opacity=0.2,
-                legend_name="Niveau CO2 Moyen"
-            ).add_to(m2)
-            
-            st_folium(m2, width=None, height=500)
+        html_quartiers = get_carte_quartiers(VERSION, utiliser_rollups)
+        if html_quartiers is not None:
+            components.html(html_quartiers, height=500)
         else:
             st.error("Données géographiques invalides.")
 
-# --- ONGLET 3 : COMPARATEUR STATIQUE ---
-with tab_compare:
+# --- ONGLET 3 : COMPARATEUR ---
+elif onglet == "Comparateur (CSV)":
     st.header("Validation de la Migration (Source vs Cible)")
-    st.markdown("Comparaison des résultats stockés dans les fichiers CSV.")
-    
+    st.markdown("Comparaison automatique des résultats stockés dans les fichiers CSV : "
+                "lignes alignées sur leur clé, tolérance sur les nombres, ordre vérifié aux égalités près.")
+
+    verifier_ordre = st.checkbox("Vérifier l'ordre des lignes", value=True)
+    rapports = {
+        lettre: get_comparaison(lettre, verifier_ordre, empreinte_csv(lettre))
+        for lettre in REQUETES_MAP
+    }
+
+    # vue d'ensemble des 14 requêtes
+    df_synthese = synthese(rapports)
+    nb_ok = int((df_synthese["statut"] == "OK").sum())
+    st.metric("Requêtes identiques", f"{nb_ok} / {len(df_synthese)}")
+    st.dataframe(df_synthese, use_container_width=True)
+
+    st.divider()
+
     col_sel, _ = st.columns([1, 2])
     with col_sel:
-        # sélecteur de requête à comparer
+        # sélecteur de requête à détailler
         choix_titre = st.selectbox("Choisir la requête de test :", list(REQUETES_MAP.values()))
         # extraction de l'identifiant de la requête sélectionnée
         choix_lettre = [k for k, v in REQUETES_MAP.items() if v == choix_titre][0]
 
-    st.divider()
-    
-    c_sql, c_nosql = st.columns(2)
-    
-    # --- affichage des résultats sql ---
-    with c_sql:
-        st.subheader("SQL (Origine)")
-        df_sql = get_csv_file(choix_lettre, "sql")
-        if df_sql is not None:
-            st.dataframe(df_sql, use_container_width=True)
-            st.success(f"Fichier chargé : {choix_lettre.upper()}_sql.csv")
-        else:
-            st.warning(f"Fichier '{choix_lettre.upper()}_sql.csv' manquant.")
-
-    # --- affichage des résultats nosql ---
-    with c_nosql:
-        st.subheader("NoSQL (MongoDB)")
-        df_nosql = get_csv_file(choix_lettre, "nosql")
-        if df_nosql is not None:
-            st.dataframe(df_nosql, use_container_width=True)
-            st.success(f"Fichier chargé : {choix_lettre.upper()}_nosql.csv")
-        else:
-            st.warning(f"Fichier '{choix_lettre.upper()}_nosql.csv' manquant.")
\ No newline at end of file
+    rapport = rapports[choix_lettre]
+    if rapport["statut"] == "OK":
+        st.success(f"Requête {choix_lettre.upper()} : résultats identiques ({rapport['lignes_sql']} lignes).")
+    elif rapport["statut"] == "ABSENT":
+        st.warning(rapport["message"])
+    else:
+        st.error(f"Requête {choix_lettre.upper()} : {rapport.get('message', 'résultats différents')}")
+        if "absentes" in rapport:
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Absentes NoSQL", rapport["absentes"])
+            m2.metric("En trop NoSQL", rapport["en_trop"])
+            m3.metric("Valeurs différentes", rapport["valeurs"])
+            m4.metric("Mal placées", rapport["mal_placees"])
+        if not rapport["exemples"].empty:
+            st.markdown("**Premières lignes différentes**")
+            st.dataframe(rapport["exemples"], use_container_width=True)
+        if not rapport["exemples_ordre"].empty:
+            st.markdown("**Premières lignes mal placées**")
+            st.dataframe(rapport["exemples_ordre"], use_container_width=True)
+
+    # fichiers bruts côte à côte, pour consultation
+    with st.expander("Voir les fichiers CSV", expanded=False):
+        c_sql, c_nosql = st.columns(2)
+        with c_sql:
+            st.subheader("SQL (Origine)")
+            df_sql = get_csv_file(choix_lettre, "sql")
+            if df_sql is not None:
+                st.dataframe(df_sql, use_container_width=True)
+            else:
+                st.warning(f"Fichier '{choix_lettre.upper()}_sql.csv' manquant.")
+        with c_nosql:
+            st.subheader("NoSQL (MongoDB)")
+            df_nosql = get_csv_file(choix_lettre, "nosql")
+            if df_nosql is not None:
+                st.dataframe(df_nosql, use_container_width=True)
+            else:
+                st.warning(f"Fichier '{choix_lettre.upper()}_nosql.csv' manquant.")
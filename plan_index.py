@@ -0,0 +1,189 @@
+import sys
+import pymongo
+from pymongo import IndexModel
+
+from partie_3_req_nosql import REQUETES, lire_schema, renommer_champ, requetes_pour_schema
+
+# ==============================================================================
+# Plan d'index déduit du catalogue de requêtes (partie 3) et du dashboard
+# ==============================================================================
+# collection -> liste des index, avec les requêtes qui les utilisent.
+# un index composé sert aussi les requêtes sur son préfixe : {type_capteur, id_arret}
+# couvre donc les $match sur type_capteur seul (D, E, J, M).
+PLAN_INDEX = {
+    "Quartiers": [
+        # requêtes géographiques ($geoIntersects)
+        {"cles": [("geometry", "2dsphere")], "requetes": ["geo"]},
+    ],
+    "Reseau": [
+        # foreignField des $lookup Mesures -> Reseau
+        {"cles": [("arrets.id_arret", 1)], "requetes": ["d", "e", "i", "j", "dashboard"]},
+    ],
+    "TraficEvents": [
+        # foreignField des $lookup par ligne -> TraficEvents
+        {"cles": [("id_ligne", 1)], "requetes": ["i"]},
+        # $match sur les retards > 10 min
+        {"cles": [("retard_minutes", 1)], "requetes": ["f"]},
+    ],
+    "Mesures": [
+        # $match par type puis regroupement par arrêt (i)
+        # (les variantes dénormalisées de d, e, i, j n'utilisent que le préfixe type_capteur)
+        {"cles": [("type_capteur", 1), ("id_arret", 1)], "requetes": ["d", "e", "i", "j", "m"]},
+        # séries temporelles par type (bornes et intervalles de la tendance du dashboard)
+        {"cles": [("type_capteur", 1), ("date", 1)], "requetes": ["dashboard"]},
+        # statistiques des arrêts de la ligne sélectionnée sur la carte ($match id_arret $in)
+        {"cles": [("id_arret", 1)], "requetes": ["dashboard"]},
+        {"cles": [("localisation", "2dsphere")], "requetes": ["geo"]},
+        # clé source (rowid) des mesures : upsert de la migration incrémentale et
+        # sélection des nouvelles mesures par les rollups
+        {"cles": [("id_mesure", 1)], "requetes": ["migration"]},
+    ],
+    "Horaires": [
+        # filtres par ligne hors catalogue (index historique de la migration)
+        {"cles": [("id_ligne", 1)], "requetes": []},
+    ],
+}
+
+# collections volumineuses sur lesquelles un parcours complet est interdit
+GRANDES_COLLECTIONS = {"TraficEvents", "Mesures", "Horaires"}
+
+# requêtes qui agrègent volontairement toute leur collection (pas de $match initial sélectif)
+PARCOURS_COMPLETS = {
+    "g": "heure_effective renseignée pour presque toutes les lignes",
+}
+
+def plan_pour_schema(schema, plan=PLAN_INDEX):
+    """
+    plan d'index adapté au schéma de la base migrée
+
+    en collection de séries temporelles, les champs du capteur des index de Mesures
+    sont lus dans le metaField.
+
+    Args:
+        schema (dict): options lues par lire_schema
+        plan (dict): plan d'index écrit pour la collection Mesures à plat
+
+    Returns:
+        dict: collection -> liste des index
+    """
+    if not schema.get("serie_temporelle"):
+        return plan
+    mesures = [
+        {**index, "cles": [(renommer_champ(champ), sens) for champ, sens in index["cles"]]}
+        for index in plan["Mesures"]
+    ]
+    return {**plan, "Mesures": mesures}
+
+def creer_index(db, plan=PLAN_INDEX):
+    """
+    construction de tous les index du plan, en une passe par collection
+
+    à lancer une fois le chargement terminé : les insertions ne paient pas
+    la maintenance des index, et createIndexes construit tous les index
+    d'une collection en un seul parcours.
+
+    Args:
+        db (pymongo.database.Database): base mongodb cible
+        plan (dict): collection -> liste des index
+
+    Returns:
+        dict: collection -> noms des index créés
+    """
+    crees = {}
+    for collection, index_list in plan.items():
+        modeles = [IndexModel(index["cles"]) for index in index_list]
+        crees[collection] = db[collection].create_indexes(modeles)
+    return crees
+
+def parcours_complet_attendu(lettre, requete):
+    """
+    indique si la requête doit parcourir toute sa collection par construction
+
+    Args:
+        lettre (str): identifiant de la requête
+        requete (dict): entrée du catalogue REQUETES
+
+    Returns:
+        bool: True si la première étape n'est pas un $match ou si la requête est exemptée
+    """
+    return lettre in PARCOURS_COMPLETS or "$match" not in requete["pipeline"][0]
+
+def collections_parcourues(explain, collection):
+    """
+    recherche des parcours complets de collection dans un plan explain
+
+    couvre le plan principal (COLLSCAN), les jointures SBE (EQ_LOOKUP sans index)
+    et les statistiques des étapes $lookup classiques (collectionScans).
+
+    Args:
+        explain (dict): résultat de la commande explain
+        collection (str): collection interrogée par le pipeline
+
+    Returns:
+        set: collections parcourues intégralement
+    """
+    scans = set()
+
+    def visiter(noeud):
+        if isinstance(noeud, list):
+            for valeur in noeud:
+                visiter(valeur)
+            return
+        if not isinstance(noeud, dict):
+            return
+        if noeud.get("stage") == "COLLSCAN":
+            scans.add(collection)
+        if noeud.get("stage") == "EQ_LOOKUP" and noeud.get("strategy") in ("NestedLoopJoin", "HashJoin"):
+            scans.add(noeud.get("foreignCollection", "").split(".", 1)[-1])
+        if "$lookup" in noeud and noeud.get("collectionScans", 0) > 0:
+            scans.add(noeud["$lookup"]["from"])
+        for cle, valeur in noeud.items():
+            # les plans rejetés ne sont pas exécutés
+            if cle not in ("rejectedPlans", "allPlansExecution"):
+                visiter(valeur)
+
+    visiter(explain)
+    return scans
+
+def verifier_plans(db, requetes=REQUETES):
+    """
+    explain de chaque pipeline et détection des parcours complets de grandes collections
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée et indexée
+        requetes (dict): catalogue des requêtes de la partie 3
+
+    Returns:
+        dict: lettre -> liste des grandes collections parcourues à tort
+    """
+    anomalies = {}
+    for lettre, requete in requetes.items():
+        explain = db.command(
+            "explain",
+            {"aggregate": requete["collection"], "pipeline": requete["pipeline"], "cursor": {}},
+            verbosity="executionStats"
+        )
+        scans = collections_parcourues(explain, requete["collection"]) & GRANDES_COLLECTIONS
+        if parcours_complet_attendu(lettre, requete):
+            scans.discard(requete["collection"])
+        anomalies[lettre] = sorted(scans)
+    return anomalies
+
+if __name__ == "__main__":
+    client = pymongo.MongoClient("mongodb://localhost:27017/")
+    db = client["Paris2055"]
+
+    schema = lire_schema(db)
+    if "--creer" in sys.argv:
+        for collection, noms in creer_index(db, plan_pour_schema(schema)).items():
+            print(f"Index {collection:<15} : {', '.join(noms)}")
+
+    print("--- Vérification des plans d'exécution (partie 3) ---")
+    anomalies = verifier_plans(db, requetes_pour_schema(schema))
+    for lettre, scans in anomalies.items():
+        statut = "OK" if not scans else f"COLLSCAN sur {', '.join(scans)}"
+        print(f"Requete {lettre.upper()} : {statut}")
+    client.close()
+
+    # code de retour non nul si une requête parcourt une grande collection
+    sys.exit(1 if any(anomalies.values()) else 0)
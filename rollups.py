@@ -0,0 +1,341 @@
+import time
+import pymongo
+
+from cache_resultats import ecrire_version
+from partie_3_req_nosql import (
+    STATS_ARRET_CAPTEUR, STATS_LIGNE_JOUR, adapter_serie_temporelle, lire_schema
+)
+
+# ==============================================================================
+# Agrégats pré-calculés (rollups) maintenus par la migration
+# ==============================================================================
+# stats_ligne_jour    : _id {id_ligne, jour}, cumuls du trafic (TraficEvents) et des horaires (Horaires)
+# stats_arret_capteur : _id {id_arret, id_capteur, type_capteur}, cumuls des mesures (Mesures)
+#
+# chaque entrée ne contient que des sommes, comptages, min et max : un nouveau lot de
+# documents bruts s'y ajoute par $merge sans relire les lots précédents.
+#
+# ces ajouts ne sont pas idempotents : les plages de high-water marks cumulées sont
+# enregistrées dans MigrationMeta (document "rollups"), marquées non terminées pendant
+# la mise à jour. une plage déjà cumulée n'est pas ajoutée une seconde fois, et des
+# cumuls interrompus ou décalés par rapport aux marques sont reconstruits.
+COLLECTIONS_ROLLUPS = [STATS_LIGNE_JOUR, STATS_ARRET_CAPTEUR]
+META_ROLLUPS = "rollups"
+
+def etape_merge(collection, sommes, minimums=(), maximums=()):
+    """
+    étape $merge qui ajoute les cumuls calculés à ceux déjà présents
+
+    Args:
+        collection (str): collection de rollup cible
+        sommes (list): champs additionnés (absents comptés à 0)
+        minimums (list): champs dont on garde le minimum
+        maximums (list): champs dont on garde le maximum
+
+    Returns:
+        dict: étape $merge
+    """
+    cumul = {
+        champ: {"$add": [{"$ifNull": [f"${champ}", 0]}, {"$ifNull": [f"$$new.{champ}", 0]}]}
+        for champ in sommes
+    }
+    cumul.update({champ: {"$min": [f"${champ}", f"$$new.{champ}"]} for champ in minimums})
+    cumul.update({champ: {"$max": [f"${champ}", f"$$new.{champ}"]} for champ in maximums})
+    return {
+        "$merge": {
+            "into": collection,
+            "on": "_id",
+            "whenMatched": [{"$set": cumul}],
+            "whenNotMatched": "insert"
+        }
+    }
+
+# nombre d'incidents d'un document trafic
+NB_INCIDENTS = {"$size": {"$ifNull": ["$incidents", []]}}
+
+def pipeline_trafic(filtre):
+    """
+    cumuls du trafic par ligne et par jour
+
+    Args:
+        filtre (dict): documents TraficEvents à cumuler
+
+    Returns:
+        list: pipeline sur TraficEvents
+    """
+    return [
+        {"$match": filtre},
+        {"$group": {
+            "_id": {"id_ligne": "$id_ligne", "jour": {"$dateTrunc": {"date": "$horodatage", "unit": "day"}}},
+            "nb_trafic": {"$sum": 1},
+            "somme_retard": {"$sum": "$retard_minutes"},
+            "nb_incidents": {"$sum": NB_INCIDENTS},
+            # requête f : retards > 10 min sans incident
+            "nb_retard_sans_incident": {"$sum": {"$cond": [
+                {"$and": [{"$gt": ["$retard_minutes", 10]}, {"$eq": [NB_INCIDENTS, 0]}]}, 1, 0
+            ]}}
+        }},
+        etape_merge(STATS_LIGNE_JOUR, ["nb_trafic", "somme_retard", "nb_incidents", "nb_retard_sans_incident"]),
+    ]
+
+def pipeline_incidents_tardifs(dernier_trafic, depuis, jusqu_a):
+    """
+    correction des cumuls pour les incidents ajoutés à des trafics déjà cumulés
+
+    Args:
+        dernier_trafic (int): dernier id_trafic déjà cumulé
+        depuis (int): dernier id_incident déjà cumulé
+        jusqu_a (int): dernier id_incident migré
+
+    Returns:
+        list: pipeline sur TraficEvents
+    """
+    nouveaux = {"$size": {"$filter": {
+        "input": "$incidents",
+        "as": "inc",
+        "cond": {"$and": [{"$gt": ["$$inc.id_incident", depuis]}, {"$lte": ["$$inc.id_incident", jusqu_a]}]}
+    }}}
+    return [
+        {"$match": {
+            "_id": {"$lte": dernier_trafic},
+            "incidents": {"$elemMatch": {"id_incident": {"$gt": depuis, "$lte": jusqu_a}}}
+        }},
+        {"$project": {
+            "id_ligne": 1,
+            "horodatage": 1,
+            "retard_minutes": 1,
+            "nb_nouveaux": nouveaux,
+            "nb_total": NB_INCIDENTS
+        }},
+        {"$group": {
+            "_id": {"id_ligne": "$id_ligne", "jour": {"$dateTrunc": {"date": "$horodatage", "unit": "day"}}},
+            "nb_incidents": {"$sum": "$nb_nouveaux"},
+            # un retard > 10 min qui n'avait aucun incident sort du décompte de f
+            "nb_retard_sans_incident": {"$sum": {"$cond": [
+                {"$and": [{"$gt": ["$retard_minutes", 10]}, {"$eq": ["$nb_total", "$nb_nouveaux"]}]}, -1, 0
+            ]}}
+        }},
+        etape_merge(STATS_LIGNE_JOUR, ["nb_incidents", "nb_retard_sans_incident"]),
+    ]
+
+def pipeline_horaires(filtre):
+    """
+    cumuls des passagers et de la ponctualité par ligne et par jour
+
+    Args:
+        filtre (dict): documents Horaires à cumuler
+
+    Returns:
+        list: pipeline sur Horaires
+    """
+    effectif = {"$ne": [{"$ifNull": ["$heure_effective", None]}, None]}
+    return [
+        {"$match": filtre},
+        {"$group": {
+            "_id": {"id_ligne": "$id_ligne", "jour": {"$dateTrunc": {"date": "$heure_effective", "unit": "day"}}},
+            "nb_horaires": {"$sum": 1},
+            "passagers": {"$sum": "$passagers_estimes"},
+            "nb_effectifs": {"$sum": {"$cond": [effectif, 1, 0]}},
+            "nb_ponctuels": {"$sum": {"$cond": [
+                {"$and": [effectif, {"$lte": ["$heure_effective", "$heure_prevue"]}]}, 1, 0
+            ]}}
+        }},
+        etape_merge(STATS_LIGNE_JOUR, ["nb_horaires", "passagers", "nb_effectifs", "nb_ponctuels"]),
+    ]
+
+def aplatir_buckets(pipeline, filtre):
+    """
+    réécriture d'un pipeline Horaires pour des documents regroupés en buckets
+
+    seuls les buckets contenant des passages sélectionnés sont dépliés, puis chaque
+    passage reprend la forme d'un document Horaires à plat.
+
+    Args:
+        pipeline (list): pipeline écrit pour Horaires à plat, commençant par $match
+        filtre (dict): filtre des passages sur leur _id (id_horaire)
+
+    Returns:
+        list: pipeline sur les buckets
+    """
+    # présélection des buckets (le $match d'origine filtre ensuite chaque passage)
+    filtre_passages = {"passages.id_horaire": filtre["_id"]} if "_id" in filtre else {}
+    return [
+        {"$match": filtre_passages},
+        {"$unwind": "$passages"},
+        {"$replaceWith": {"$mergeObjects": [
+            "$passages",
+            {"_id": "$passages.id_horaire", "id_vehicule": "$id_vehicule", "id_ligne": "$id_ligne"}
+        ]}},
+        *pipeline,
+    ]
+
+def pipeline_mesures(filtre):
+    """
+    cumuls des valeurs numériques par arrêt et par capteur
+
+    Args:
+        filtre (dict): documents Mesures à cumuler
+
+    Returns:
+        list: pipeline sur Mesures (à plat)
+    """
+    # valeurs textuelles ignorées, comme par $avg
+    numerique = {"$cond": [{"$isNumber": "$valeur"}, "$valeur", None]}
+    return [
+        {"$match": filtre},
+        {"$group": {
+            "_id": {"id_arret": "$id_arret", "id_capteur": "$id_capteur", "type_capteur": "$type_capteur"},
+            "nb": {"$sum": {"$cond": [{"$isNumber": "$valeur"}, 1, 0]}},
+            "somme": {"$sum": numerique},
+            "min": {"$min": numerique},
+            "max": {"$max": numerique}
+        }},
+        etape_merge(STATS_ARRET_CAPTEUR, ["nb", "somme"], ["min"], ["max"]),
+    ]
+
+def agreger(db, collection, pipeline, schema):
+    """
+    exécution d'un pipeline de rollup, adapté au schéma pour la collection Mesures
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        collection (str): collection source
+        pipeline (list): pipeline se terminant par $merge
+        schema (dict): options du schéma (série temporelle, buckets horaires)
+
+    Returns:
+        float: durée d'exécution en secondes
+    """
+    if collection == "Mesures" and schema.get("serie_temporelle"):
+        pipeline = adapter_serie_temporelle(pipeline)
+    if collection == "Horaires" and schema.get("buckets_horaires"):
+        pipeline = aplatir_buckets(pipeline, pipeline[0]["$match"])
+    debut = time.perf_counter()
+    list(db[collection].aggregate(pipeline, allowDiskUse=True))
+    return time.perf_counter() - debut
+
+# ==============================================================================
+# Plages de high-water marks cumulées
+# ==============================================================================
+def ecrire_marques_rollups(db, marques, termine):
+    """
+    enregistrement des plages cumulées dans les rollups
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        marques (dict or None): table -> (borne exclue, borne incluse) cumulées,
+            None si les cumuls ne correspondent à aucune plage connue
+        termine (bool): False pendant la mise à jour des cumuls
+    """
+    plages = None if marques is None else {table: list(plage) for table, plage in marques.items()}
+    db["MigrationMeta"].replace_one(
+        {"_id": META_ROLLUPS},
+        {"marques": plages, "termine": termine},
+        upsert=True
+    )
+
+def etat_rollups(db, marques):
+    """
+    action à mener sur les rollups pour les plages d'une migration incrémentale
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        marques (dict): table -> (borne exclue, borne incluse) migrées
+
+    Returns:
+        str: "a_jour" si ces plages sont déjà cumulées, "incremental" si les cumuls
+            s'arrêtent au début de ces plages, "reconstruction" sinon (mise à jour
+            interrompue, reconstruction manuelle, plages décalées)
+    """
+    meta = db["MigrationMeta"].find_one({"_id": META_ROLLUPS})
+    # rollups antérieurs au suivi des plages : ajout des nouveaux documents
+    if meta is None:
+        return "incremental"
+    cumulees = meta.get("marques")
+    if not meta.get("termine") or cumulees is None or set(cumulees) != set(marques):
+        return "reconstruction"
+    if all(cumulees[table] == list(plage) for table, plage in marques.items()):
+        return "a_jour"
+    if all(cumulees[table][1] == plage[0] for table, plage in marques.items()):
+        return "incremental"
+    return "reconstruction"
+
+# ==============================================================================
+# Construction et mise à jour des rollups
+# ==============================================================================
+def reconstruire_rollups(db, schema, marques=None):
+    """
+    reconstruction complète des rollups à partir des collections brutes
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        schema (dict): options du schéma
+        marques (dict or None): table -> (borne exclue, borne incluse) présentes dans
+            les collections brutes, None si inconnues (reconstruction manuelle)
+
+    Returns:
+        dict: collection source -> durée en secondes
+    """
+    ecrire_marques_rollups(db, marques, False)
+    for collection in COLLECTIONS_ROLLUPS:
+        db[collection].drop()
+    # foreignField des $lookup par ligne (requêtes i et k)
+    db[STATS_LIGNE_JOUR].create_index([("_id.id_ligne", 1)])
+    durees = {
+        "TraficEvents": agreger(db, "TraficEvents", pipeline_trafic({}), schema),
+        "Horaires": agreger(db, "Horaires", pipeline_horaires({}), schema),
+        "Mesures": agreger(db, "Mesures", pipeline_mesures({}), schema),
+    }
+    ecrire_marques_rollups(db, marques, True)
+    return durees
+
+def mettre_a_jour_rollups(db, schema, marques):
+    """
+    ajout aux rollups des seuls documents écrits par une migration incrémentale
+
+    TraficEvents et Horaires sont filtrés sur leur _id (id_trafic, id_horaire),
+    les mesures sur leur clé source id_mesure (rowid), entre les high-water marks.
+
+    Args:
+        db (pymongo.database.Database): base mongodb migrée
+        schema (dict): options du schéma
+        marques (dict): table -> (borne exclue, borne incluse) migrées
+
+    Returns:
+        dict: collection source -> durée en secondes
+    """
+    trafic_depuis, trafic_jusqu_a = marques["Trafic"]
+    incident_depuis, incident_jusqu_a = marques["Incident"]
+    horaire_depuis, horaire_jusqu_a = marques["Horaire"]
+    mesure_depuis, mesure_jusqu_a = marques["Mesure"]
+    # une interruption laisse les plages marquées non terminées : reconstruction au passage suivant
+    ecrire_marques_rollups(db, marques, False)
+    durees = {
+        "TraficEvents": agreger(db, "TraficEvents", pipeline_trafic(
+            {"_id": {"$gt": trafic_depuis, "$lte": trafic_jusqu_a}}), schema),
+        "IncidentsTardifs": agreger(db, "TraficEvents", pipeline_incidents_tardifs(
+            trafic_depuis, incident_depuis, incident_jusqu_a), schema),
+        "Horaires": agreger(db, "Horaires", pipeline_horaires(
+            {"_id": {"$gt": horaire_depuis, "$lte": horaire_jusqu_a}}), schema),
+        "Mesures": agreger(db, "Mesures", pipeline_mesures(
+            {"id_mesure": {"$gt": mesure_depuis, "$lte": mesure_jusqu_a}}), schema),
+    }
+    ecrire_marques_rollups(db, marques, True)
+    return durees
+
+if __name__ == "__main__":
+    client = pymongo.MongoClient("mongodb://localhost:27017/")
+    db = client["Paris2055"]
+
+    # reconstruction complète, par exemple après une migration incrémentale interrompue.
+    # les plages présentes dans les collections brutes sont inconnues : la prochaine
+    # migration incrémentale reconstruit à nouveau les cumuls
+    print("--- Reconstruction des rollups ---")
+    for source, duree in reconstruire_rollups(db, lire_schema(db)).items():
+        print(f"Rollup {source:<15} : {duree:.2f} s")
+    db["MigrationMeta"].update_one({"_id": "schema"}, {"$set": {"rollups": True}}, upsert=True)
+    # les réponses depuis les rollups peuvent changer : invalidation du cache
+    ecrire_version(db)
+    for collection in COLLECTIONS_ROLLUPS:
+        print(f"Collection {collection:<20} : {db[collection].count_documents({}):>6} documents")
+    client.close()
@@ -0,0 +1,180 @@
+import re
+import sys
+import sqlite3
+
+SQLITE_PATH = "Paris2055.sqlite"
+
+# ==============================================================================
+# Profil de lecture de la base source
+# ==============================================================================
+# la base source n'est jamais modifiée par les requêtes ni par la migration :
+# ouverture en mode=ro, lecture des pages par mmap et cache de pages élargi.
+# journal_mode n'est pas modifié (un passage en WAL s'écrirait dans le fichier).
+PROFIL_LECTURE = {
+    "mmap_size": 1024 ** 3,      # 1 Go projetés en mémoire
+    "cache_size": -256 * 1024,   # 256 Mo (valeur négative : en Kio)
+    "temp_store": "MEMORY",      # tris et tables temporaires en mémoire
+}
+
+def connecter(chemin=SQLITE_PATH, pragmas=PROFIL_LECTURE, query_only=True):
+    """
+    ouverture de la base source en lecture seule avec le profil de lecture
+
+    Args:
+        chemin (str): fichier sqlite
+        pragmas (dict): pragma -> valeur appliqués à la connexion
+        query_only (bool): interdit toute écriture, y compris les tables temporaires
+            (à désactiver pour matérialiser des tables intermédiaires)
+
+    Returns:
+        sqlite3.Connection: connexion configurée
+    """
+    conn = sqlite3.connect(f"file:{chemin}?mode=ro", uri=True)
+    for pragma, valeur in pragmas.items():
+        conn.execute(f"PRAGMA {pragma} = {valeur}")
+    if query_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+# ==============================================================================
+# Index de la base source
+# ==============================================================================
+# nom -> (table, colonnes), avec les requêtes qui les utilisent.
+# les index couvrants contiennent toutes les colonnes lues (le rowid y est implicite) :
+# le parcours se fait alors sur l'index, sans lecture des lignes de la table.
+INDEX_SOURCE = {
+    # StatsTrafic (A, C, F, I, K, N) : regroupement par ligne
+    "idx_trafic_ligne_retard": ("Trafic", ["id_ligne", "retard_minutes"]),
+    # comptage des incidents par trafic (StatsTrafic) et jointure TraficEvents de la migration
+    "idx_incident_trafic": ("Incident", ["id_trafic", "id_incident"]),
+    # StatsCapteur (D, E, I, J, M) : sommes par capteur
+    "idx_mesure_capteur_valeur": ("Mesure", ["id_capteur", "valeur"]),
+    "idx_capteur_arret": ("Capteur", ["id_arret", "type_capteur"]),
+    # B : passagers par véhicule et par jour
+    "idx_horaire_vehicule": ("Horaire", ["id_vehicule", "heure_effective", "passagers_estimes"]),
+    # G : ponctualité globale
+    "idx_horaire_ponctualite": ("Horaire", ["heure_effective", "heure_prevue"]),
+    # D, I, J, M : arrêts d'une ligne
+    "idx_arret_ligne": ("Arret", ["id_ligne"]),
+    # E, H : liaison dans les deux sens
+    "idx_arretquartier_quartier": ("ArretQuartier", ["id_quartier", "id_arret"]),
+    "idx_arretquartier_arret": ("ArretQuartier", ["id_arret", "id_quartier"]),
+    # D, K, L : véhicules d'une ligne et leur chauffeur
+    "idx_vehicule_ligne": ("Vehicule", ["id_ligne", "id_chauffeur"]),
+}
+
+# tables volumineuses sur lesquelles un parcours sans index est signalé
+GRANDES_TABLES = {"Trafic", "Incident", "Mesure", "Horaire"}
+
+def creer_index_source(chemin=SQLITE_PATH, index_source=INDEX_SOURCE):
+    """
+    création des index manquants de la base source, puis mise à jour des statistiques
+
+    étape optionnelle : c'est la seule écriture faite dans la base source.
+
+    Args:
+        chemin (str): fichier sqlite
+        index_source (dict): nom -> (table, colonnes)
+
+    Returns:
+        list: noms des index créés (absents auparavant)
+    """
+    conn = sqlite3.connect(chemin)
+    existants = {nom for (nom,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    crees = []
+    for nom, (table, colonnes) in index_source.items():
+        if nom not in existants:
+            conn.execute(f"CREATE INDEX {nom} ON {table} ({', '.join(colonnes)})")
+            crees.append(nom)
+    # statistiques utilisées par le planificateur pour choisir entre les index
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return crees
+
+# ==============================================================================
+# Vérification des plans d'exécution
+# ==============================================================================
+def parcours_complets(conn, requete, tables=GRANDES_TABLES):
+    """
+    tables parcourues intégralement sans index selon EXPLAIN QUERY PLAN
+
+    un parcours d'index couvrant ("SCAN t USING COVERING INDEX") n'est pas signalé.
+
+    Args:
+        conn (sqlite3.Connection): connexion sqlite source
+        requete (str): requête sql, éventuellement paramétrée par des ?
+        tables (set): tables à surveiller
+
+    Returns:
+        list: lignes du plan signalées
+    """
+    # les paramètres n'influencent pas le plan : valeurs factices
+    params = (0,) * requete.count("?")
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {requete}", params).fetchall()
+    signales = []
+    for _, _, _, detail in plan:
+        # "SCAN TABLE t" avant sqlite 3.36, "SCAN t" ensuite
+        scan = re.match(r"SCAN (?:TABLE )?(\w+)(?: AS \w+)?$", detail)
+        if scan and scan.group(1) in tables:
+            signales.append(detail)
+    return signales
+
+def verifier_plans_sql(conn, requetes, tables=GRANDES_TABLES):
+    """
+    EXPLAIN QUERY PLAN de chaque requête et détection des parcours complets
+
+    Args:
+        conn (sqlite3.Connection): connexion sqlite source
+        requetes (dict): nom -> requête sql
+        tables (set): tables à surveiller
+
+    Returns:
+        dict: nom -> lignes du plan signalées
+    """
+    return {nom: parcours_complets(conn, requete, tables) for nom, requete in requetes.items()}
+
+def requetes_a_verifier():
+    """
+    requêtes de la partie 1 (tables intermédiaires comprises) et de la migration
+
+    Returns:
+        dict: nom -> requête sql
+    """
+    # import local : partie_1 et partie_2 importent ce module
+    import partie_1_req_sql
+    import partie_2_migration
+
+    # SELECT des tables intermédiaires (déjà créées sur la connexion vérifiée)
+    requetes = {
+        f"partie_1 {nom}": re.sub(r"^\s*CREATE TEMP TABLE \w+ AS", "", requete)
+        for nom, requete in partie_1_req_sql.INTERMEDIAIRES.items()
+    }
+    requetes.update({f"partie_1 {lettre.upper()}": requete for lettre, requete in partie_1_req_sql.REQUETES_SQL.items()})
+    requetes.update({
+        "migration TraficEvents": partie_2_migration.query_trafic,
+        "migration incidents tardifs": partie_2_migration.query_incidents_tardifs,
+        "migration Mesures": partie_2_migration.query_mesures,
+        "migration Horaires": partie_2_migration.query_horaires,
+    })
+    return requetes
+
+if __name__ == "__main__":
+    if "--creer" in sys.argv:
+        crees = creer_index_source()
+        print(f"Index créés : {', '.join(crees) if crees else 'aucun (déjà présents)'}")
+
+    conn = connecter(query_only=False)
+    # les requêtes de la partie 1 lisent les tables intermédiaires
+    import partie_1_req_sql
+    partie_1_req_sql.materialiser_intermediaires(conn)
+
+    print("--- Vérification des plans d'exécution SQLite ---")
+    anomalies = verifier_plans_sql(conn, requetes_a_verifier())
+    for nom, signales in anomalies.items():
+        statut = "OK" if not signales else " | ".join(signales)
+        print(f"{nom:<30} : {statut}")
+    conn.close()
+
+    # code de retour non nul si une grande table est parcourue sans index
+    sys.exit(1 if any(anomalies.values()) else 0)
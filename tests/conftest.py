@@ -0,0 +1,34 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# modules du projet à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def base_trafic(tmp_path):
+    """
+    petite base sqlite Trafic / Incident
+
+    les trafics 2 et 5 ont plusieurs incidents, le trafic 3 aucun.
+
+    Returns:
+        str: chemin du fichier sqlite
+    """
+    chemin = str(tmp_path / "source.sqlite")
+    conn = sqlite3.connect(chemin)
+    conn.executescript("""
+        CREATE TABLE Trafic (id_trafic INTEGER PRIMARY KEY, id_ligne INTEGER, horodatage TEXT,
+                             retard_minutes INTEGER, evenement TEXT);
+        CREATE TABLE Incident (id_incident INTEGER PRIMARY KEY, id_trafic INTEGER, description TEXT,
+                               gravite INTEGER, horodatage TEXT);
+    """)
+    conn.executemany("INSERT INTO Trafic VALUES (?, 1, '2055-01-01 08:00:00', ?, 'retard')",
+                     [(i, i * 2) for i in range(1, 7)])
+    conn.executemany("INSERT INTO Incident VALUES (?, ?, 'panne', 2, '2055-01-01 08:05:00')",
+                     [(1, 2), (2, 2), (3, 2), (4, 4), (5, 5), (6, 5), (7, 6)])
+    conn.commit()
+    conn.close()
+    return chemin
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from comparateur import comparer_fichiers
+
+# ==============================================================================
+# Comparaison de deux fichiers de résultats
+# ==============================================================================
+@pytest.fixture
+def fichiers(tmp_path):
+    """
+    écriture d'un couple de résultats sql / nosql
+
+    Returns:
+        callable: fichiers(sql, nosql) -> (chemin sql, chemin nosql), colonnes en dict
+    """
+    def ecrire(sql, nosql):
+        chemins = []
+        for nom, colonnes in (("sql", sql), ("nosql", nosql)):
+            chemin = tmp_path / f"X_{nom}.csv"
+            pd.DataFrame(colonnes).to_csv(chemin, index=False)
+            chemins.append(str(chemin))
+        return chemins
+    return ecrire
+
+# résultat trié par retard décroissant
+SQL = {"id_ligne": [1, 2, 3, 4], "retard": [9.5, 7.25, 7.25, 1.0]}
+
+def test_ecarts_de_calcul_toleres(fichiers):
+    chemin_sql, chemin_nosql = fichiers(SQL, {"id_ligne": [1, 2, 3, 4], "retard": [9.5 + 1e-12, 7.25, 7.25, 1.0]})
+    assert comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"])["statut"] == "OK"
+
+def test_valeur_differente(fichiers):
+    chemin_sql, chemin_nosql = fichiers(SQL, {"id_ligne": [1, 2, 3, 4], "retard": [9.5, 7.25, 7.25, 1.1]})
+    rapport = comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"])
+    assert rapport["statut"] == "ECHEC"
+    assert rapport["valeurs"] == 1
+    assert rapport["exemples"]["id_ligne_sql"].tolist() == [4]
+
+def test_ordre_libre_entre_lignes_a_egalite(fichiers):
+    chemin_sql, chemin_nosql = fichiers(SQL, {"id_ligne": [1, 3, 2, 4], "retard": [9.5, 7.25, 7.25, 1.0]})
+    assert comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"])["statut"] == "OK"
+
+def test_ligne_mal_placee(fichiers):
+    chemin_sql, chemin_nosql = fichiers(SQL, {"id_ligne": [2, 1, 3, 4], "retard": [7.25, 9.5, 7.25, 1.0]})
+    rapport = comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"])
+    assert rapport["statut"] == "ECHEC"
+    assert rapport["mal_placees"] > 0
+    assert comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"], mode="ensemble")["statut"] == "OK"
+
+def test_egalite_avec_la_derniere_ligne_d_un_limit(fichiers):
+    # LIMIT 3 : la troisième ligne peut être l'une ou l'autre des lignes à 7.25
+    sql = {"id_ligne": [1, 2, 3], "retard": [9.5, 7.25, 7.25]}
+    chemin_sql, chemin_nosql = fichiers(sql, {"id_ligne": [1, 2, 5], "retard": [9.5, 7.25, 7.25]})
+    assert comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"], limite=True)["statut"] == "OK"
+    assert comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"])["statut"] == "ECHEC"
+
+def test_ligne_hors_egalite_sous_un_limit(fichiers):
+    sql = {"id_ligne": [1, 2, 3], "retard": [9.5, 7.25, 7.25]}
+    chemin_sql, chemin_nosql = fichiers(sql, {"id_ligne": [6, 2, 3], "retard": [9.5, 7.25, 7.25]})
+    rapport = comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"], limite=True)
+    assert (rapport["statut"], rapport["absentes"], rapport["en_trop"]) == ("ECHEC", 1, 1)
+
+@pytest.mark.parametrize("taille_max", [10, 200])
+def test_comparaison_par_partitions(fichiers, taille_max):
+    # fichiers plus grands que taille_max : comparaison partition par partition
+    ids = list(range(200))
+    sql = {"id_ligne": ids, "retard": [float(i % 7) for i in ids]}
+    nosql = {"id_ligne": ids[::-1], "retard": [float(i % 7) for i in ids[::-1]]}
+    nosql["retard"][0] += 1
+    chemin_sql, chemin_nosql = fichiers(sql, nosql)
+    rapport = comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], mode="ensemble", taille_max=taille_max)
+    assert (rapport["statut"], rapport["valeurs"], rapport["lignes_sql"], rapport["lignes_nosql"]) == ("ECHEC", 1, 200, 200)
+    assert rapport["exemples"]["id_ligne_sql"].tolist() == [199]
+
+def test_sans_cle_en_ensemble(fichiers):
+    sql = {"total": [1, 2, 3], "moyenne": [0.5, 0.25, 0.125]}
+    chemin_sql, chemin_nosql = fichiers(sql, {"total": [3, 1, 2], "moyenne": [0.125, 0.5, 0.25]})
+    assert comparer_fichiers(chemin_sql, chemin_nosql, [], mode="ensemble")["statut"] == "OK"
+    assert comparer_fichiers(chemin_sql, chemin_nosql, [], mode="ensemble", taille_max=10)["statut"] == "OK"
+
+def test_colonnes_differentes(fichiers):
+    chemin_sql, chemin_nosql = fichiers(SQL, {"id_ligne": [1, 2, 3, 4], "retard_moyen": [9.5, 7.25, 7.25, 1.0]})
+    assert comparer_fichiers(chemin_sql, chemin_nosql, ["id_ligne"], ["retard"])["statut"] == "ECHEC"
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from donnees_dashboard import lttb, quartiers_pollution
+
+# ==============================================================================
+# Sous-échantillonnage des tendances (lttb)
+# ==============================================================================
+def serie(valeurs):
+    """
+    série de relevés à la minute
+
+    Args:
+        valeurs (list): valeurs successives
+
+    Returns:
+        pd.DataFrame: colonnes date, valeur
+    """
+    dates = pd.date_range("2055-01-01", periods=len(valeurs), freq="min")
+    return pd.DataFrame({"date": dates, "valeur": np.asarray(valeurs, dtype=float)})
+
+@pytest.mark.parametrize("seuil", [3, 10, 57, 999])
+def test_nombre_de_points_et_extremites(seuil):
+    df = serie(np.sin(np.arange(1000) / 20))
+    reduit = lttb(df, seuil)
+    assert len(reduit) == seuil
+    assert reduit["date"].iloc[0] == df["date"].iloc[0]
+    assert reduit["date"].iloc[-1] == df["date"].iloc[-1]
+    # points de df, dans l'ordre
+    assert reduit["date"].is_monotonic_increasing and reduit["date"].is_unique
+    assert reduit["date"].isin(df["date"]).all()
+
+def test_pic_et_creux_conserves():
+    valeurs = np.full(1000, 20.0)
+    valeurs[314], valeurs[777] = 95.0, -40.0
+    reduit = lttb(serie(valeurs), 20)
+    assert reduit["valeur"].max() == 95.0
+    assert reduit["valeur"].min() == -40.0
+
+@pytest.mark.parametrize("seuil", [2, 5, 6])
+def test_serie_courte_inchangee(seuil):
+    # seuil au moins égal à la longueur, ou trop petit pour un intervalle
+    df = serie([1, 5, 2, 8, 3])
+    assert lttb(df, seuil) is df
+
+# ==============================================================================
+# Carte de pollution par quartier
+# ==============================================================================
+class Collection:
+    """collection dont find et aggregate renvoient les documents donnés"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, filtre=None, projection=None):
+        return list(self.documents)
+
+    def aggregate(self, pipeline):
+        return list(self.documents)
+
+class Base(dict):
+    def __getattr__(self, nom):
+        return self[nom]
+
+@pytest.mark.parametrize("moyennes", [
+    [None, None],
+    [None, 412.5],
+])
+def test_quartiers_sans_mesure_numerique(moyennes):
+    db = Base(
+        Quartiers=Collection([{"_id": 1, "nom": "Bercy"}, {"_id": 2, "nom": "Montmartre"}]),
+        stats_arret_capteur=Collection([{"_id": i + 1, "avg_co2": m} for i, m in enumerate(moyennes)]),
+    )
+    df = quartiers_pollution(db, None, rollups=True)
+    assert list(df.columns) == ["nom", "co2"]
+    assert df.to_dict("records") == [{"nom": "Montmartre", "co2": m} for m in moyennes if m is not None]
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from geo_carte import douglas_peucker, simplifier_anneau, simplifier_geometrie
+
+# ==============================================================================
+# Simplification des contours (douglas-peucker)
+# ==============================================================================
+def distance_segment(p, a, b):
+    """
+    distance d'un point à un segment
+
+    Args:
+        p, a, b (np.ndarray): point, extrémités du segment
+
+    Returns:
+        float: distance
+    """
+    ab = b - a
+    t = 0.0 if not ab.any() else np.clip(np.dot(p - a, ab) / np.dot(ab, ab), 0, 1)
+    return float(np.hypot(*(p - (a + t * ab))))
+
+def test_points_alignes_supprimes():
+    points = np.column_stack([np.linspace(0, 1, 50), np.linspace(0, 2, 50)])
+    assert douglas_peucker(points, 1e-9).tolist() == [[0.0, 0.0], [1.0, 2.0]]
+
+@pytest.mark.parametrize("tolerance", [0.01, 0.1, 0.5])
+def test_ecart_borne_par_la_tolerance(tolerance):
+    x = np.linspace(0, 10, 400)
+    points = np.column_stack([x, np.sin(x) + 0.05 * np.cos(7 * x)])
+    simplifie = douglas_peucker(points, tolerance)
+    assert simplifie[0].tolist() == points[0].tolist()
+    assert simplifie[-1].tolist() == points[-1].tolist()
+    assert len(simplifie) < len(points)
+    # chaque point d'origine reste à moins de tolerance du tracé simplifié
+    for p in points:
+        assert min(distance_segment(p, a, b) for a, b in zip(simplifie[:-1], simplifie[1:])) <= tolerance + 1e-12
+
+def test_moins_de_trois_points():
+    points = np.array([[0.0, 0.0], [1.0, 1.0]])
+    assert douglas_peucker(points, 1.0) is points
+
+def test_anneau_ferme_simplifie():
+    # carré échantillonné finement, premier point = dernier point
+    cote = np.linspace(0, 1, 26)[:-1]
+    contour = np.concatenate([
+        np.column_stack([cote, np.zeros(25)]), np.column_stack([np.ones(25), cote]),
+        np.column_stack([1 - cote, np.ones(25)]), np.column_stack([np.zeros(25), 1 - cote]),
+    ])
+    anneau = np.vstack([contour, contour[:1]]).tolist()
+    simplifie = simplifier_anneau(anneau, 1e-6, 5)
+    assert simplifie[0] == simplifie[-1]
+    assert sorted(map(tuple, simplifie[:-1])) == [(0.0, 0.0), (0.0, 1.0), (1.0, 0.0), (1.0, 1.0)]
+
+@pytest.mark.parametrize("anneau", [
+    # triangle plus petit que la tolérance
+    [[2.35, 48.85], [2.35001, 48.85], [2.35, 48.85001], [2.35, 48.85]],
+    # anneau dégénéré (aller-retour)
+    [[2.35, 48.85], [2.36, 48.86], [2.35, 48.85], [2.36, 48.86], [2.35, 48.85]],
+])
+def test_anneau_garde_au_moins_quatre_positions(anneau):
+    simplifie = simplifier_anneau(anneau, 1e-2, 5)
+    assert len(simplifie) >= 4
+    assert simplifie[0] == simplifie[-1]
+
+def test_coordonnees_arrondies():
+    anneau = [[2.3512345678, 48.8512345678], [2.36, 48.85], [2.36, 48.86], [2.3512345678, 48.8512345678]]
+    geometrie = simplifier_geometrie({"type": "MultiPolygon", "coordinates": [[anneau]]}, 1e-4, 5)
+    assert geometrie["type"] == "MultiPolygon"
+    assert geometrie["coordinates"][0][0][0] == [2.35123, 48.85123]
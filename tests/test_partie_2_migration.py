@@ -0,0 +1,119 @@
+import sqlite3
+
+import bson
+import pytest
+from pymongo.errors import BulkWriteError
+
+from partie_2_migration import (
+    CODE_DOUBLON, DEBUT_TABLE, config_par_defaut, decouper_lots, envoyer_lot, generer_trafic_docs, plages_cles
+)
+
+# ==============================================================================
+# Lecture par blocs de TraficEvents
+# ==============================================================================
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 4, 100])
+def test_incidents_reportes_au_bloc_suivant(base_trafic, chunksize):
+    # les incidents d'un trafic à cheval sur deux blocs restent dans un seul document
+    conn = sqlite3.connect(base_trafic)
+    docs = list(generer_trafic_docs(conn, (1, 7), max_incident=100, chunksize=chunksize))
+    conn.close()
+    assert [doc["_id"] for doc in docs] == [1, 2, 3, 4, 5, 6]
+    incidents = {doc["_id"]: [i["id_incident"] for i in doc["incidents"]] for doc in docs}
+    assert incidents == {1: [], 2: [1, 2, 3], 3: [], 4: [4], 5: [5, 6], 6: [7]}
+
+def test_incidents_limites_a_la_marque(base_trafic):
+    conn = sqlite3.connect(base_trafic)
+    docs = list(generer_trafic_docs(conn, (2, 6), max_incident=5, chunksize=2))
+    conn.close()
+    assert [doc["_id"] for doc in docs] == [2, 3, 4, 5]
+    assert [len(doc["incidents"]) for doc in docs] == [3, 0, 1, 1]
+
+def test_plage_vide(base_trafic):
+    conn = sqlite3.connect(base_trafic)
+    assert list(generer_trafic_docs(conn, (50, 60), max_incident=100, chunksize=2)) == []
+    conn.close()
+
+# ==============================================================================
+# Découpage des grandes tables en plages de clés
+# ==============================================================================
+def config_plages(chemin, marques, partitions):
+    config = config_par_defaut()
+    config.update({"sqlite_path": chemin, "marques": {"Trafic": marques}, "partitions": partitions})
+    return config
+
+def ids_couverts(plages):
+    return [i for debut, fin in plages for i in range(debut, fin)]
+
+@pytest.mark.parametrize("partitions", [1, 2, 4, 6, 10])
+def test_plages_couvrent_la_table(base_trafic, partitions):
+    plages = plages_cles(config_plages(base_trafic, (DEBUT_TABLE, 6), partitions), "Trafic", "id_trafic")
+    assert ids_couverts(plages) == [1, 2, 3, 4, 5, 6]
+    assert len(plages) <= partitions
+
+def test_plages_entre_les_marques(base_trafic):
+    # borne basse exclue, borne haute incluse
+    plages = plages_cles(config_plages(base_trafic, (2, 5), 2), "Trafic", "id_trafic")
+    assert ids_couverts(plages) == [3, 4, 5]
+
+def test_aucune_ligne_a_migrer(base_trafic):
+    assert plages_cles(config_plages(base_trafic, (6, 6), 4), "Trafic", "id_trafic") == []
+
+# ==============================================================================
+# Écriture en masse
+# ==============================================================================
+def operations(nb, taille=10):
+    return [(f"op{i}", {"_id": i, "texte": "x" * taille}) for i in range(nb)]
+
+def test_lots_bornes_en_nombre():
+    lots = list(decouper_lots(operations(12), max_docs=5, max_octets=10 ** 6))
+    assert [len(lot) for lot in lots] == [5, 5, 2]
+    assert [op for lot in lots for op in lot] == [f"op{i}" for i in range(12)]
+
+def test_lots_bornes_en_octets():
+    ops = operations(6, taille=100)
+    octets = len(bson.encode(ops[0][1]))
+    lots = list(decouper_lots(ops, max_docs=100, max_octets=2 * octets))
+    assert [len(lot) for lot in lots] == [2, 2, 2]
+
+def test_document_plus_grand_qu_un_lot():
+    # un document trop gros part seul plutôt que d'être perdu
+    lots = list(decouper_lots(operations(3, taille=1000), max_docs=100, max_octets=10))
+    assert [len(lot) for lot in lots] == [1, 1, 1]
+
+def test_aucune_operation():
+    assert list(decouper_lots([], max_docs=5, max_octets=100)) == []
+
+class CollectionErreurs:
+    """collection dont chaque bulk_write échoue avec les erreurs données, puis réussit"""
+
+    def __init__(self, erreurs):
+        self.erreurs = list(erreurs)
+        self.envois = []
+
+    def bulk_write(self, lot, ordered=False):
+        self.envois.append(list(lot))
+        if self.erreurs:
+            codes = self.erreurs.pop(0)
+            raise BulkWriteError({
+                "nInserted": len(lot) - len(codes), "nUpserted": 0, "nMatched": 0,
+                "writeErrors": [{"index": i, "code": code} for i, code in enumerate(codes)],
+            })
+        return type("Resultat", (), {"inserted_count": len(lot), "upserted_count": 0, "matched_count": 0})()
+
+def test_doublon_compte_comme_ecrit_des_la_premiere_tentative():
+    collection = CollectionErreurs([[CODE_DOUBLON]])
+    compteurs = envoyer_lot(collection, ["a", "b", "c"], {"max_reessais": 2, "backoff": 0})
+    assert compteurs == {"ecrits": 3, "echecs": 0, "reessais": 0}
+    assert len(collection.envois) == 1
+
+def test_erreur_transitoire_reessayee():
+    # seule l'opération en erreur transitoire (code 91) est renvoyée
+    collection = CollectionErreurs([[91]])
+    compteurs = envoyer_lot(collection, ["a", "b"], {"max_reessais": 2, "backoff": 0})
+    assert compteurs == {"ecrits": 2, "echecs": 0, "reessais": 1}
+    assert collection.envois[1] == ["a"]
+
+def test_erreur_definitive_comptee_en_echec():
+    collection = CollectionErreurs([[121]])
+    compteurs = envoyer_lot(collection, ["a", "b"], {"max_reessais": 2, "backoff": 0})
+    assert compteurs == {"ecrits": 1, "echecs": 1, "reessais": 0}
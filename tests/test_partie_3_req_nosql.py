@@ -0,0 +1,51 @@
+from partie_3_req_nosql import META_MESURES, adapter_serie_temporelle
+
+# ==============================================================================
+# Réécriture des pipelines pour Mesures en série temporelle
+# ==============================================================================
+def champ(nom):
+    return f"{META_MESURES}.{nom}"
+
+def test_filtre_et_tri_lus_dans_le_metafield():
+    adapte = adapter_serie_temporelle([
+        {"$match": {"type_capteur": "CO2", "date": {"$gte": 1}, "$or": [{"id_arret": 1}, {"valeur": 2}]}},
+        {"$sort": {"id_arret": 1, "date": -1}},
+    ])
+    assert adapte == [
+        {"$match": {champ("type_capteur"): "CO2", "date": {"$gte": 1}, "$or": [{champ("id_arret"): 1}, {"valeur": 2}]}},
+        {"$sort": {champ("id_arret"): 1, "date": -1}},
+    ]
+
+def test_projection_recopie_les_champs_du_capteur():
+    adapte = adapter_serie_temporelle([
+        {"$project": {"_id": 0, "type_capteur": 1, "valeur": 1, "capteur_id": "$id_capteur"}},
+    ])
+    assert adapte == [
+        {"$project": {"_id": 0, "type_capteur": f"${champ('type_capteur')}", "valeur": 1,
+                      "capteur_id": f"${champ('id_capteur')}"}},
+    ]
+
+def test_etapes_apres_remodelage_inchangees():
+    # après $group, type_capteur désigne la clé du regroupement, plus le champ de la mesure
+    pipeline = [
+        {"$group": {"_id": "$type_capteur", "moyenne": {"$avg": "$valeur"}}},
+        {"$match": {"type_capteur": "CO2"}},
+        {"$sort": {"id_arret": 1}},
+    ]
+    adapte = adapter_serie_temporelle(pipeline)
+    assert adapte[0] == {"$group": {"_id": f"${champ('type_capteur')}", "moyenne": {"$avg": "$valeur"}}}
+    assert adapte[1:] == pipeline[1:]
+
+def test_jointure_vers_mesures():
+    adapte = adapter_serie_temporelle([
+        {"$lookup": {"from": "Mesures", "localField": "arrets.id_arret", "foreignField": "id_arret", "as": "m"}},
+        {"$lookup": {"from": "Mesures", "let": {"a": "$_id"}, "pipeline": [{"$match": {"type_capteur": "CO2"}}], "as": "n"}},
+    ], sur_mesures=False)
+    assert adapte[0]["$lookup"]["localField"] == "arrets.id_arret"
+    assert adapte[0]["$lookup"]["foreignField"] == champ("id_arret")
+    assert adapte[1]["$lookup"]["pipeline"] == [{"$match": {champ("type_capteur"): "CO2"}}]
+
+def test_pipeline_d_origine_non_modifie():
+    pipeline = [{"$match": {"type_capteur": "CO2"}}]
+    adapter_serie_temporelle(pipeline)
+    assert pipeline == [{"$match": {"type_capteur": "CO2"}}]
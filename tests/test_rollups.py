@@ -0,0 +1,71 @@
+import pytest
+
+from rollups import etat_rollups, mettre_a_jour_rollups, reconstruire_rollups
+
+# ==============================================================================
+# Plages de high-water marks cumulées
+# ==============================================================================
+class Collection:
+    """collection en mémoire : documents par _id, agrégations comptées ou en échec"""
+
+    def __init__(self, echec=False):
+        self.documents = {}
+        self.agregations = 0
+        self.echec = echec
+
+    def find_one(self, filtre):
+        return self.documents.get(filtre["_id"])
+
+    def replace_one(self, filtre, document, upsert=False):
+        self.documents[filtre["_id"]] = {"_id": filtre["_id"], **document}
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        if self.echec:
+            raise RuntimeError("migration interrompue")
+        self.agregations += 1
+        return []
+
+    def drop(self):
+        pass
+
+    def create_index(self, cles):
+        pass
+
+class Base(dict):
+    def __missing__(self, nom):
+        self[nom] = Collection()
+        return self[nom]
+
+PREMIERE = {"Trafic": (-1, 10), "Incident": (-1, 5), "Mesure": (-1, 100), "Horaire": (-1, 20)}
+SUIVANTE = {"Trafic": (10, 12), "Incident": (5, 9), "Mesure": (100, 150), "Horaire": (20, 20)}
+
+def test_rollups_anterieurs_au_suivi():
+    assert etat_rollups(Base(), SUIVANTE) == "incremental"
+
+def test_plages_enchainees():
+    db = Base()
+    reconstruire_rollups(db, {}, PREMIERE)
+    assert etat_rollups(db, SUIVANTE) == "incremental"
+    mettre_a_jour_rollups(db, {}, SUIVANTE)
+    assert db["TraficEvents"].agregations == 3
+    # migration relancée avant l'écriture de ses marques : rien n'est ajouté
+    assert etat_rollups(db, SUIVANTE) == "a_jour"
+
+def test_plages_decalees_reconstruites():
+    db = Base()
+    mettre_a_jour_rollups(db, {}, SUIVANTE)
+    # marques non enregistrées et source complétée entre-temps
+    assert etat_rollups(db, {**SUIVANTE, "Trafic": (10, 15)}) == "reconstruction"
+
+def test_mise_a_jour_interrompue_reconstruite():
+    db = Base()
+    reconstruire_rollups(db, {}, PREMIERE)
+    db["Horaires"] = Collection(echec=True)
+    with pytest.raises(RuntimeError):
+        mettre_a_jour_rollups(db, {}, SUIVANTE)
+    assert etat_rollups(db, SUIVANTE) == "reconstruction"
+
+def test_reconstruction_manuelle_sans_marques():
+    db = Base()
+    reconstruire_rollups(db, {})
+    assert etat_rollups(db, SUIVANTE) == "reconstruction"
@@ -0,0 +1,28 @@
+import pytest
+
+from source_sqlite import parcours_complets
+
+# ==============================================================================
+# Détection des parcours complets (EXPLAIN QUERY PLAN)
+# ==============================================================================
+class ConnexionPlan:
+    """connexion dont EXPLAIN QUERY PLAN renvoie les lignes de détail données"""
+
+    def __init__(self, details):
+        self.details = details
+
+    def execute(self, requete, params=()):
+        lignes = [(i, 0, 0, detail) for i, detail in enumerate(self.details)]
+        return type("Curseur", (), {"fetchall": lambda _: lignes})()
+
+@pytest.mark.parametrize("details", [
+    # sqlite >= 3.36
+    ["SCAN T", "SCAN Trafic AS T", "SEARCH Ligne USING INTEGER PRIMARY KEY (rowid=?)",
+     "SCAN Mesure USING COVERING INDEX idx_mesure_capteur", "SCAN Arret"],
+    # sqlite < 3.36
+    ["SCAN TABLE T", "SCAN TABLE Trafic AS T", "SEARCH TABLE Ligne USING INTEGER PRIMARY KEY (rowid=?)",
+     "SCAN TABLE Mesure USING COVERING INDEX idx_mesure_capteur", "SCAN TABLE Arret"],
+])
+def test_parcours_complets_des_deux_formats(details):
+    conn = ConnexionPlan(details)
+    assert parcours_complets(conn, "SELECT 1", {"Trafic", "Mesure"}) == [details[1]]